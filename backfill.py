@@ -0,0 +1,232 @@
+import pandas as pd
+import json
+import os
+from datetime import datetime
+from fbref_fetch import build_fbref_url, prefetch_pages
+from soccer_club_scraping_code import (SHOT_DATA_CATEGORY, SKIPPED_STATUS, UpsertBuffer, configure_run, load_leagues, run_update_function,
+                                       scrape_match_report_all_categories, scrape_schedule_from_competition)
+
+
+#where backfill progress is kept between runs, one file per league
+BACKFILL_SETTINGS = {
+    'state_dir': 'data/backfill_state',
+    'max_attempts': 3,
+}
+#statuses of units that are done, skipped units can never load (see unavailable_category_reason)
+DONE_STATUSES = ('loaded', SKIPPED_STATUS)
+
+
+class BackfillState:
+    """
+    progress of a backfill, checkpointed to a json file after every match
+
+    each unit is a (match, category) pair holding its status, how many times it has been tried and the
+    last error. schedules are tracked the same way with the season as the match and 'schedule' as the
+    category, so a season whose schedule page failed is retried too.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.units = dict()
+        self.urls = dict()
+        if os.path.exists(path):
+            with open(path) as f:
+                saved = json.load(f)
+            self.units = saved['units']
+            self.urls = saved.get('urls', {})
+
+    def status(self, key, category):
+        """
+        returns the saved state of a unit
+
+        Args:
+            key(str): match id, or season for a schedule
+            category(str): category of the unit
+
+        Returns:
+            unit(dict): status, attempts and error, None if the unit has never been tried
+        """
+        return self.units.get(key, {}).get(category)
+
+    def needs_work(self, key, category, max_attempts):
+        """
+        whether a unit still has to be run, loaded or skipped units and units out of attempts are left out
+
+        Args:
+            key(str): match id, or season for a schedule
+            category(str): category of the unit
+            max_attempts(int): tries a unit gets across every run
+
+        Returns:
+            needs_work(bool): True if the unit should be run
+        """
+        unit = self.status(key, category)
+        return unit is None or (unit['status'] not in DONE_STATUSES and unit['attempts'] < max_attempts)
+
+    def mark(self, key, category, status, error=None):
+        """
+        records the outcome of one try of a unit, call save to checkpoint it
+
+        Args:
+            key(str): match id, or season for a schedule
+            category(str): category of the unit
+            status(str): loaded, failed or skipped
+            error(str): error message if it failed
+        """
+        unit = self.units.setdefault(key, {}).setdefault(category, {'status': None, 'attempts': 0, 'error': None})
+        unit['status'] = status
+        unit['attempts'] += 1
+        unit['error'] = error
+        unit['updated_at'] = datetime.now().isoformat(timespec='seconds')
+
+    def save(self):
+        """
+        writes the state file, a crash while writing leaves the previous checkpoint in place
+        """
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'units': self.units, 'urls': self.urls}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def failures(self):
+        """
+        lists every unit that is neither loaded nor skipped
+
+        Returns:
+            failures(DataFrame): key, category, url, attempts and error of each unit
+        """
+        rows = [[key, category, self.urls.get(key), unit['attempts'], unit['error']]
+                for key, categories in self.units.items()
+                for category, unit in categories.items() if unit['status'] not in DONE_STATUSES]
+        return pd.DataFrame(rows, columns=['key', 'category', 'url', 'attempts', 'error'])
+
+def backfill_seasons(league_key, seasons, config, categories=None, leagues_path='leagues.yaml', state_path=None,
+                     max_attempts=None, run_staging_updates=True):
+    """
+    Loads whole past seasons of a league, match by match, in a job that can be stopped and started again
+
+    Every (match, category) is checkpointed to the state file once its rows are committed. Running the
+    same backfill again skips what is loaded and only retries units that failed, until they run out
+    of attempts. Failed units are retried within the run as well, pages come from the page cache so
+    a retry usually costs no request.
+
+    Args:
+        league_key(str): key of the league in the leagues file, i.e. NWSL
+        seasons(list): seasons to load, i.e. [2021, 2022, 2023]
+        config(dict): config file
+        categories(list): categories to load (shot data is 'shots'), loads every advanced category if None
+        leagues_path(str): path to the leagues file
+        state_path(str): path of the state file, defaults to <state_dir>/<league_key>.json
+        max_attempts(int): tries each unit gets across every run, defaults to the max_attempts setting
+        run_staging_updates(bool): refresh the staging tables for the matches loaded by this run
+
+    Returns:
+        failures(DataFrame): units that could not be loaded, see BackfillState.failures
+    """
+    configure_run(config)
+    info_dict = load_leagues(leagues_path, [league_key])[league_key]
+    state = BackfillState(state_path or os.path.join(BACKFILL_SETTINGS['state_dir'], '{}.json'.format(league_key)))
+    max_attempts = max_attempts or BACKFILL_SETTINGS['max_attempts']
+    categories = categories or config['advanced_match_report_categories'] + [SHOT_DATA_CATEGORY]
+
+    changed_match_ids = set()
+    for attempt in range(max_attempts):
+        schedules = load_backfill_schedules(info_dict, seasons, config, state, max_attempts)
+        work = {row['id']: [i for i in categories if state.needs_work(row['id'], i, max_attempts)]
+                for row in schedules}
+        matches = [row for row in schedules if work[row['id']]]
+        if not matches:
+            break
+        print('backfill pass {}: {} matches to load'.format(attempt + 1, len(matches)))
+        changed_match_ids.update(backfill_matches(matches, work, info_dict, config, state))
+
+    if run_staging_updates and changed_match_ids:
+        run_update_function(sorted(changed_match_ids))
+
+    failures = state.failures()
+    if failures.empty:
+        print('backfill complete')
+    else:
+        print('{} units could not be loaded'.format(len(failures)))
+        print(failures.to_string(index=False))
+    return failures
+
+def load_backfill_schedules(info_dict, seasons, config, state, max_attempts):
+    """
+    scrapes the schedule of each season, recording a failed schedule page as a unit of the state
+
+    Args:
+        info_dict(dict): league info
+        seasons(list): seasons to load
+        config(dict): config file
+        state(BackfillState): backfill progress
+        max_attempts(int): tries each unit gets
+
+    Returns:
+        rows(list): schedule rows of every season that could be read
+    """
+    rows = list()
+    for season in seasons:
+        key = str(season)
+        unit = state.status(key, 'schedule')
+        if unit is not None and unit['status'] != 'loaded' and unit['attempts'] >= max_attempts:
+            continue
+        try:
+            schedule = scrape_schedule_from_competition(info_dict, season, config, current_season=False)
+            if schedule is False:
+                raise ValueError('schedule page could not be read')
+        except Exception as e:
+            state.mark(key, 'schedule', 'failed', str(e))
+            state.save()
+            continue
+        if unit is None or unit['status'] != 'loaded':
+            state.mark(key, 'schedule', 'loaded')
+            state.save()
+        rows.extend(i[1] for i in schedule.iterrows())
+    return rows
+
+def backfill_matches(matches, work, info_dict, config, state):
+    """
+    loads the given categories of each match, committing and checkpointing one match at a time
+
+    Args:
+        matches(list): schedule rows to load
+        work(dict): match id -> categories still to load
+        info_dict(dict): league info
+        config(dict): config file
+        state(BackfillState): backfill progress
+
+    Returns:
+        changed_match_ids(set): ids of the matches that had rows written
+    """
+    changed_match_ids = set()
+    urls = [build_fbref_url(row['match_report_link']) for row in matches]
+    for row, (url, page_html, error) in zip(matches, prefetch_pages(urls, 'match_report')):
+        match_id = row['id']
+        state.urls[match_id] = url
+        if error is not None:
+            for category in work[match_id]:
+                state.mark(match_id, category, 'failed', 'page: {}'.format(error))
+            state.save()
+            continue
+        #statuses are held back until the buffer is committed, so a crash never checkpoints unwritten rows
+        statuses = list()
+        write_buffer = UpsertBuffer()
+        try:
+            scrape_match_report_all_categories(row, info_dict, config, page_html=page_html, write_buffer=write_buffer,
+                                               only_categories=work[match_id],
+                                               on_status=lambda *status: statuses.append(status))
+            write_buffer.flush()
+            changed_match_ids.update(write_buffer.changed_match_ids)
+        except Exception as e:
+            statuses = [(match_id, category, 'failed', 'write: {}'.format(e)) for category in work[match_id]]
+        for _, category, status, error in statuses:
+            state.mark(match_id, category, status, error)
+        #categories that aren't part of the match report never report back
+        reported = {i[1] for i in statuses}
+        for category in work[match_id]:
+            if category not in reported:
+                state.mark(match_id, category, 'failed', 'not a match report category')
+        state.save()
+    return changed_match_ids
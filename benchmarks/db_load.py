@@ -0,0 +1,436 @@
+import pandas as pd
+import numpy as np
+import argparse
+import atexit
+import hashlib
+import os
+import psycopg2
+import time
+import yaml
+from contextlib import contextmanager
+from datetime import date, timedelta
+import soccer_club_scraping_code as scraping
+from row_ids import configure_ids, generate_ids
+
+
+#run from the repo root: python -m benchmarks.db_load [--strategy direct] [--output runs.csv]
+#stands the schema up in a throwaway database on the configured postgres server, loads synthetic seasons
+#one at a time and measures the upserts, the fact tables, the staging refresh and the leaderboard
+#queries as history grows. the database is dropped at the end unless --keep is passed
+
+DB_BENCHMARK_SETTINGS = {
+    'database': 'soccer_load_benchmark',
+    'leagues': 2,
+    'seasons': 3,
+    'teams': 12,
+    'players': 16,
+    #direct upserts each match's tables on its own like an unbuffered scrape, buffer queues a whole
+    #season in an UpsertBuffer the way update_current_league_data does
+    'strategy': 'buffer',
+    'query_runs': 20,
+    'seed': 182,
+}
+
+#sql run in order to build the schema, the numbered migrations are applied after them
+SCHEMA_SCRIPTS = ('tables.sql', 'views.sql', 'functions.sql')
+
+
+@contextmanager
+def disposable_database(db_config, name, keep=False):
+    """
+    creates an empty database next to the configured one and points the connection pool at it,
+    the pool and the database are torn down on exit
+
+    Args:
+        db_config(dict): connection settings of the server, the database in them is only used to
+                         issue the CREATE DATABASE
+        name(str): name of the throwaway database, dropped first if it is left from an earlier run
+        keep(bool): leave the database behind to look at afterwards
+
+    Yields:
+        db_config(dict): connection settings of the new database
+    """
+    def admin(statement):
+        conn = psycopg2.connect(**db_config)
+        conn.autocommit = True
+        try:
+            cursor = conn.cursor()
+            cursor.execute(statement)
+            cursor.close()
+        finally:
+            conn.close()
+
+    def close_pool():
+        if scraping._CONNECTION_POOL is not None:
+            #the pool closes itself at exit unless it's unregistered, closing it twice raises
+            atexit.unregister(scraping._CONNECTION_POOL.closeall)
+            scraping._CONNECTION_POOL.closeall()
+            scraping._CONNECTION_POOL = None
+        scraping.invalidate_schema_metadata()
+
+    admin('DROP DATABASE IF EXISTS {};'.format(name))
+    admin('CREATE DATABASE {};'.format(name))
+    benchmark_config = dict(db_config, database=name)
+    get_db_config = scraping.get_db_config
+    close_pool()
+    scraping.get_db_config = lambda: benchmark_config
+    try:
+        yield benchmark_config
+    finally:
+        close_pool()
+        scraping.get_db_config = get_db_config
+        if not keep:
+            admin('DROP DATABASE IF EXISTS {};'.format(name))
+
+def create_schema(scripts=SCHEMA_SCRIPTS):
+    """
+    builds the soccer schema from the repo's sql files and applies the migrations, the same way a
+    fresh database is set up
+
+    Args:
+        scripts(tuple): sql files run before the migrations
+
+    Returns:
+        applied(list): migrations that were applied
+    """
+    with scraping.pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('CREATE SCHEMA IF NOT EXISTS soccer;')
+        for script in scripts:
+            with open(script) as f:
+                cursor.execute(f.read())
+        conn.commit()
+        cursor.close()
+    return scraping.apply_migrations()
+
+def short_id(*values):
+    """
+    a text key shaped like fbref's 8 character ids
+
+    Args:
+        values: values the id is derived from
+
+    Returns:
+        id(str): 8 hex characters
+    """
+    return hashlib.md5(','.join(map(str, values)).encode()).hexdigest()[:8]
+
+def synthetic_column(data_type, rows, rng):
+    """
+    random values for a column of a given postgres type, short enough for any varchar in the schema
+
+    Args:
+        data_type(str): data_type from information_schema, i.e. integer
+        rows(int): number of values
+        rng(Generator): numpy random generator
+
+    Returns:
+        values(array): the values
+    """
+    if data_type in ('integer', 'smallint', 'bigint'):
+        return rng.integers(0, 12, rows)
+    if data_type in ('double precision', 'real', 'numeric'):
+        return (rng.random(rows) * 3).round(2)
+    if data_type == 'boolean':
+        return rng.random(rows) < 0.5
+    if data_type == 'date':
+        return np.full(rows, date(2000, 1, 1))
+    if data_type.startswith('timestamp'):
+        return np.full(rows, pd.Timestamp('2000-01-01'))
+    return rng.integers(0, 10, rows).astype(str)
+
+def synthetic_table_frame(schema, table, keys, rng):
+    """
+    builds rows for a table from its columns in the database, the key columns are passed in and every
+    other column gets random values of its type, so the rows follow the schema as it changes
+
+    Args:
+        schema(str): database schema
+        table(str): database table
+        keys(DataFrame): values of the key columns, one row per output row
+        rng(Generator): numpy random generator
+
+    Returns:
+        df(DataFrame): rows with exactly the table's columns
+    """
+    columns = dict()
+    for column, data_type in scraping.get_table_column_types(schema, table).items():
+        if column in keys.columns:
+            columns[column] = keys[column].values
+        else:
+            columns[column] = synthetic_column(data_type, len(keys), rng)
+    return pd.DataFrame(columns)
+
+def synthetic_season(league, season, settings, category_tables, rng):
+    """
+    makes one season of a league: a double round robin between the teams, with the same squad of
+    players in every match so the players and squads are upserted again each season like real history
+
+    Args:
+        league(int): number of the league
+        season(int): year of the season
+        settings(dict): teams and players per team
+        category_tables(list): (schema, table) of each match report category
+        rng(Generator): numpy random generator
+
+    Returns:
+        season(dict): competition, schedule, summary (the match report the fact tables are updated from)
+                      and a frame for each category table
+    """
+    competition_id = short_id('competition', league)
+    teams = [short_id('squad', league, i) for i in range(settings['teams'])]
+    matches = [(home, away) for home in teams for away in teams if home != away]
+    start = date(season, 3, 1)
+    schedule = pd.DataFrame({
+        'id': [short_id('match', league, season, home, away) for home, away in matches],
+        'competition_id': competition_id,
+        'home_team_id': [home for home, _ in matches],
+        'away_team_id': [away for _, away in matches],
+        'match_date': [start + timedelta(days=i // (settings['teams'] // 2) * 7) for i in range(len(matches))],
+        'season': str(season),
+    })
+
+    #one row per player per side of every match
+    players = settings['players']
+    sides = pd.concat([schedule[['id', 'home_team_id', 'away_team_id']].set_axis(['match_id', 'squad_id', 'opponent_id'], axis=1),
+                       schedule[['id', 'away_team_id', 'home_team_id']].set_axis(['match_id', 'squad_id', 'opponent_id'], axis=1)],
+                      ignore_index=True)
+    summary = sides.loc[sides.index.repeat(players)].reset_index(drop=True)
+    number = np.tile(np.arange(players), len(sides))
+    summary['shirtnumber'] = number + 1
+    summary['player_id'] = [short_id('player', squad, i) for squad, i in zip(summary.squad_id, number)]
+    summary['player'] = 'Player ' + summary.player_id
+    summary['squad'] = 'Squad ' + summary.squad_id
+    summary['gender'] = 'Women'
+    summary['age'] = '25-100'
+    summary['position'] = 'MF'
+    summary['id'] = generate_ids(summary, 'player_match')
+
+    frames = {
+        'competitions': pd.DataFrame({'id': [competition_id], 'competition': ['Benchmark League {}'.format(league)],
+                                      'gender': ['Women']}),
+        'schedules': synthetic_table_frame('soccer', 'schedules', schedule, rng),
+        'summary': summary,
+    }
+    for schema, table in category_tables:
+        frames[table] = synthetic_table_frame(schema, table, summary[['id']], rng)
+    return frames
+
+def load_season(seasons, category_tables, strategy, flush_threshold=None):
+    """
+    upserts the competitions, schedules and category tables of the seasons made by synthetic_season
+
+    Args:
+        seasons(list): output of synthetic_season for each league
+        category_tables(list): (schema, table) of each match report category
+        strategy(str): direct or buffer
+        flush_threshold(int): rows the buffer holds before it flushes on its own
+
+    Returns:
+        rows(int): rows upserted
+    """
+    tables = [('soccer', 'competitions'), ('soccer', 'schedules')] + list(category_tables)
+    if strategy == 'buffer':
+        write_buffer = scraping.UpsertBuffer(flush_threshold)
+        for frames in seasons:
+            for schema, table in tables:
+                write_buffer.add(frames[table], schema, table)
+        write_buffer.flush()
+        return int(write_buffer.report().rows_upserted.sum())
+
+    #one match at a time, each table in its own transaction, the way an unbuffered scrape writes
+    rows = 0
+    for frames in seasons:
+        scraping.upsert_data_into_db(frames['competitions'], 'soccer', 'competitions')
+        rows += len(frames['competitions'])
+        by_match = frames['summary'].groupby('match_id').id
+        for match_id, schedule_row in frames['schedules'].groupby('id', sort=False):
+            scraping.upsert_data_into_db(schedule_row, 'soccer', 'schedules')
+            ids = by_match.get_group(match_id)
+            for schema, table in category_tables:
+                df = frames[table][frames[table].id.isin(ids)]
+                scraping.upsert_data_into_db(df, schema, table)
+                rows += len(df)
+            rows += len(schedule_row)
+    return rows
+
+def load_fact_tables(seasons, config, strategy, flush_threshold=None):
+    """
+    runs update_fact_tables on the summary of every match
+
+    Args:
+        seasons(list): output of synthetic_season for each league
+        config(dict): config file
+        strategy(str): direct or buffer
+        flush_threshold(int): rows the buffer holds before it flushes on its own
+
+    Returns:
+        rows(int): match report rows the fact tables were updated from
+    """
+    write_buffer = scraping.UpsertBuffer(flush_threshold) if strategy == 'buffer' else None
+    rows = 0
+    for frames in seasons:
+        info_dict = {'gender': 'Women'}
+        for _, df in frames['summary'].groupby('match_id', sort=False):
+            scraping.update_fact_tables(df, config, info_dict, write_buffer=write_buffer)
+            rows += len(df)
+    if write_buffer is not None:
+        write_buffer.flush()
+    return rows
+
+def query_latency(query, params, runs):
+    """
+    times a read query
+
+    Args:
+        query(str): sql to run
+        params(tuple): query parameters
+        runs(int): times the query is run
+
+    Returns:
+        result(dict): rows returned, p50_ms and p95_ms
+    """
+    timings = list()
+    with scraping.pooled_connection() as conn:
+        cursor = conn.cursor()
+        for _ in range(runs):
+            start = time.perf_counter()
+            cursor.execute(query, params)
+            rows = len(cursor.fetchall())
+            timings.append((time.perf_counter() - start) * 1000)
+        cursor.close()
+        conn.rollback()
+    return {'rows': rows, 'p50_ms': np.percentile(timings, 50), 'p95_ms': np.percentile(timings, 95)}
+
+def count_rows(schema, table):
+    """
+    counts the rows of a table
+
+    Args:
+        schema(str): database schema
+        table(str): database table
+
+    Returns:
+        rows(int): row count
+    """
+    with scraping.pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('SELECT count(*) FROM {}.{};'.format(schema, table))
+        rows = cursor.fetchone()[0]
+        cursor.close()
+    return rows
+
+def run_load_benchmark(config, settings):
+    """
+    loads the synthetic seasons one at a time into a schema that has already been created, after each
+    season the upserts, fact tables and incremental staging refresh are timed along with the two
+    leaderboard queries, a full staging rebuild is timed at the end
+
+    Args:
+        config(dict): config file
+        settings(dict): see DB_BENCHMARK_SETTINGS
+
+    Returns:
+        report(DataFrame): seasons loaded, player_match_rows in the database, stage, rows, seconds,
+                           rows_per_second, p50_ms and p95_ms
+    """
+    rng = np.random.default_rng(settings['seed'])
+    flush_threshold = config.get('write_buffer_config', {}).get('flush_threshold_rows')
+    upsert_config = config['match_report_upsert_config']
+    category_tables = list()
+    for category in config['advanced_match_report_categories']:
+        table = upsert_config['table'].format(category.lower())
+        #categories whose table isn't in the schema are left out, like the keeper stats
+        if scraping.get_table_columns(upsert_config['schema'], table):
+            category_tables.append((upsert_config['schema'], table))
+        else:
+            print('{}.{} is not in the schema, skipping {}'.format(upsert_config['schema'], table, category))
+
+    records = list()
+    first_season = 2001
+    for number in range(settings['seasons']):
+        season = first_season + number
+        seasons = [synthetic_season(league, season, settings, category_tables, rng) for league in range(settings['leagues'])]
+        match_ids = [i for frames in seasons for i in frames['schedules'].id]
+
+        def staging_updates():
+            scraping.run_update_function(match_ids)
+            return sum(len(frames['summary']) for frames in seasons)
+
+        stages = [
+            ('upsert', lambda: load_season(seasons, category_tables, settings['strategy'], flush_threshold)),
+            ('update_fact_tables', lambda: load_fact_tables(seasons, config, settings['strategy'], flush_threshold)),
+            ('staging_updates', staging_updates),
+        ]
+        history = {'seasons': number + 1}
+        for stage, run in stages:
+            start = time.perf_counter()
+            rows = run()
+            records.append(dict(history, stage=stage, rows=rows, seconds=time.perf_counter() - start))
+        history['player_match_rows'] = count_rows('soccer', 'player_match_summary_stats')
+
+        competition = seasons[0]['competitions'].competition.iloc[0]
+        squad = seasons[0]['summary'].squad.iloc[0]
+        queries = {
+            'player_competition_ranks': ('SELECT * FROM soccer.player_competition_ranks WHERE competition = %s AND season = %s;',
+                                         (competition, str(season))),
+            'metric_competition_lookup': ('SELECT * FROM soccer.metric_competition_lookup(%s, %s, %s);',
+                                          (competition, squad, str(season))),
+        }
+        for stage, (query, params) in queries.items():
+            records.append(dict(history, stage=stage, **query_latency(query, params, settings['query_runs'])))
+        for record in records:
+            record.setdefault('player_match_rows', history['player_match_rows'])
+        print('loaded season {} of {}, {:,} player match rows'.format(number + 1, settings['seasons'], history['player_match_rows']))
+
+    start = time.perf_counter()
+    scraping.run_update_function(None)
+    records.append({'seasons': settings['seasons'], 'player_match_rows': history['player_match_rows'], 'stage': 'staging_full_rebuild',
+                    'rows': history['player_match_rows'], 'seconds': time.perf_counter() - start})
+
+    report = pd.DataFrame(records).reindex(columns=['seasons', 'player_match_rows', 'stage', 'rows', 'seconds', 'p50_ms', 'p95_ms'])
+    report['rows_per_second'] = (report.rows / report.seconds).round(1)
+    return report
+
+def parse_args():
+    """
+    reads the command line arguments for a load benchmark
+
+    Returns:
+        args(Namespace): parsed arguments
+    """
+    settings = DB_BENCHMARK_SETTINGS
+    parser = argparse.ArgumentParser(description='Benchmarks loading synthetic seasons into a throwaway copy of the schema')
+    parser.add_argument('--leagues', type=int, default=settings['leagues'], help='leagues per season')
+    parser.add_argument('--seasons', type=int, default=settings['seasons'], help='seasons loaded one after another')
+    parser.add_argument('--teams', type=int, default=settings['teams'], help='teams per league, each pair plays twice')
+    parser.add_argument('--players', type=int, default=settings['players'], help='players per team in every match')
+    parser.add_argument('--strategy', choices=['direct', 'buffer'], default=settings['strategy'], help='how the rows are upserted')
+    parser.add_argument('--query-runs', type=int, default=settings['query_runs'], help='times each query is run after a season')
+    parser.add_argument('--database', default=settings['database'], help='name of the throwaway database')
+    parser.add_argument('--keep', action='store_true', help="don't drop the database at the end")
+    parser.add_argument('--label', help='name of the run in the output, defaults to the strategy')
+    parser.add_argument('--output', help='csv the report is appended to, to compare runs')
+    parser.add_argument('--config', default='data_config.yaml', help='path to the config file')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    with open(args.config) as f:
+        config = yaml.safe_load(f)
+    configure_ids(config.get('id_config', {}))
+    settings = dict(DB_BENCHMARK_SETTINGS, leagues=args.leagues, seasons=args.seasons, teams=args.teams,
+                    players=args.players, strategy=args.strategy, query_runs=args.query_runs)
+
+    with disposable_database(scraping.get_db_config(), args.database, keep=args.keep):
+        create_schema()
+        report = run_load_benchmark(config, settings)
+    print(report.round(3).to_string(index=False))
+
+    if args.output:
+        report.insert(0, 'run', args.label or args.strategy)
+        for key in ('leagues', 'teams', 'players', 'strategy'):
+            report[key] = settings[key]
+        report.to_csv(args.output, mode='a', index=False, header=not os.path.exists(args.output))
+        print('appended to {}'.format(args.output))
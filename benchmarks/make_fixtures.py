@@ -0,0 +1,235 @@
+import os
+import random
+
+
+#rebuilds the fixture pages the pipeline benchmark runs on: python -m benchmarks.make_fixtures
+#the pages are shaped like fbref's (header groups, blank over headers, footer totals, spacer rows,
+#tables hidden in comments and the markup around them) but every name and number is made up
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+SEASON = '2023'
+COMPETITION_ID = 182
+TEAMS = 12
+PLAYERS_PER_TEAM = 16
+
+PLAYER_COLUMNS = [('', ['Player', '#', 'Nation', 'Pos', 'Age', 'Min'])]
+MATCH_REPORT_COLUMNS = {
+    'summary': [('Performance', ['Gls', 'Ast', 'PK', 'PKatt', 'Sh', 'SoT', 'CrdY', 'CrdR', 'Touches', 'Tkl', 'Int', 'Blocks']),
+                ('Expected', ['xG', 'npxG', 'xAG']), ('SCA', ['SCA', 'GCA']), ('Passes', ['Cmp', 'Att', 'Cmp%', 'PrgP']),
+                ('Carries', ['Carries', 'PrgC']), ('Take-Ons', ['Att', 'Succ'])],
+    'passing': [('Total', ['Cmp', 'Att', 'Cmp%', 'TotDist', 'PrgDist']), ('Short', ['Cmp', 'Att', 'Cmp%']),
+                ('Medium', ['Cmp', 'Att', 'Cmp%']), ('Long', ['Cmp', 'Att', 'Cmp%']),
+                ('', ['Ast', 'xAG', 'xA', 'KP', '1/3', 'PPA', 'CrsPA', 'PrgP'])],
+    'passing_types': [('', ['Att']), ('Pass Types', ['Live', 'Dead', 'FK', 'TB', 'Sw', 'Crs', 'TI', 'CK']),
+                      ('Corner Kicks', ['In', 'Out', 'Str']), ('Outcomes', ['Cmp', 'Off', 'Blocks'])],
+    'possession': [('Touches', ['Touches', 'Def Pen', 'Def 3rd', 'Mid 3rd', 'Att 3rd', 'Att Pen', 'Live']),
+                   ('Take-Ons', ['Att', 'Succ', 'Succ%', 'Tkld', 'Tkld%']),
+                   ('Carries', ['Carries', 'TotDist', 'PrgDist', 'PrgC', '1/3', 'CPA', 'Mis', 'Dis']), ('Receiving', ['Rec', 'PrgR'])],
+    'defense': [('Tackles', ['Tkl', 'TklW', 'Def 3rd', 'Mid 3rd', 'Att 3rd']), ('Challenges', ['Tkl', 'Att', 'Tkl%', 'Lost']),
+                ('Blocks', ['Blocks', 'Sh', 'Pass']), ('', ['Int', 'Tkl+Int', 'Clr', 'Err'])],
+    'misc': [('Performance', ['CrdY', 'CrdR', '2CrdY', 'Fls', 'Fld', 'Off', 'Crs', 'Int', 'TklW', 'PKwon', 'PKcon', 'OG', 'Recov']),
+             ('Aerial Duels', ['Won', 'Lost', 'Won%'])],
+}
+BASIC_SUMMARY_COLUMNS = [('Performance', ['Gls', 'Ast', 'PK', 'PKatt', 'Sh', 'SoT', 'CrdY', 'CrdR'])]
+KEEPER_COLUMNS = [('', ['Player', 'Nation', 'Age', 'Min']), ('Shot Stopping', ['SoTA', 'GA', 'Saves', 'Save%', 'PSxG']),
+                  ('Launched', ['Cmp', 'Att', 'Cmp%']), ('Passes', ['Att', 'Thr', 'Launch%', 'AvgLen']),
+                  ('Goal Kicks', ['Att', 'Launch%', 'AvgLen']), ('Crosses', ['Opp', 'Stp', 'Stp%']), ('Sweeper', ['#OPA', 'AvgDist'])]
+SHOT_COLUMNS = [('', ['Minute', 'Player', 'Squad', 'xG', 'PSxG', 'Outcome', 'Distance', 'Body Part', 'Notes']),
+                ('SCA 1', ['Player', 'Event']), ('SCA 2', ['Player', 'Event'])]
+
+
+def team_id(i):
+    return '{:08x}'.format(0x1f0a0000 + i * 7919)
+
+def player_id(team, i):
+    return '{:08x}'.format(int(team, 16) ^ (0x00ab0000 + i * 104729))
+
+def fixture_match(week, game):
+    """
+    home and away team of a game in the fixture schedule
+    """
+    return team_id((week + game) % TEAMS), team_id((week + TEAMS - game - 1) % TEAMS)
+
+def header_rows(groups):
+    """
+    builds fbref's two header rows, blank over headers become Unnamed columns in read_html
+    """
+    top = ''.join('<th colspan="{}" class="over_header">{}</th>'.format(len(cols), group) for group, cols in groups)
+    bottom = ''.join('<th scope="col" class="poptip">{}</th>'.format(col) for _, cols in groups for col in cols)
+    if all(group == '' for group, _ in groups):
+        return '<tr>{}</tr>'.format(bottom)
+    return '<tr class="over_header">{}</tr><tr>{}</tr>'.format(top, bottom)
+
+def table_html(table_id, groups, rows, footer=None, caption='Table'):
+    body = ''.join(rows)
+    foot = '<tfoot><tr>{}</tr></tfoot>'.format(footer) if footer else ''
+    return ('<div class="table_wrapper" id="all_{0}"><div class="section_heading"><h2>{1}</h2></div>'
+            '<div class="table_container" id="div_{0}"><table class="stats_table sortable min_width" id="{0}" data-cols-to-freeze=",1">'
+            '<caption>{1}</caption><thead>{2}</thead><tbody>{3}</tbody>{4}</table></div></div>').format(
+                table_id, caption, header_rows(groups), body, foot)
+
+def page_html(title, content):
+    #fbref pages carry a lot of markup around the tables, the parsers have to get through all of it
+    head = ''.join('<script src="/static/js/{}.js"></script>'.format(i) for i in range(30))
+    nav = ''.join('<li><a href="/en/comps/{0}/">Competition {0}</a></li>'.format(i) for i in range(300))
+    return ('<!DOCTYPE html><html><head><title>{}</title>{}<style>.stats_table td {{ text-align: right; }}</style></head>'
+            '<body><div id="header"><ul class="nav">{}</ul></div><div id="content">{}</div>'
+            '<div id="footer"><!-- <table id="decoy"><tr><td>hidden</td></tr></table> --></div></body></html>').format(title, head, nav, content)
+
+def number(rng, low, high, decimals=0):
+    value = rng.uniform(low, high)
+    return '{:.{}f}'.format(value, decimals) if decimals else str(int(value))
+
+def player_cells(rng, team, i, minutes, keeper=False):
+    name = 'Player {} {}'.format(team, i)
+    cells = ['<th scope="row" data-stat="player"><a href="/en/players/{}/{}">{}</a></th>'.format(player_id(team, i), name.replace(' ', '-'), name)]
+    if not keeper:
+        cells.append('<td data-stat="shirtnumber">{}</td>'.format(i + 1))
+    cells.append('<td data-stat="nationality"><a href="/en/country/USA/"><span class="f-i f-us" style="">us</span> USA</a></td>')
+    if not keeper:
+        cells.append('<td data-stat="position">{}</td>'.format(rng.choice(['FW', 'MF', 'DF', 'LW,RW', 'CM'])))
+    cells.append('<td data-stat="age">{}-{:03d}</td>'.format(rng.randint(18, 35), rng.randint(0, 364)))
+    cells.append('<td data-stat="minutes">{}</td>'.format(minutes))
+    return cells
+
+def stat_cells(rng, groups, skip):
+    cells = list()
+    for group, cols in groups:
+        for col in cols:
+            if skip:
+                skip -= 1
+                continue
+            decimals = 1 if ('%' in col or col.startswith('x') or col in ('PSxG', 'AvgLen', 'AvgDist', 'npxG')) else 0
+            cells.append('<td>{}</td>'.format(number(rng, 0, 99 if '%' in col else 12, decimals)))
+    return cells
+
+def team_stats_table(rng, table_id, team, groups, keeper=False):
+    rows = list()
+    players = 1 if keeper else PLAYERS_PER_TEAM
+    for i in range(players):
+        minutes = 90 if i < 11 or keeper else rng.randint(1, 45)
+        skip = 4 if keeper else 6
+        stats = stat_cells(rng, groups, skip)
+        rows.append('<tr>{}</tr>'.format(''.join(player_cells(rng, team, i, minutes, keeper) + stats)))
+    width = sum(len(cols) for _, cols in groups)
+    footer = None if keeper else '<th>{} Players</th><td></td><td></td><td></td><td></td><td>990</td>{}'.format(
+        players, '<td>0</td>' * (width - 6))
+    return table_html(table_id, groups, rows, footer)
+
+def shots_table(rng, home, away, shots=28):
+    rows = list()
+    for i in range(shots):
+        if i == shots // 2:
+            #fbref separates the halves with an empty spacer row
+            rows.append('<tr class="spacer partial_table">{}</tr>'.format('<td></td>' * 13))
+        team = home if i % 2 else away
+        shooter = rng.randint(0, 10)
+        sca2 = ('<td><a href="/en/players/{}/X">Player {} {}</a></td><td>Pass (Live)</td>'.format(player_id(team, shooter + 1), team, shooter + 1)
+                if i % 3 else '<td></td><td></td>')
+        minute = '{}{}'.format(i * 3 + 1, '+2' if i == shots - 1 else '')
+        rows.append('<tr><th>{}</th><td><a href="/en/players/{}/P">Player {} {}</a></td><td><a href="/en/squads/{}/Team">Team {}</a></td>'
+                    '<td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td>'
+                    '<td><a href="/en/players/{}/S">Player {} {}</a></td><td>{}</td>{}</tr>'.format(
+                        minute, player_id(team, shooter), team, shooter, team, team, number(rng, 0, 0.8, 2),
+                        number(rng, 0, 0.9, 2) if i % 4 else '', rng.choice(['Saved', 'Goal', 'Off Target', 'Blocked']),
+                        rng.randint(5, 30), rng.choice(['Right Foot', 'Left Foot', 'Head']),
+                        rng.choice(['', 'Volley', 'Free kick', 'Deflected']), player_id(team, shooter + 2), team, shooter + 2,
+                        rng.choice(['Pass (Live)', 'Pass (Dead)', 'Take-On', 'Shot']), sca2))
+    return table_html('shots_all', SHOT_COLUMNS, rows, caption='Shots Table')
+
+def match_report_page(rng, home, away, advanced=True):
+    content = ''
+    categories = MATCH_REPORT_COLUMNS if advanced else {'summary': BASIC_SUMMARY_COLUMNS}
+    for category, groups in categories.items():
+        for team in (home, away):
+            content += team_stats_table(rng, 'stats_{}_{}'.format(team, category), team, PLAYER_COLUMNS + groups)
+    if advanced:
+        for team in (home, away):
+            content += team_stats_table(rng, 'keeper_stats_{}'.format(team), team, KEEPER_COLUMNS, keeper=True)
+        content += shots_table(rng, home, away)
+    return page_html('Match Report', content)
+
+def schedule_page(rng):
+    groups = [('', ['Round', 'Wk', 'Day', 'Date', 'Time', 'Home', 'xG', 'Score', 'xG', 'Away', 'Attendance', 'Venue',
+                    'Referee', 'Match Report', 'Notes'])]
+    rows = list()
+    match = 0
+    for week in range(1, 23):
+        if week > 1 and week % 6 == 1:
+            #fbref repeats the header every few weeks
+            rows.append('<tr class="thead">{}</tr>'.format(''.join('<th>{}</th>'.format(i) for i in groups[0][1])))
+        for game in range(TEAMS // 2):
+            home, away = fixture_match(week, game)
+            played = week < 20
+            day = '2023-{:02d}-{:02d}'.format(3 + week // 4, 1 + (week * 7) % 28)
+            link = '/en/matches/{:08x}/Team-{}-Team-{}'.format(0x5e000000 + match, home, away)
+            rows.append('<tr><th>Regular Season</th><td>{}</td><td>Sat</td><td><a href="/en/matches/{}">{}</a></td><td>19:30</td>'
+                        '<td><a href="/en/squads/{}/Team-{}-Stats">Team {}</a></td><td>{}</td><td>{}</td><td>{}</td>'
+                        '<td><a href="/en/squads/{}/Team-{}-Stats">Team {}</a></td><td>{:,}</td><td>Stadium {}</td><td>Referee</td>'
+                        '<td><a href="{}">{}</a></td><td></td></tr>'.format(
+                            week, day, day, home, home, home, number(rng, 0, 3, 1) if played else '',
+                            '{}–{}'.format(rng.randint(0, 4), rng.randint(0, 4)) if played else '', number(rng, 0, 3, 1) if played else '',
+                            away, away, away, rng.randint(2000, 25000), home, link, 'Match Report' if played else 'Head-to-Head'))
+            match += 1
+    table = table_html('sched_{}_{}_1'.format(SEASON, COMPETITION_ID), groups, rows, caption='Scores & Fixtures')
+    return page_html('Scores & Fixtures', table)
+
+def standings_page(rng):
+    groups = [('', ['Rk', 'Squad', 'MP', 'W', 'D', 'L', 'GF', 'GA', 'GD', 'Pts', 'Pts/MP', 'xG', 'xGA', 'xGD', 'xGD/90',
+                    'Last 5', 'Attendance', 'Top Team Scorer', 'Goalkeeper', 'Notes'])]
+    rows = list()
+    for i in range(TEAMS):
+        team = team_id(i)
+        rows.append('<tr><th>{}</th><td><a href="/en/squads/{}/Team-{}-Stats">Team {}</a> </td>{}<td>W D L W W</td><td>{:,}</td>'
+                    '<td><a href="/en/players/x/">Scorer</a> - 8</td><td>Keeper</td><td></td></tr>'.format(
+                        i + 1, team, team, team, ''.join('<td>{}</td>'.format(rng.randint(0, 40)) for _ in range(8)) +
+                        ''.join('<td>{}</td>'.format(number(rng, 0, 40, 2)) for _ in range(5)), rng.randint(2000, 25000)))
+    table = table_html('results{}{}1_overall'.format(SEASON, COMPETITION_ID), groups, rows, caption='Regular season Table')
+    return page_html('Standings', table)
+
+def matchlogs_page(rng, team):
+    groups = [('', ['Date', 'Time', 'Comp', 'Round', 'Day', 'Venue', 'Result', 'GF', 'GA', 'Opponent', 'xG', 'xGA', 'Poss',
+                    'Attendance', 'Captain', 'Formation', 'Referee', 'Match Report', 'Notes'])]
+    rows = list()
+    for i in range(30):
+        played = i < 26
+        goals_for = '{}{}'.format(rng.randint(0, 4), ' (4)' if i == 5 else '')
+        rows.append('<tr><th><a href="/en/matches/2023-{0:02d}-{1:02d}">2023-{0:02d}-{1:02d}</a></th><td>19:30</td>'
+                    '<td><a href="/en/comps/182/NWSL-Stats">NWSL</a></td><td>Regular Season</td><td>Sat</td><td>{2}</td><td>{3}</td>'
+                    '<td>{4}</td><td>{5}</td><td><a href="/en/squads/{6}/Team">Team {6}</a></td><td>{7}</td><td>{8}</td><td>{9}</td>'
+                    '<td>{10:,}</td><td><a href="/en/players/{11}/Captain">Captain</a></td><td>4-3-3</td><td>Referee</td>'
+                    '<td><a href="/en/matches/{12:08x}/Report">{13}</a></td><td></td></tr>'.format(
+                        3 + i // 4, 1 + (i * 7) % 28, rng.choice(['Home', 'Away']), rng.choice(['W', 'D', 'L']) if played else '',
+                        goals_for if played else '', rng.randint(0, 4) if played else '', team_id((i + 1) % TEAMS),
+                        number(rng, 0, 3, 1) if played else '', number(rng, 0, 3, 1) if played else '',
+                        rng.randint(30, 70) if played else '', rng.randint(2000, 25000), player_id(team, 0),
+                        0x5f000000 + i, 'Match Report' if played else 'Head-to-Head'))
+    table = table_html('matchlogs_for', groups, rows, caption='Scores & Fixtures')
+    return page_html('Match Logs', table)
+
+def fixture_pages(seed=182):
+    """
+    builds every fixture page, the first two matches of the schedule are the advanced and basic
+    match reports
+
+    Args:
+        seed(int): seed of the random numbers in the pages
+
+    Returns:
+        pages(dict): file name -> html
+    """
+    rng = random.Random(seed)
+    return {
+        'standings.html': standings_page(rng),
+        'schedule.html': schedule_page(rng),
+        'matchlogs.html': matchlogs_page(rng, team_id(0)),
+        'match_report_advanced.html': match_report_page(rng, *fixture_match(1, 0)),
+        'match_report_basic.html': match_report_page(rng, *fixture_match(1, 1), advanced=False),
+    }
+
+if __name__ == '__main__':
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for name, html in fixture_pages().items():
+        with open(os.path.join(FIXTURE_DIR, name), 'w') as f:
+            f.write(html)
+        print('{} {:,} bytes'.format(name, len(html)))
@@ -0,0 +1,286 @@
+import pandas as pd
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+import tracemalloc
+import yaml
+from contextlib import contextmanager
+import columnar_store
+import soccer_club_scraping_code as scraping
+from column_plans import apply_column_plan, get_column_plan
+from fbref_fetch import build_fbref_url, classify_page_type, read_table_from_html
+from benchmarks.make_fixtures import FIXTURE_DIR, SEASON
+
+
+#run from the repo root: python -m benchmarks.pipeline [--save-baseline]
+#times the scrape -> clean -> store path of every page type on the fixture pages with no network and
+#no database, the upserts are skipped so only parsing, cleaning and the store writes are measured
+
+BENCHMARK_SETTINGS = {
+    'league': 'NWSL',
+    'baseline': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json'),
+    'repeat': 10,
+    #a stage is flagged when it is this much slower or bigger than the baseline
+    'tolerance': 0.5,
+    #slow downs under this many seconds are never flagged, best of repeat timings of the fixture stages
+    #still move by this much between runs on a shared machine
+    'min_seconds': 0.02,
+}
+
+#fixture page served for each page type, match reports are looked up by url first
+FIXTURE_PAGES = {
+    'standings': 'standings.html',
+    'schedule': 'schedule.html',
+    'team_results': 'matchlogs.html',
+}
+
+
+def read_fixture(name):
+    """
+    reads a fixture page
+
+    Args:
+        name(str): file name in the fixture directory
+
+    Returns:
+        html(str): html of the page
+    """
+    with open(os.path.join(FIXTURE_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+@contextmanager
+def offline_pipeline(config):
+    """
+    stubs the network and the database for the scrapers and points the store at a temp directory,
+    everything is put back on exit
+
+    Args:
+        config(dict): config file
+
+    Yields:
+        pages(dict): url -> html served for match reports, fill it in once the schedule is read
+    """
+    scraping.configure_run(config)
+    pages = dict()
+    fixtures = {page_type: read_fixture(name) for page_type, name in FIXTURE_PAGES.items()}
+
+    def fetch_page_html(url, page_type=None, use_cache=True):
+        if url in pages:
+            return pages[url]
+        return fixtures[page_type or classify_page_type(url)]
+
+    patched = {
+        'fetch_page_html': fetch_page_html,
+        'align_to_table': lambda df, schema_name, table_name: df,
+        'upsert_data_into_db': lambda df, schema, table_name, primary_key_column='id', connection=None: None,
+        'write_to_db': lambda df, schema, table_name, primary_key_column='id', write_buffer=None: None,
+    }
+    originals = {name: getattr(scraping, name) for name in patched}
+    store_root = columnar_store.STORE_ROOT
+    temp_dir = tempfile.mkdtemp(prefix='pipeline_benchmark_')
+    try:
+        for name, func in patched.items():
+            setattr(scraping, name, func)
+        columnar_store.STORE_ROOT = os.path.join(temp_dir, 'store')
+        yield pages
+    finally:
+        for name, func in originals.items():
+            setattr(scraping, name, func)
+        columnar_store.STORE_ROOT = store_root
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+def measure_stage(run, prepare=None, repeat=10):
+    """
+    times a stage and measures its peak memory, the memory is measured on a separate run because
+    tracemalloc slows everything it traces down. like timeit, the garbage collector is off while timing
+
+    Args:
+        run(function): the stage, called with the output of prepare and returning a frame
+        prepare(function): builds the stage's arguments outside of the timing, no arguments if None
+        repeat(int): timed runs, the fastest is kept
+
+    Returns:
+        result(dict): seconds, rows, rows_per_second and peak_kb, plus output (the frame of the last run)
+    """
+    prepare = prepare or (lambda: ())
+    best = None
+    for _ in range(repeat):
+        args = prepare()
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            output = run(*args)
+            seconds = time.perf_counter() - start
+        finally:
+            gc.enable()
+        best = seconds if best is None else min(best, seconds)
+
+    args = prepare()
+    tracemalloc.start()
+    try:
+        run(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    rows = len(output)
+    return {'seconds': best, 'rows': rows, 'rows_per_second': rows / best if best else None,
+            'peak_kb': peak / 1024, 'output': output}
+
+def run_pipeline(config, info_dict, repeat=10):
+    """
+    runs every stage on the fixture pages: standings, schedule, each match report category of the
+    advanced match, the summary of the basic match, shot cleaning, shot creating actions and a team's
+    season results
+
+    Args:
+        config(dict): config file
+        info_dict(dict): league info the fixtures are scraped as
+        repeat(int): timed runs of each stage
+
+    Returns:
+        report(DataFrame): stage, rows, seconds, rows_per_second and peak_kb
+    """
+    results = dict()
+    with offline_pipeline(config) as pages:
+        results['standings'] = measure_stage(lambda: scraping.scrape_standings(info_dict, SEASON, config), repeat=repeat)
+        results['schedule'] = measure_stage(lambda: scraping.scrape_schedule_from_competition(info_dict, SEASON, config),
+                                            repeat=repeat)
+        schedule = results['schedule']['output']
+
+        #the first two matches of the fixture schedule are the advanced and basic match reports
+        advanced, basic = schedule.iloc[0], schedule.iloc[1]
+        advanced_html = read_fixture('match_report_advanced.html')
+        pages[build_fbref_url(advanced['match_report_link'])] = advanced_html
+        pages[build_fbref_url(basic['match_report_link'])] = read_fixture('match_report_basic.html')
+        for category in config['advanced_match_report_categories']:
+            results['match_report_{}'.format(category)] = measure_stage(
+                lambda: scraping.scrape_match_report_from_competition_schedule(advanced, info_dict, category, config),
+                repeat=repeat)
+        for category in config['basic_match_report_categories']:
+            results['basic_match_report_{}'.format(category)] = measure_stage(
+                lambda: scraping.scrape_match_report_from_competition_schedule(basic, info_dict, category, config),
+                repeat=repeat)
+
+        #the shot table is read once, cleaning gets a fresh copy each run since it edits the frame
+        shots = apply_column_plan(read_table_from_html(advanced_html, 'shots_all'), get_column_plan(config, 'shot_data'))
+        shots['match_id'] = advanced['id']
+        shots = shots[shots.squad != '']
+        results['clean_shot_creation_df'] = measure_stage(lambda df: scraping.clean_shot_creation_df(df, config),
+                                                          lambda: (shots.copy(),), repeat)
+        cleaned = results['clean_shot_creation_df']['output']
+        results['extract_shot_creation_data_from_df'] = measure_stage(scraping.extract_shot_creation_data_from_df,
+                                                                      lambda: (cleaned.copy(),), repeat)
+
+        standings = results['standings']['output']
+        results['team_results'] = measure_stage(lambda: scraping.scrape_team_season_results(standings.iloc[0], config, info_dict),
+                                                repeat=repeat)
+
+    report = pd.DataFrame([{'stage': stage, **{key: value for key, value in result.items() if key != 'output'}}
+                           for stage, result in results.items()])
+    return report[['stage', 'rows', 'seconds', 'rows_per_second', 'peak_kb']]
+
+def load_baseline(path):
+    """
+    reads a stored baseline
+
+    Args:
+        path(str): path of the baseline json
+
+    Returns:
+        baseline(dict): stage -> {rows, seconds, peak_kb}, None if there is no baseline yet
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)['stages']
+
+def save_baseline(report, path):
+    """
+    stores a run as the baseline, along with the versions it was measured on
+
+    Args:
+        report(DataFrame): output of run_pipeline
+        path(str): path of the baseline json
+    """
+    baseline = {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'stages': {row.stage: {'rows': int(row.rows), 'seconds': round(row.seconds, 6), 'peak_kb': round(row.peak_kb, 1)}
+                   for row in report.itertuples()},
+    }
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2)
+        f.write('\n')
+
+def compare_to_baseline(report, baseline, tolerance=0.5, min_seconds=0.02):
+    """
+    flags the stages that got slower, used more memory or produced a different number of rows than
+    the baseline. timings are only comparable to a baseline saved on the same machine
+
+    Args:
+        report(DataFrame): output of run_pipeline
+        baseline(dict): output of load_baseline
+        tolerance(float): allowed growth in seconds and peak memory, 0.5 is 50%
+        min_seconds(float): slow downs smaller than this are never flagged
+
+    Returns:
+        report(DataFrame): the report with the baseline's numbers, the changes and a regression column
+    """
+    report = report.copy()
+    base = pd.DataFrame.from_dict(baseline, orient='index').reindex(report.stage)
+    report['baseline_seconds'] = base.seconds.values
+    report['baseline_peak_kb'] = base.peak_kb.values
+    report['time_change'] = (report.seconds / report.baseline_seconds - 1).round(3)
+    report['memory_change'] = (report.peak_kb / report.baseline_peak_kb - 1).round(3)
+    slower = (report.time_change > tolerance) & (report.seconds - report.baseline_seconds > min_seconds)
+    bigger = report.memory_change > tolerance
+    rows_changed = base.rows.notnull().values & (report.rows != base.rows.values)
+    report['regression'] = ''
+    report.loc[slower, 'regression'] += 'time '
+    report.loc[bigger, 'regression'] += 'memory '
+    report.loc[rows_changed, 'regression'] += 'rows '
+    report['regression'] = report.regression.str.strip()
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description='benchmarks the scrape -> clean -> store path on the fixture pages')
+    parser.add_argument('--repeat', type=int, default=BENCHMARK_SETTINGS['repeat'], help='timed runs of each stage, the fastest is kept')
+    parser.add_argument('--baseline', default=BENCHMARK_SETTINGS['baseline'], help='path of the baseline json')
+    parser.add_argument('--tolerance', type=float, default=BENCHMARK_SETTINGS['tolerance'],
+                        help='allowed growth over the baseline before a stage is flagged, 0.5 is 50%%')
+    parser.add_argument('--save-baseline', action='store_true', help='store this run as the new baseline')
+    parser.add_argument('--config', default='data_config.yaml', help='path to the config file')
+    parser.add_argument('--leagues-file', default='leagues.yaml', help='path to the leagues file')
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        config = yaml.safe_load(f)
+    info_dict = scraping.load_leagues(args.leagues_file, [BENCHMARK_SETTINGS['league']])[BENCHMARK_SETTINGS['league']]
+    report = run_pipeline(config, info_dict, args.repeat)
+
+    if args.save_baseline:
+        save_baseline(report, args.baseline)
+        print(report.round(4).to_string(index=False))
+        print('saved the baseline to {}'.format(args.baseline))
+        return
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(report.round(4).to_string(index=False))
+        print('no baseline at {}, run with --save-baseline to store one'.format(args.baseline))
+        return
+    report = compare_to_baseline(report, baseline, args.tolerance, BENCHMARK_SETTINGS['min_seconds'])
+    print(report.round(4).to_string(index=False))
+    regressions = report[report.regression != '']
+    if not regressions.empty:
+        raise SystemExit('{} stages regressed: {}'.format(len(regressions), ', '.join(regressions.stage)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+import pandas as pd
+import argparse
+import glob
+import gzip
+import os
+import time
+from io import StringIO
+from pandas.testing import assert_frame_equal
+from html_tables import PageTables
+from benchmarks.make_fixtures import FIXTURE_DIR
+
+
+#run from the repo root: python -m benchmarks.table_parsing [pages ...]
+
+
+def load_saved_page(path):
+    """
+    reads a saved page, pages from the page cache are gzipped
+
+    Args:
+        path(str): path of the page
+
+    Returns:
+        html(str): html of the page
+    """
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rb') as f:
+        return f.read().decode('utf-8')
+
+def benchmark_page(page_html, repeat=3):
+    """
+    times reading every table on a page with pd.read_html, one call per table id like the scrapers
+    do, against indexing the page once with html_tables. the frames are checked to be identical first
+
+    Args:
+        page_html(str): html of the page
+        repeat(int): times each reader is run, the fastest run is kept
+
+    Returns:
+        result(dict): table counts and the seconds each reader took
+    """
+    tables = PageTables(page_html)
+    #read_html can't see tables inside comments, so only the visible ones are compared
+    visible = [i for i in tables.ids() if i not in tables.commented]
+    for table_id in visible:
+        expected = pd.read_html(StringIO(page_html), attrs={'id': table_id}, extract_links='body')[0]
+        assert_frame_equal(PageTables(page_html).read_table(table_id), expected)
+
+    def time_reader(read):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            read()
+            seconds = time.perf_counter() - start
+            best = seconds if best is None else min(best, seconds)
+        return best
+
+    def read_html_tables():
+        for table_id in visible:
+            pd.read_html(StringIO(page_html), attrs={'id': table_id}, extract_links='body')
+
+    def lxml_tables():
+        page = PageTables(page_html)
+        for table_id in visible:
+            page.read_table(table_id)
+
+    def lxml_all_tables():
+        page = PageTables(page_html)
+        for table_id in page.ids():
+            page.read_table(table_id)
+
+    return {
+        'tables': len(visible),
+        'commented_tables': len(tables.commented),
+        'read_html_seconds': time_reader(read_html_tables),
+        'lxml_seconds': time_reader(lxml_tables),
+        'lxml_all_tables_seconds': time_reader(lxml_all_tables),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='benchmarks html_tables against pd.read_html on saved pages')
+    parser.add_argument('pages', nargs='*', help='saved pages (.html or .html.gz), defaults to the fixture pages')
+    parser.add_argument('--limit', type=int, default=20, help='most pages to benchmark')
+    parser.add_argument('--repeat', type=int, default=3, help='runs of each reader per page, the fastest is kept')
+    args = parser.parse_args()
+
+    paths = args.pages or sorted(glob.glob(os.path.join(FIXTURE_DIR, '*.html')))
+    paths = paths[:args.limit]
+    if not paths:
+        raise SystemExit('no saved pages found, pass paths or run python -m benchmarks.make_fixtures')
+
+    rows = list()
+    for path in paths:
+        result = benchmark_page(load_saved_page(path), args.repeat)
+        result['page'] = os.path.basename(path)
+        rows.append(result)
+    df = pd.DataFrame(rows).set_index('page')
+    df['speedup'] = (df.read_html_seconds / df.lxml_seconds).round(1)
+    print(df.round(4).to_string())
+    print('total speedup: {:.1f}x over {} tables'.format(df.read_html_seconds.sum() / df.lxml_seconds.sum(),
+                                                          df.tables.sum()))
+
+if __name__ == '__main__':
+    main()
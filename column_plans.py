@@ -0,0 +1,180 @@
+import pandas as pd
+from collections import namedtuple
+from types import MappingProxyType
+
+
+#how each table read from fbref is turned into columns. header is the flattening rule: flat tables
+#have one header row, multi tables join both header levels unless the top one is blank and shot
+#tables do the same without replacing spaces in the second level. rename, dtypes and links name a
+#section of the config file (links can also be a literal list) and table is where the rows are upserted
+PLAN_SPECS = {
+    'standings': {'header': 'flat', 'rename': None, 'dtypes': 'season_standings_dtypes', 'links': ['squad'],
+                  'table': None},
+    'schedule': {'header': 'flat', 'rename': 'schedule_rename_columns', 'dtypes': None, 'links': 'schedule_link_columns',
+                 'table': ('soccer', 'schedules')},
+    'team_results': {'header': 'flat', 'rename': 'team_schedule_rename_columns', 'dtypes': None,
+                     'links': ['comp', 'opponent', 'match_report', 'captain'], 'table': ('soccer', 'team_results')},
+    'roster': {'header': 'flat', 'rename': None, 'dtypes': None, 'links': ['player'], 'table': None},
+    'shot_data': {'header': 'shots', 'rename': 'shot_creation_rename_columns', 'dtypes': 'match_report_shot_data_dtypes',
+                  'links': ['player', 'squad', 'sca_1_player', 'sca_2_player'], 'table': ('soccer', 'shot_creating_actions')},
+}
+
+#plans compiled from the config file last seen, rebuilt if a different config is passed in
+_COMPILED = {'config': None, 'plans': MappingProxyType({})}
+
+
+class ColumnPlan(namedtuple('ColumnPlan', ['name', 'header', 'rename', 'dtypes', 'link_columns', 'table', 'layouts'])):
+    """
+    everything needed to turn a table read from fbref into named text and link columns, compiled once
+    from the config file. the maps are read only, layouts caches the column layout worked out for each
+    header the plan has seen so later tables with the same header skip straight to building the frame
+    """
+    __slots__ = ()
+
+    def renamed(self, name):
+        """
+        returns the final name of a flattened column
+
+        Args:
+            name(str): flattened column name, i.e. '#'
+
+        Returns:
+            name(str): name after the config's renames, i.e. shirtnumber
+        """
+        return self.rename.get(name, name)
+
+    def flatten(self, column):
+        """
+        flattens one column of a read_html header the way the scrapers always have
+
+        Args:
+            column(str or tuple): column name, a tuple for two header rows
+
+        Returns:
+            name(str): flattened lower case name
+        """
+        if self.header == 'flat':
+            return column.lower().replace(' ', '_')
+        if 'Unnamed' in column[0]:
+            return column[1].lower().replace(' ', '_') if self.header == 'multi' else column[1].lower()
+        second = column[1].lower().replace(' ', '_') if self.header == 'multi' else column[1].lower()
+        return column[0].lower().replace(' ', '_') + '_' + second
+
+    def layout(self, columns):
+        """
+        works out where every output column comes from for a header, cached per header
+
+        Args:
+            columns(tuple): columns of the frame read from the page
+
+        Returns:
+            layout(tuple): (text columns, link columns), each a tuple of (position, output name)
+        """
+        layout = self.layouts.get(columns)
+        if layout is None:
+            text = list()
+            links = list()
+            for position, column in enumerate(columns):
+                flat = self.flatten(column)
+                name = self.renamed(flat)
+                text.append((position, name))
+                if flat in self.link_columns:
+                    links.append((position, self.link_columns[flat]))
+            #link columns come after the text columns in the order they are listed in
+            order = list(self.link_columns.values())
+            layout = (tuple(text), tuple(sorted(links, key=lambda i: order.index(i[1]))))
+            self.layouts[columns] = layout
+        return layout
+
+def compile_column_plan(name, spec, config):
+    """
+    compiles one entry of PLAN_SPECS, or a match report category, against the config file
+
+    Args:
+        name(str): name of the plan
+        spec(dict): header, rename, dtypes, links and table of the plan
+        config(dict): config file
+
+    Returns:
+        plan(ColumnPlan): the compiled plan
+    """
+    rename = dict(config.get(spec['rename']) or {}) if spec['rename'] else {}
+    dtypes = dict(config.get(spec['dtypes']) or {}) if spec['dtypes'] else {}
+    links = config.get(spec['links'], []) if isinstance(spec['links'], str) else spec['links']
+    #a link listed under its renamed name (the schedule's) is named after it, one listed under fbref's
+    #name gets <name>_link, which the renames can map too (player_link -> shot_player_link)
+    flat_names = {value: key for key, value in rename.items()}
+    link_columns = dict()
+    for link in links:
+        if link in flat_names:
+            link_columns[flat_names[link]] = link + '_link'
+        else:
+            link_columns[link] = rename.get(link + '_link', link + '_link')
+    return ColumnPlan(name, spec['header'], MappingProxyType(rename), MappingProxyType(dtypes),
+                      MappingProxyType(link_columns), spec['table'], {})
+
+def compile_column_plans(config):
+    """
+    compiles a plan for every table the scrapers read, match report categories are named
+    match_report_<category>
+
+    Args:
+        config(dict): config file
+
+    Returns:
+        plans(MappingProxyType): plan name -> ColumnPlan
+    """
+    plans = {name: compile_column_plan(name, spec, config) for name, spec in PLAN_SPECS.items()}
+    categories = config.get('advanced_match_report_categories', []) + config.get('basic_match_report_categories', [])
+    schema = config['match_report_upsert_config']['schema']
+    for category in dict.fromkeys(categories):
+        name = 'match_report_{}'.format(category)
+        spec = {'header': 'multi', 'rename': '{}_rename_columns'.format(name), 'dtypes': '{}_dtypes'.format(name),
+                'links': ['player'],
+                'table': (schema, config['match_report_upsert_config']['table'].format(category.lower().replace(' ', '_')))}
+        plans[name] = compile_column_plan(name, spec, config)
+    return MappingProxyType(plans)
+
+def configure_column_plans(config):
+    """
+    compiles the plans for a config file up front, usually once per process in configure_run
+
+    Args:
+        config(dict): config file
+    """
+    _COMPILED['plans'] = compile_column_plans(config)
+    _COMPILED['config'] = config
+
+def get_column_plan(config, name):
+    """
+    returns a compiled plan, the config is only compiled again when a different one is passed in
+
+    Args:
+        config(dict): config file
+        name(str): name of the plan, i.e. schedule or match_report_summary
+
+    Returns:
+        plan(ColumnPlan): the compiled plan
+    """
+    if _COMPILED['config'] is not config:
+        configure_column_plans(config)
+    return _COMPILED['plans'][name]
+
+def apply_column_plan(df, plan):
+    """
+    builds the named text and link columns of a table read with read_html(extract_links='body') in
+    one pass, flattening, link splitting and renaming all come from the plan's layout for the header.
+    the columns stay text so the cleaning steps can work on them, plan.dtypes are applied with
+    columnar_store.apply_dtypes when a frame is stored and when it is loaded into the database
+
+    Args:
+        df(DataFrame): table read from the page
+        plan(ColumnPlan): plan for the table
+
+    Returns:
+        new_df(DataFrame): text columns followed by the <column>_link columns
+    """
+    text, links = plan.layout(tuple(df.columns))
+    columns = {name: df.iloc[:, position].str[0] for position, name in text}
+    columns.update({name: df.iloc[:, position].str[1] for position, name in links})
+    return pd.DataFrame(columns, index=df.index)
@@ -0,0 +1,199 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import os
+import shutil
+from run_reports import stage_timer
+
+
+STORE_ROOT = 'data/store'
+
+#partition columns for each dataset, every partition value is stored as a string.
+#leagues are partitioned by their folder from leagues.yaml (i.e. nwsl, wsl)
+STORE_PARTITIONS = {
+    'match_reports': ['folder', 'season', 'category'],
+    'shot_creation': ['folder', 'season'],
+    'schedules': ['folder', 'season'],
+    'standings': ['folder', 'season'],
+    'team_results': ['folder', 'season'],
+    'rosters': ['folder', 'season'],
+}
+
+
+def partition_schema(dataset):
+    """
+    builds the hive partitioning for a dataset
+
+    Args:
+        dataset(str): name of the dataset
+
+    Returns:
+        partitioning(ds.Partitioning): hive partitioning with string keys
+    """
+    fields = [(i, pa.string()) for i in STORE_PARTITIONS[dataset]]
+    return ds.partitioning(pa.schema(fields), flavor='hive')
+
+def partition_path(dataset, partition):
+    """
+    builds the directory of a partition, i.e. data/store/match_reports/folder=nwsl/season=2023/category=summary
+
+    Args:
+        dataset(str): name of the dataset
+        partition(dict): value for each of the dataset's partition columns
+
+    Returns:
+        path(str): directory of the partition
+    """
+    parts = ['{}={}'.format(i, partition[i]) for i in STORE_PARTITIONS[dataset]]
+    return os.path.join(STORE_ROOT, dataset, *parts)
+
+def apply_dtypes(df, datatypes, coerced=None):
+    """
+    casts columns using one of the *_dtypes sections of the config file, values that can't be read
+    as numbers become nulls instead of failing the write. columns not in the config that hold text
+    are stored as strings so every file in a dataset ends up with the same schema.
+
+    Args:
+        df(DataFrame): data being stored
+        datatypes(dict): columns and their corresponding datatypes
+        coerced(dict): if given, column -> number of values that weren't empty but became nulls is added to it
+
+    Returns:
+        new_df(DataFrame): typed data
+    """
+    new_cols = {}
+    for col in df.columns:
+        values = df[col]
+        if col in datatypes:
+            raw = values.replace('', None)
+            values = pd.to_numeric(raw, errors='coerce')
+            if coerced is not None and values.hasnans:
+                lost = int((values.isnull() & raw.notnull()).sum())
+                if lost:
+                    coerced[col] = coerced.get(col, 0) + lost
+            values = values.astype(datatypes[col])
+        elif values.dtype == object:
+            values = values.astype('string')
+        new_cols[col] = values
+    return pd.DataFrame(new_cols, index=df.index)
+
+def write_partition(df, dataset, partition, part_name, datatypes=None):
+    """
+    writes a frame into a partition of the store, rewriting the same part_name replaces it
+
+    Args:
+        df(DataFrame): data being stored
+        dataset(str): name of the dataset
+        partition(dict): value for each of the dataset's partition columns
+        part_name(str): file name within the partition, usually the match or squad id
+        datatypes(dict): columns and their corresponding datatypes, from the config file
+
+    Returns:
+        full_path(str): path of the written file
+    """
+    with stage_timer('store') as counters:
+        dir_path = partition_path(dataset, partition)
+        if not os.path.exists(dir_path):
+            os.makedirs(dir_path)
+        full_path = os.path.join(dir_path, '{}.parquet'.format(part_name))
+        #partition values live in the directory names, not in the files
+        df = df.drop(columns=[i for i in STORE_PARTITIONS[dataset] if i in df.columns])
+        coerced = dict()
+        table = pa.Table.from_pandas(apply_dtypes(df, datatypes or {}, coerced), preserve_index=False)
+        pq.write_table(table, full_path)
+        counters['rows'] = len(df)
+        counters['bytes'] = os.path.getsize(full_path)
+        #a changed fbref format shows up here instead of as silently missing numbers
+        if coerced:
+            counters['coerced'] = sum(coerced.values())
+            print('{} values of {} could not be read as numbers and were stored as nulls: {}'.format(
+                counters['coerced'], full_path, coerced))
+    return full_path
+
+def build_filter(filters, dataset):
+    """
+    turns a dict of filters into a pyarrow expression, a list value matches any of its items
+
+    Args:
+        filters(dict): column -> value or list of values
+        dataset(str): name of the dataset, its partition values are compared as strings
+
+    Returns:
+        expression(ds.Expression): filter expression, None if there are no filters
+    """
+    expression = None
+    for col, value in (filters or {}).items():
+        values = list(value) if isinstance(value, (list, tuple, set)) else [value]
+        if col in STORE_PARTITIONS[dataset]:
+            values = [str(i) for i in values]
+        condition = ds.field(col).isin(values)
+        expression = condition if expression is None else expression & condition
+    return expression
+
+def open_dataset(dataset, filters=None):
+    """
+    opens a dataset with a schema unified across all of the files that match the filters
+
+    Args:
+        dataset(str): name of the dataset
+        filters(dict): partition filters, only matching files are inspected
+
+    Returns:
+        dataset(ds.Dataset): the dataset, None if nothing has been written yet
+    """
+    path = os.path.join(STORE_ROOT, dataset)
+    if not os.path.exists(path):
+        return None
+    partitioning = partition_schema(dataset)
+    raw = ds.dataset(path, format='parquet', partitioning=partitioning)
+    expression = build_filter({i: j for i, j in (filters or {}).items() if i in STORE_PARTITIONS[dataset]}, dataset)
+    fragments = list(raw.get_fragments(filter=expression))
+    if not fragments:
+        return None
+    #files written at different times can have different columns, so merge the footers' schemas
+    schema = pa.unify_schemas([i.physical_schema for i in fragments] + [partitioning.schema])
+    return ds.dataset([i.path for i in fragments], schema=schema, format='parquet', partitioning=partitioning,
+                      partition_base_dir=path)
+
+def read_dataset(dataset, filters=None, columns=None):
+    """
+    reads a dataset into a DataFrame, only touching the partitions and columns asked for
+
+    Args:
+        dataset(str): name of the dataset
+        filters(dict): column -> value or list of values, works on partition and data columns
+        columns(list): columns to read, reads everything if None
+
+    Returns:
+        df(DataFrame): the data
+    """
+    data = open_dataset(dataset, filters)
+    if data is None:
+        return pd.DataFrame(columns=columns)
+    if columns is not None:
+        columns = [i for i in columns if i in data.schema.names]
+    return data.to_table(columns=columns, filter=build_filter(filters, dataset)).to_pandas()
+
+def compact_partition(dataset, partition):
+    """
+    merges all of the per match files in a partition into one file so reads open fewer files
+
+    only compact partitions that are finished (i.e. past seasons), a match written again after
+    compaction would sit next to its old rows in the compacted file
+
+    Args:
+        dataset(str): name of the dataset
+        partition(dict): value for each of the dataset's partition columns
+    """
+    dir_path = partition_path(dataset, partition)
+    files = sorted(i for i in os.listdir(dir_path) if i.endswith('.parquet'))
+    if len(files) < 2:
+        return
+    schema = pa.unify_schemas([pq.read_schema(os.path.join(dir_path, i)) for i in files])
+    data = ds.dataset([os.path.join(dir_path, i) for i in files], schema=schema, format='parquet')
+    tmp_dir = dir_path + '.compacting'
+    os.makedirs(tmp_dir, exist_ok=True)
+    pq.write_table(data.to_table(), os.path.join(tmp_dir, 'compacted.parquet'))
+    shutil.rmtree(dir_path)
+    os.replace(tmp_dir, dir_path)
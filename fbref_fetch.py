@@ -0,0 +1,371 @@
+import pandas as pd
+import requests
+import hashlib
+import gzip
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from email.utils import parsedate_to_datetime
+from io import StringIO
+from html_tables import page_tables
+from run_reports import bind_context, stage_timer, timed_stage
+
+
+FBREF_BASE_URL = 'https://fbref.com'
+
+#settings for the local page cache, ttls are in hours and None means the page never expires
+PAGE_CACHE_SETTINGS = {
+    'cache_dir': os.environ.get('FBREF_CACHE_DIR', 'data/page_cache'),
+    'enabled': True,
+    'offline': os.environ.get('FBREF_OFFLINE', '0') == '1',
+    'ttl_hours': {
+        'match_report': None,
+        'schedule': 6,
+        'standings': 6,
+        'team_results': 6,
+        'other': 24,
+    },
+}
+#page cache settings that can be set from the environment, which wins over the config file
+PAGE_CACHE_ENV = {'cache_dir': 'FBREF_CACHE_DIR', 'offline': 'FBREF_OFFLINE'}
+#settings for requests that actually go out to fbref
+FETCH_SETTINGS = {
+    'requests_per_minute': 10,
+    'min_requests_per_minute': 2,
+    'max_retries': 5,
+    #seconds to wait for fbref to connect and to send each chunk of a page
+    'timeout': 30,
+    'prefetch_workers': 2,
+    #lxml reads tables with html_tables, pandas falls back to pd.read_html
+    'table_parser': 'lxml',
+}
+
+
+class TokenBucket:
+    """
+    token bucket rate limiter shared by every thread that fetches from fbref
+
+    the rate drops when fbref answers with a 429, a 5xx or not at all and slowly climbs back to the
+    configured rate after successful requests
+    """
+
+    def __init__(self, requests_per_minute, capacity=1):
+        self.max_rate = requests_per_minute / 60
+        self.rate = self.max_rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self):
+        """
+        blocks until a request is allowed and spends a token
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def back_off(self, retry_after=None):
+        """
+        halves the rate after a failed request and pauses all requests for retry_after seconds if given
+
+        Args:
+            retry_after(float): seconds fbref asked us to wait
+        """
+        with self.lock:
+            min_rate = FETCH_SETTINGS['min_requests_per_minute'] / 60
+            self.rate = max(min_rate, self.rate / 2)
+            pause = retry_after if retry_after is not None else 1 / self.rate
+            self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+            self.tokens = 0
+
+    def recover(self):
+        """
+        nudges the rate back up towards the configured rate after a successful request
+        """
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate * 1.1)
+
+
+RATE_LIMITER = TokenBucket(FETCH_SETTINGS['requests_per_minute'])
+
+
+def configure_page_cache(cache_config):
+    """
+    updates the page cache settings, usually from the page_cache_config section of the config file.
+    cache_dir and offline are left alone when FBREF_CACHE_DIR or FBREF_OFFLINE is set
+
+    Args:
+        cache_config(dict): settings to override (cache_dir, enabled, offline, ttl_hours)
+    """
+    for key, value in cache_config.items():
+        if key in PAGE_CACHE_ENV and PAGE_CACHE_ENV[key] in os.environ:
+            continue
+        if key == 'ttl_hours':
+            PAGE_CACHE_SETTINGS['ttl_hours'].update(value)
+        else:
+            PAGE_CACHE_SETTINGS[key] = value
+
+def configure_fetching(fetch_config):
+    """
+    updates the rate limit and retry settings, usually from the fetch_config section of the config file
+
+    Args:
+        fetch_config(dict): settings to override (requests_per_minute, min_requests_per_minute,
+                            max_retries, timeout, prefetch_workers, table_parser)
+    """
+    global RATE_LIMITER
+    FETCH_SETTINGS.update(fetch_config)
+    RATE_LIMITER = TokenBucket(FETCH_SETTINGS['requests_per_minute'])
+
+def parse_retry_after(value):
+    """
+    converts a Retry-After header to seconds, it can either be a number of seconds or an http date
+
+    Args:
+        value(str): value of the header
+
+    Returns:
+        seconds(float): seconds to wait, None if the header is missing or can't be read
+    """
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return max(0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def build_fbref_url(link):
+    """
+    makes sure a link scraped from fbref is a full url
+
+    Args:
+        link(str): relative or absolute link from fbref
+
+    Returns:
+        url(str): full url of the page
+    """
+    if 'fbref' in link:
+        return link
+    return FBREF_BASE_URL + link
+
+def classify_page_type(url):
+    """
+    works out what kind of fbref page a url points to, used to pick a cache ttl
+
+    Args:
+        url(str): url of the page
+
+    Returns:
+        page_type(str): match_report, schedule, team_results, standings or other
+    """
+    if '/matches/' in url:
+        return 'match_report'
+    elif '/matchlogs/' in url:
+        return 'team_results'
+    elif '/schedule/' in url:
+        return 'schedule'
+    elif '/comps/' in url:
+        return 'standings'
+    return 'other'
+
+def cached_page_path(url):
+    """
+    builds the cache file path for a url, files are named by the sha256 of the url
+
+    Args:
+        url(str): url of the page
+
+    Returns:
+        path(str): path of the compressed cache file
+    """
+    key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+    return os.path.join(PAGE_CACHE_SETTINGS['cache_dir'], key[:2], key + '.html.gz')
+
+def read_cached_page(url, page_type=None, allow_stale=False):
+    """
+    reads a page from the cache if it is there and has not expired
+
+    Args:
+        url(str): url of the page
+        page_type(str): type of page, inferred from the url if None
+        allow_stale(bool): return the page even if its ttl has run out
+
+    Returns:
+        html(str): html of the page, None if it is not cached or has expired
+    """
+    path = cached_page_path(url)
+    if not os.path.exists(path):
+        return None
+    page_type = page_type or classify_page_type(url)
+    ttl = PAGE_CACHE_SETTINGS['ttl_hours'].get(page_type, PAGE_CACHE_SETTINGS['ttl_hours']['other'])
+    age_hours = (time.time() - os.path.getmtime(path)) / 3600
+    if ttl is not None and age_hours > ttl and not allow_stale:
+        return None
+    with gzip.open(path, 'rb') as f:
+        return f.read().decode('utf-8')
+
+def write_cached_page(url, html):
+    """
+    writes a page to the cache, compressed
+
+    Args:
+        url(str): url of the page
+        html(str): html of the page
+    """
+    path = cached_page_path(url)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    #write to a temp file first so a crash never leaves a half written page behind
+    tmp_path = '{}.{}.tmp'.format(path, threading.get_ident())
+    with gzip.open(tmp_path, 'wb') as f:
+        f.write(html.encode('utf-8'))
+    os.replace(tmp_path, path)
+
+def fetch_page_html(url, page_type=None, use_cache=True):
+    """
+    returns the raw html of a page, from the local cache when possible
+
+    Args:
+        url(str): url of the page
+        page_type(str): type of page used to pick the cache ttl, inferred from the url if None
+        use_cache(bool): set to False to always download the page
+
+    Returns:
+        html(str): html of the page
+    """
+    page_type = page_type or classify_page_type(url)
+    with stage_timer('fetch', category=page_type):
+        use_cache = use_cache and PAGE_CACHE_SETTINGS['enabled']
+        if use_cache:
+            html = read_cached_page(url, page_type, allow_stale=PAGE_CACHE_SETTINGS['offline'])
+            if html is not None:
+                return html
+        if PAGE_CACHE_SETTINGS['offline']:
+            raise FileNotFoundError('{} is not in the page cache and offline mode is on'.format(url))
+
+        html = download_page(url)
+        if use_cache:
+            write_cached_page(url, html)
+        return html
+
+def download_page(url):
+    """
+    downloads a page from fbref, waiting on the shared rate limiter and retrying on 429s, 5xx
+    responses, timeouts and dropped connections
+
+    Args:
+        url(str): url of the page
+
+    Returns:
+        html(str): html of the page
+    """
+    #the time spent waiting on the rate limiter counts towards the download
+    with stage_timer('download') as counters:
+        for attempt in range(FETCH_SETTINGS['max_retries'] + 1):
+            retry = attempt < FETCH_SETTINGS['max_retries']
+            RATE_LIMITER.acquire()
+            try:
+                response = requests.get(url, timeout=FETCH_SETTINGS['timeout'])
+            except (requests.ConnectionError, requests.Timeout):
+                if not retry:
+                    raise
+                counters['retries'] = attempt + 1
+                RATE_LIMITER.back_off()
+                continue
+            if (response.status_code == 429 or response.status_code >= 500) and retry:
+                counters['retries'] = attempt + 1
+                RATE_LIMITER.back_off(parse_retry_after(response.headers.get('Retry-After')))
+                continue
+            response.raise_for_status()
+            RATE_LIMITER.recover()
+            counters['bytes'] = len(response.content)
+            return response.text
+
+def prefetch_pages(urls, page_type=None, workers=None):
+    """
+    fetches pages on background threads and yields them in the order they were requested
+
+    the threads spend their time waiting on the rate limiter, so whatever the caller does with each
+    page (parsing, cleaning, upserting) overlaps with waiting for the next request. only a few pages
+    are fetched ahead of the caller so memory stays flat on long runs.
+
+    Args:
+        urls(list): urls to fetch
+        page_type(str): type of page used to pick the cache ttl, inferred from the url if None
+        workers(int): number of fetch threads, defaults to the prefetch_workers setting
+
+    Yields:
+        (url, html, error): html is None and error is the exception if the fetch failed
+    """
+    workers = workers or FETCH_SETTINGS['prefetch_workers']
+    urls = iter(urls)
+    pending = deque()
+    #the fetch threads record into the caller's run report
+    fetch = bind_context(fetch_page_html)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for url in urls:
+            pending.append((url, executor.submit(fetch, url, page_type)))
+            if len(pending) > workers:
+                yield _finish_prefetch(*pending.popleft())
+        while pending:
+            yield _finish_prefetch(*pending.popleft())
+
+def _finish_prefetch(url, future):
+    try:
+        return url, future.result(), None
+    except Exception as e:
+        return url, None, e
+
+@timed_stage('parse')
+def read_table_from_html(html, table_id=None, extract_links='body'):
+    """
+    reads a single table out of html that has already been downloaded. with the lxml table parser
+    the page is indexed once and only the table asked for is parsed, tables hidden in html comments
+    can be read too. other extract_links modes always go through pd.read_html
+
+    Args:
+        html(str): html of the page
+        table_id(str): id attribute of the table, if None the first table is returned
+        extract_links(str): passed through to pd.read_html
+
+    Returns:
+        df(DataFrame): the table
+    """
+    if FETCH_SETTINGS['table_parser'] == 'lxml' and extract_links == 'body':
+        return page_tables(html).read_table(table_id)
+    attrs = {'id': table_id} if table_id else None
+    return pd.read_html(StringIO(html), attrs=attrs, extract_links=extract_links)[0]
+
+@timed_stage('parse', rows=lambda dfs: sum(len(i) for i in dfs))
+def read_tables_from_html(html, extract_links='body'):
+    """
+    reads every table of a page that isn't hidden in an html comment, i.e. the group tables of a
+    tournament's standings page
+
+    Args:
+        html(str): html of the page
+        extract_links(str): passed through to pd.read_html
+
+    Returns:
+        dfs(list): the tables in page order
+    """
+    if FETCH_SETTINGS['table_parser'] == 'lxml' and extract_links == 'body':
+        return page_tables(html).read_tables()
+    return pd.read_html(StringIO(html), extract_links=extract_links)
@@ -1,10 +1,19 @@
-CREATE OR REPLACE FUNCTION soccer.full_staging_updates()
+-- the staging functions take the ids of the matches that changed, null rebuilds everything
+DROP FUNCTION IF EXISTS soccer.full_staging_updates();
+DROP FUNCTION IF EXISTS soccer.update_player_match_reports();
+DROP FUNCTION IF EXISTS soccer.team_season_stats();
+DROP FUNCTION IF EXISTS soccer.opponent_season_stats();
+DROP FUNCTION IF EXISTS soccer.update_match_stats();
+
+CREATE OR REPLACE FUNCTION soccer.full_staging_updates(changed_match_ids text[] DEFAULT NULL)
  RETURNS void
  LANGUAGE plpgsql
 AS $function$
 begin
-	perform soccer.update_player_match_reports();
-	perform soccer.opponent_season_stats();
+	perform soccer.update_match_stats(changed_match_ids);
+	perform soccer.update_player_match_reports(changed_match_ids);
+	perform soccer.team_season_stats(changed_match_ids);
+	perform soccer.opponent_season_stats(changed_match_ids);
 
 end;
 
@@ -21,10 +30,10 @@ with full_data as (
 select
 	player,
 	squad,
-	sum(goals) goals,
-	rank() over(order by sum(goals) desc) competition_rank
+	sum(goals)::int goals,
+	(rank() over(order by sum(goals) desc))::int competition_rank
 from
-	soccer.match_stats
+	soccer.st_match_stats
 where
 	competition = competition_name and season = comp_season
 group by
@@ -37,12 +46,27 @@ select * from full_data where squad = competition_squad;
  $function$
 ;
 
-CREATE OR REPLACE FUNCTION soccer.opponent_season_stats()
+CREATE OR REPLACE FUNCTION soccer.opponent_season_stats(changed_match_ids text[] DEFAULT NULL)
  RETURNS void
  LANGUAGE plpgsql
 AS $function$
 begin
-	truncate table soccer.st_opponent_season_reports;
+	-- only the (opponent, competition, season) groups that played in a changed match are rebuilt
+	if changed_match_ids is null then
+		truncate table soccer.st_opponent_season_reports;
+	else
+		delete from soccer.st_opponent_season_reports st
+		using (
+			select distinct mri.opponent_id, sch.competition_id, sch.season
+			from soccer.match_report_ids mri
+			join soccer.schedules sch
+			on sch.id = mri.match_id
+			where mri.match_id = any(changed_match_ids)
+		) touched
+		where st.squad_id = touched.opponent_id
+		and st.competition_id = touched.competition_id
+		and st.season = touched.season;
+	end if;
 
 	insert into soccer.st_opponent_season_reports(
 	select
@@ -65,6 +89,16 @@ begin
 	on sch.id = mri.match_id
 	join soccer.competitions c
 	on sch.competition_id = c.id
+	where changed_match_ids is null or exists (
+		select 1
+		from soccer.match_report_ids changed
+		join soccer.schedules changed_sch
+		on changed_sch.id = changed.match_id
+		where changed.match_id = any(changed_match_ids)
+		and changed.opponent_id = mri.opponent_id
+		and changed_sch.competition_id = sch.competition_id
+		and changed_sch.season = sch.season
+	)
 	group by 1,2,3
 	);
 end;
@@ -80,19 +114,34 @@ return query
  select
 	player,
 	goals
- from soccer.match_stats
+ from soccer.st_match_stats
  where player = input_player
  ;
  end;
  $function$
 ;
 
-CREATE OR REPLACE FUNCTION soccer.team_season_stats()
+CREATE OR REPLACE FUNCTION soccer.team_season_stats(changed_match_ids text[] DEFAULT NULL)
  RETURNS void
  LANGUAGE plpgsql
 AS $function$
 begin
-	truncate table soccer.st_team_season_reports;
+	-- only the (squad, competition, season) groups that played in a changed match are rebuilt
+	if changed_match_ids is null then
+		truncate table soccer.st_team_season_reports;
+	else
+		delete from soccer.st_team_season_reports st
+		using (
+			select distinct mri.squad_id, sch.competition_id, sch.season
+			from soccer.match_report_ids mri
+			join soccer.schedules sch
+			on sch.id = mri.match_id
+			where mri.match_id = any(changed_match_ids)
+		) touched
+		where st.squad_id = touched.squad_id
+		and st.competition_id = touched.competition_id
+		and st.season = touched.season;
+	end if;
 
 	insert into soccer.st_team_season_reports(
 	select
@@ -115,6 +164,16 @@ begin
 	on sch.id = mri.match_id
 	join soccer.competitions c
 	on sch.competition_id = c.id
+	where changed_match_ids is null or exists (
+		select 1
+		from soccer.match_report_ids changed
+		join soccer.schedules changed_sch
+		on changed_sch.id = changed.match_id
+		where changed.match_id = any(changed_match_ids)
+		and changed.squad_id = mri.squad_id
+		and changed_sch.competition_id = sch.competition_id
+		and changed_sch.season = sch.season
+	)
 	group by 1,2,3
 	);
 end;
@@ -122,12 +181,35 @@ end;
 $function$
 ;
 
-CREATE OR REPLACE FUNCTION soccer.update_player_match_reports()
+CREATE OR REPLACE FUNCTION soccer.update_match_stats(changed_match_ids text[] DEFAULT NULL)
+ RETURNS void
+ LANGUAGE plpgsql
+AS $function$
+begin
+	-- st_match_stats is the indexed copy of the match_stats view that the leaderboard and player lookups read
+	if changed_match_ids is null then
+		truncate table soccer.st_match_stats;
+		insert into soccer.st_match_stats select * from soccer.match_stats;
+	else
+		delete from soccer.st_match_stats where match_id = any(changed_match_ids);
+		insert into soccer.st_match_stats select * from soccer.match_stats where match_id = any(changed_match_ids);
+	end if;
+	analyze soccer.st_match_stats;
+end;
+$function$
+;
+
+CREATE OR REPLACE FUNCTION soccer.update_player_match_reports(changed_match_ids text[] DEFAULT NULL)
  RETURNS void
  LANGUAGE plpgsql
 AS $function$
  begin
- truncate table soccer.st_player_match_reports;
+ -- with changed_match_ids only the rows for those matches are rebuilt
+ if changed_match_ids is null then
+ 	truncate table soccer.st_player_match_reports;
+ else
+ 	delete from soccer.st_player_match_reports where match_id = any(changed_match_ids);
+ end if;
  insert into soccer.st_player_match_reports (
  SELECT
     su.id,
@@ -219,12 +301,13 @@ AS $function$
     mi.aerial_duels_lost,
     mri.match_id
    FROM soccer.player_match_summary_stats su
-     LEFT JOIN soccer.player_match_passing_stats pa ON pa.id::text = su.id::text
-     LEFT JOIN soccer.player_match_passing_types_stats pt ON pt.id::text = su.id::text
-     LEFT JOIN soccer.player_match_possession_stats po ON po.id::text = su.id::text
-     LEFT JOIN soccer.player_match_defense_stats de ON de.id::text = su.id::text
-     LEFT JOIN soccer.player_match_misc_stats mi ON mi.id::text = su.id::text
-     left join soccer.match_report_ids mri on mri.id::text = su.id::text
+     LEFT JOIN soccer.player_match_passing_stats pa ON pa.id = su.id
+     LEFT JOIN soccer.player_match_passing_types_stats pt ON pt.id = su.id
+     LEFT JOIN soccer.player_match_possession_stats po ON po.id = su.id
+     LEFT JOIN soccer.player_match_defense_stats de ON de.id = su.id
+     LEFT JOIN soccer.player_match_misc_stats mi ON mi.id = su.id
+     left join soccer.match_report_ids mri on mri.id = su.id
+  WHERE changed_match_ids is null or mri.match_id = any(changed_match_ids)
  )
  ;
  end;
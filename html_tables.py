@@ -0,0 +1,338 @@
+import pandas as pd
+import numpy as np
+import re
+import threading
+from bisect import bisect_right
+from lxml import html as lxml_html
+
+
+#fbref tables are never nested, so a table runs from its opening tag to the next </table>
+TABLE_START = re.compile(r'<table\b[^>]*>', re.IGNORECASE)
+TABLE_END = re.compile(r'</table\s*>', re.IGNORECASE)
+TABLE_ID = re.compile(r'''\bid\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))''', re.IGNORECASE)
+COMMENT = re.compile(r'<!--.*?-->', re.DOTALL)
+#same whitespace clean up read_html does on each cell
+WHITESPACE = re.compile(r'[\r\n]+|\s{2,}')
+#strings read_html turns into NaN, used for footer cells and padding which aren't (text, href) tuples
+NA_VALUES = {'', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN', '<NA>',
+             'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'}
+
+#the index of the last page read on each thread, a match report is read once per category in a row
+_LAST_PAGE = threading.local()
+
+
+class PageTables:
+    """
+    index of every table on a page by id, including the tables fbref ships inside html comments
+
+    the page is scanned once with regular expressions and only the tables that are asked for are
+    parsed, each one on its own, instead of parsing the whole document for every table
+    """
+
+    def __init__(self, page_html):
+        self.html = page_html
+        self.spans = dict()
+        self.visible = list()
+        self.commented = set()
+        comments = [(i.start(), i.end()) for i in COMMENT.finditer(page_html)]
+        comment_starts = [i[0] for i in comments]
+        for match in TABLE_START.finditer(page_html):
+            end = TABLE_END.search(page_html, match.end())
+            if end is None:
+                continue
+            span = (match.start(), end.end())
+            position = bisect_right(comment_starts, match.start()) - 1
+            in_comment = position >= 0 and match.start() < comments[position][1]
+            if not in_comment:
+                self.visible.append(span)
+            table_id = TABLE_ID.search(match.group(0))
+            if table_id is not None:
+                table_id = next(i for i in table_id.groups() if i is not None)
+                #a visible table wins over a commented copy with the same id
+                if table_id not in self.spans or not in_comment:
+                    self.spans[table_id] = span
+                    if in_comment:
+                        self.commented.add(table_id)
+                    else:
+                        self.commented.discard(table_id)
+
+    def ids(self):
+        """
+        returns the ids of every table on the page
+
+        Returns:
+            ids(list): table ids in page order
+        """
+        return sorted(self.spans, key=lambda i: self.spans[i][0])
+
+    def table_html(self, table_id=None):
+        """
+        returns the html of one table
+
+        Args:
+            table_id(str): id of the table, if None the first table outside of a comment
+
+        Returns:
+            html(str): html of the table
+        """
+        if table_id is None:
+            if not self.visible:
+                raise ValueError('No tables found')
+            start, end = self.visible[0]
+        else:
+            if table_id not in self.spans:
+                raise ValueError('No tables found with id {}'.format(table_id))
+            start, end = self.spans[table_id]
+        return self.html[start:end]
+
+    def read_table(self, table_id=None):
+        """
+        reads one table into a DataFrame shaped exactly like pd.read_html(extract_links='body') output
+
+        Args:
+            table_id(str): id of the table, if None the first table outside of a comment
+
+        Returns:
+            df(DataFrame): the table, body cells are (text, href) tuples
+        """
+        return table_to_frame(lxml_html.fragment_fromstring(self.table_html(table_id)))
+
+    def read_tables(self):
+        """
+        reads every table outside of a comment, like pd.read_html without an id
+
+        Returns:
+            dfs(list): the tables in page order, body cells are (text, href) tuples
+        """
+        if not self.visible:
+            raise ValueError('No tables found')
+        return [table_to_frame(lxml_html.fragment_fromstring(self.html[start:end])) for start, end in self.visible]
+
+def page_tables(page_html):
+    """
+    returns the table index of a page, reusing it when the same page is read again on this thread
+
+    Args:
+        page_html(str): html of the page
+
+    Returns:
+        tables(PageTables): index of the page's tables
+    """
+    last = getattr(_LAST_PAGE, 'tables', None)
+    if last is None or last.html is not page_html:
+        last = PageTables(page_html)
+        _LAST_PAGE.tables = last
+    return last
+
+def cell_text(cell):
+    """
+    text of a cell the way read_html reads it, line breaks count as whitespace
+
+    Args:
+        cell(lxml element): td or th
+
+    Returns:
+        text(str): the cell's text
+    """
+    for br in cell.iter('br'):
+        br.tail = '\n' + (br.tail or '')
+    return WHITESPACE.sub(' ', cell.text_content()).strip()
+
+def cell_href(cell):
+    """
+    href of the first link in a cell
+
+    Args:
+        cell(lxml element): td or th
+
+    Returns:
+        href(str): the link, None if the cell has no link
+    """
+    for link in cell.iter('a'):
+        href = link.get('href')
+        if href is not None:
+            return href
+    return None
+
+def expand_rows(rows, with_links):
+    """
+    turns tr elements into lists of cell values, copying cells across their colspan and rowspan
+
+    Args:
+        rows(list): tr elements
+        with_links(bool): return (text, href) tuples instead of text
+
+    Returns:
+        values(list): list of rows, each a list of cell values
+    """
+    all_values = list()
+    remainder = list()
+    for tr in rows:
+        values = list()
+        next_remainder = list()
+        index = 0
+        for cell in tr:
+            if cell.tag not in ('td', 'th'):
+                continue
+            while remainder and remainder[0][0] <= index:
+                prev_index, prev_value, prev_rowspan = remainder.pop(0)
+                values.append(prev_value)
+                if prev_rowspan > 1:
+                    next_remainder.append((prev_index, prev_value, prev_rowspan - 1))
+                index += 1
+            value = cell_text(cell)
+            if with_links:
+                value = (value, cell_href(cell))
+            rowspan = int(cell.get('rowspan') or 1)
+            colspan = int(cell.get('colspan') or 1)
+            for _ in range(colspan):
+                values.append(value)
+                if rowspan > 1:
+                    next_remainder.append((index, value, rowspan - 1))
+                index += 1
+        for prev_index, prev_value, prev_rowspan in remainder:
+            values.append(prev_value)
+            if prev_rowspan > 1:
+                next_remainder.append((prev_index, prev_value, prev_rowspan - 1))
+        all_values.append(values)
+        remainder = next_remainder
+    while remainder:
+        next_remainder = list()
+        values = list()
+        for prev_index, prev_value, prev_rowspan in remainder:
+            values.append(prev_value)
+            if prev_rowspan > 1:
+                next_remainder.append((prev_index, prev_value, prev_rowspan - 1))
+        all_values.append(values)
+        remainder = next_remainder
+    return all_values
+
+def remove_hidden(table):
+    """
+    drops elements hidden with display:none and style tags, like read_html does by default
+
+    Args:
+        table(lxml element): the table
+    """
+    for element in table.xpath('.//style'):
+        element.drop_tree()
+    for element in table.xpath('.//*[@style]'):
+        if 'display:none' in element.get('style', '').replace(' ', ''):
+            element.drop_tree()
+
+def build_columns(header, width):
+    """
+    names the columns from the header rows the way read_html does
+
+    Args:
+        header(list): header rows of text, all empty rows already removed
+        width(int): number of columns
+
+    Returns:
+        columns(Index): flat index for one header row, MultiIndex for more, RangeIndex for none
+    """
+    if not header:
+        return pd.RangeIndex(width)
+    header = [row + [''] * (width - len(row)) for row in header]
+    if len(header) == 1:
+        unnamed = [i for i, name in enumerate(header[0]) if not name]
+        names = [name or 'Unnamed: {}'.format(i) for i, name in enumerate(header[0])]
+        return pd.Index(mangle_duplicates(names, lambda name, n: '{}.{}'.format(name, n), unnamed), dtype=object)
+    levels = [[value or 'Unnamed: {}_level_{}'.format(i, level) for i, value in enumerate(row)]
+              for level, row in enumerate(header)]
+    #repeated column tuples get the suffix on their last level
+    names = mangle_duplicates(list(zip(*levels)), lambda name, n: name[:-1] + ('{}.{}'.format(name[-1], n),))
+    return pd.MultiIndex.from_tuples(names)
+
+def mangle_duplicates(names, rename, unnamed=None):
+    """
+    renames repeated column names to name.1, name.2 and so on, the same way pandas' parsers do
+
+    Args:
+        names(list): column names
+        rename(function): builds the new name from the name and its count
+        unnamed(list): positions of blank header cells for a single header row, these are renamed
+                       after every other column and suffixes already in the header are skipped
+
+    Returns:
+        names(list): unique column names
+    """
+    names = list(names)
+    original = set(names) if unnamed is not None else set()
+    unnamed = unnamed or []
+    counts = dict()
+    for i in [i for i in range(len(names)) if i not in unnamed] + unnamed:
+        name = names[i]
+        count = counts.get(name, 0)
+        while count > 0:
+            counts[names[i]] = count + 1
+            name = rename(names[i], count)
+            count = count + 1 if name in original else counts.get(name, 0)
+        names[i] = name
+        counts[name] = count + 1
+    return names
+
+def clean_plain_value(value):
+    """
+    footer cells and padding are plain strings, read_html turns the empty ones into NaN
+
+    Args:
+        value: cell value
+
+    Returns:
+        value: NaN for na strings, otherwise the value unchanged
+    """
+    if isinstance(value, str) and value in NA_VALUES:
+        return np.nan
+    return value
+
+def table_to_frame(table):
+    """
+    builds the DataFrame for one parsed table, header text becomes the columns and body cells
+    become (text, href) tuples. footer rows are appended as plain text
+
+    Args:
+        table(lxml element): the table
+
+    Returns:
+        df(DataFrame): the table
+    """
+    remove_hidden(table)
+    header_rows = list()
+    for thead in table.iter('thead'):
+        header_rows.extend(i for i in thead if i.tag == 'tr')
+        if any(i.tag in ('td', 'th') for i in thead):
+            header_rows.append(thead)
+    body_rows = [tr for tbody in table.iter('tbody') for tr in tbody.iter('tr')]
+    body_rows += [i for i in table if i.tag == 'tr']
+    footer_rows = [tr for tfoot in table.iter('tfoot') for tr in tfoot.iter('tr')]
+    if not header_rows:
+        #no thead, so rows of only th at the top are the header
+        while body_rows and all(i.tag == 'th' for i in body_rows[0] if i.tag in ('td', 'th')):
+            header_rows.append(body_rows.pop(0))
+
+    header = expand_rows(header_rows, with_links=False)
+    body = expand_rows(body_rows, with_links=True)
+    footer = [[clean_plain_value(j) for j in i] for i in expand_rows(footer_rows, with_links=False)]
+    width = max([len(i) for i in header + body + footer] or [0])
+    if len(header) > 1:
+        header = [i for i in header if any(i)]
+    rows = body + footer
+    if not rows:
+        raise ValueError('table has no rows')
+    rows = [i + [np.nan] * (width - len(i)) for i in rows]
+
+    #filled cell by cell, numpy would otherwise unpack the (text, href) tuples into a third dimension
+    data = np.empty((len(rows), width), dtype=object)
+    for i, row in enumerate(rows):
+        for j, value in enumerate(row):
+            data[i, j] = value
+    df = pd.DataFrame(data, columns=build_columns(header, width))
+    #a column with no (text, href) cells only holds footer text, read_html would have made it numeric
+    for position in range(width):
+        if not any(isinstance(i, tuple) for i in data[:, position]):
+            try:
+                df.isetitem(position, pd.to_numeric(pd.Series(data[:, position])))
+            except (TypeError, ValueError):
+                pass
+    return df
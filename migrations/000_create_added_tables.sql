@@ -0,0 +1,122 @@
+-- creates the tables that were added to tables.sql after the first deployments, along with their
+-- indexes, so a database built from an older tables.sql gets them too. runs before 001, which unifies
+-- the key columns, indexes the existing tables and drops the views that apply_migrations recreates
+-- from views.sql and functions.sql, which read these tables. the definitions match tables.sql,
+-- IF NOT EXISTS leaves newer databases alone.
+
+-- load state ledger read by get_missing_match_categories
+CREATE TABLE IF NOT EXISTS soccer.match_load_state (
+	id text NOT NULL,
+	match_id text NOT NULL,
+	category varchar(30) NOT NULL,
+	status varchar(10) NOT NULL,
+	row_count int4 NULL,
+	error text NULL,
+	updated_at timestamp NOT NULL,
+	CONSTRAINT match_load_state_pkey PRIMARY KEY (id)
+);
+CREATE INDEX IF NOT EXISTS match_load_state_match_id_idx ON soccer.match_load_state USING btree (match_id);
+
+-- materialized copy of the soccer.match_stats view read by the staging functions and views. it starts out
+-- empty on an upgraded database, run soccer.full_staging_updates() once to fill it
+CREATE TABLE IF NOT EXISTS soccer.st_match_stats (
+	player varchar(255) NULL,
+	squad varchar(255) NULL,
+	match_date date NULL,
+	competition varchar(100) NULL,
+	season varchar(20) NULL,
+	venue varchar(50) NULL,
+	id text NOT NULL,
+	minutes int4 NULL,
+	goals int4 NULL,
+	assists int4 NULL,
+	pk_goals int4 NULL,
+	pk_attempts int4 NULL,
+	shots int4 NULL,
+	shots_on_target int4 NULL,
+	yellow_cards int4 NULL,
+	red_cards int4 NULL,
+	touches int4 NULL,
+	tackles int4 NULL,
+	interceptions int4 NULL,
+	blocks int4 NULL,
+	xg float8 NULL,
+	npxg float8 NULL,
+	xag float8 NULL,
+	shot_creating_actions int4 NULL,
+	goal_creating_actions int4 NULL,
+	passes_completed int4 NULL,
+	passes_attempted int4 NULL,
+	progressive_passes int4 NULL,
+	carries int4 NULL,
+	progressive_carries int4 NULL,
+	take_ons_attempted int4 NULL,
+	take_ons_succeeded int4 NULL,
+	total_pass_distance int4 NULL,
+	total_progressive_pass_distance int4 NULL,
+	short_passes_completed int4 NULL,
+	short_passes_attempted int4 NULL,
+	medium_passes_completed int4 NULL,
+	medium_passes_attempted int4 NULL,
+	long_passes_completed int4 NULL,
+	long_passes_attempted int4 NULL,
+	xa float8 NULL,
+	key_passes int4 NULL,
+	passes_into_final_third int4 NULL,
+	crosses_into_penalty_area int4 NULL,
+	passes_live int4 NULL,
+	passes_dead_ball int4 NULL,
+	passes_free_kick int4 NULL,
+	passes_through_balls int4 NULL,
+	passes_switches int4 NULL,
+	passes_throw_ins int4 NULL,
+	passes_corner_kicks int4 NULL,
+	corner_kicks_inswinging int4 NULL,
+	corner_kicks_outswinging int4 NULL,
+	corner_kicks_straight int4 NULL,
+	passes_offside int4 NULL,
+	passes_blocked int4 NULL,
+	touches_def_penalty_area int4 NULL,
+	touches_def_third int4 NULL,
+	touches_mid_third int4 NULL,
+	touches_att_third int4 NULL,
+	touches_att_penalty_area int4 NULL,
+	take_ons_tackled int4 NULL,
+	total_carries_distance int4 NULL,
+	total_progressive_carries_distance int4 NULL,
+	carries_into_final_third int4 NULL,
+	carries_into_penalty_area int4 NULL,
+	carries_miscontrolled int4 NULL,
+	carries_disposessed int4 NULL,
+	passes_recieved int4 NULL,
+	progressive_passes_recieved int4 NULL,
+	tackles_att int4 NULL,
+	tackles_won int4 NULL,
+	tackles_def_third int4 NULL,
+	tackles_mid_third int4 NULL,
+	tackles_att_third int4 NULL,
+	challenges_won int4 NULL,
+	challenges_lost int4 NULL,
+	challenges_att int4 NULL,
+	shot_blocks int4 NULL,
+	pass_blocks int4 NULL,
+	clearances int4 NULL,
+	errors_lead_to_shot int4 NULL,
+	second_yellow_cards int4 NULL,
+	fouls int4 NULL,
+	fouled int4 NULL,
+	offsides int4 NULL,
+	crosses int4 NULL,
+	pks_won int4 NULL,
+	pks_converted int4 NULL,
+	own_goals int4 NULL,
+	ball_recoveries int4 NULL,
+	aerial_duels_won int4 NULL,
+	aerial_duels_lost int4 NULL,
+	match_id text NULL,
+	CONSTRAINT st_match_stats_pkey PRIMARY KEY (id)
+);
+CREATE INDEX IF NOT EXISTS st_match_stats_competition_season_idx ON soccer.st_match_stats USING btree (competition, season);
+CREATE INDEX IF NOT EXISTS st_match_stats_player_idx ON soccer.st_match_stats USING btree (player);
+CREATE INDEX IF NOT EXISTS st_match_stats_squad_idx ON soccer.st_match_stats USING btree (squad);
+CREATE INDEX IF NOT EXISTS st_match_stats_match_id_idx ON soccer.st_match_stats USING btree (match_id);
@@ -0,0 +1,83 @@
+-- unifies the key columns of the soccer schema on text and adds the indexes the views and staging
+-- functions join on. the views depend on the altered columns, so they are dropped here and
+-- recreated from views.sql by apply_migrations in the same transaction.
+
+DROP VIEW IF EXISTS soccer.player_competition_ranks;
+DROP VIEW IF EXISTS soccer.player_appearances;
+DROP VIEW IF EXISTS soccer.match_summary_stats;
+DROP VIEW IF EXISTS soccer.match_stats;
+DROP VIEW IF EXISTS soccer.match_possession_stats;
+DROP VIEW IF EXISTS soccer.match_passing_type_stats;
+DROP VIEW IF EXISTS soccer.match_misc_stats;
+DROP VIEW IF EXISTS soccer.match_defense_stats;
+
+ALTER TABLE IF EXISTS soccer.match_report_ids
+	ALTER COLUMN id TYPE text,
+	ALTER COLUMN player_id TYPE text,
+	ALTER COLUMN squad_id TYPE text,
+	ALTER COLUMN match_id TYPE text,
+	ALTER COLUMN opponent_id TYPE text;
+
+ALTER TABLE IF EXISTS soccer.match_load_state
+	ALTER COLUMN id TYPE text,
+	ALTER COLUMN match_id TYPE text;
+
+ALTER TABLE IF EXISTS soccer.match_shot_creation_data
+	ALTER COLUMN shot_id TYPE text,
+	ALTER COLUMN match_id TYPE text,
+	ALTER COLUMN shot_player_match_id TYPE text,
+	ALTER COLUMN sca_1_player_match_id TYPE text,
+	ALTER COLUMN sca_2_player_match_id TYPE text,
+	ALTER COLUMN squad_id TYPE text;
+
+ALTER TABLE IF EXISTS soccer.player_match_defense_stats
+	ALTER COLUMN id TYPE text;
+
+ALTER TABLE IF EXISTS soccer.player_match_misc_stats
+	ALTER COLUMN id TYPE text;
+
+ALTER TABLE IF EXISTS soccer.player_match_passing_stats
+	ALTER COLUMN id TYPE text;
+
+ALTER TABLE IF EXISTS soccer.player_match_passing_types_stats
+	ALTER COLUMN id TYPE text;
+
+ALTER TABLE IF EXISTS soccer.player_match_possession_stats
+	ALTER COLUMN id TYPE text;
+
+ALTER TABLE IF EXISTS soccer.player_match_summary_stats
+	ALTER COLUMN id TYPE text;
+
+ALTER TABLE IF EXISTS soccer.schedules
+	ALTER COLUMN id TYPE text,
+	ALTER COLUMN competition_id TYPE text,
+	ALTER COLUMN home_team_id TYPE text,
+	ALTER COLUMN away_team_id TYPE text;
+
+ALTER TABLE IF EXISTS soccer.shot_creating_actions
+	ALTER COLUMN sca_id TYPE text,
+	ALTER COLUMN shot_id TYPE text,
+	ALTER COLUMN player_match_id TYPE text,
+	ALTER COLUMN squad_id TYPE text;
+
+ALTER TABLE IF EXISTS soccer.shots
+	ALTER COLUMN shot_id TYPE text,
+	ALTER COLUMN shot_player_match_id TYPE text,
+	ALTER COLUMN squad_id TYPE text;
+
+ALTER TABLE IF EXISTS soccer.st_match_stats
+	ALTER COLUMN id TYPE text,
+	ALTER COLUMN match_id TYPE text;
+
+ALTER TABLE IF EXISTS soccer.st_player_match_reports
+	ALTER COLUMN id TYPE text,
+	ALTER COLUMN match_id TYPE text;
+
+CREATE INDEX IF NOT EXISTS match_report_ids_player_id_idx ON soccer.match_report_ids USING btree (player_id);
+CREATE INDEX IF NOT EXISTS match_report_ids_squad_id_idx ON soccer.match_report_ids USING btree (squad_id);
+CREATE INDEX IF NOT EXISTS match_report_ids_opponent_id_idx ON soccer.match_report_ids USING btree (opponent_id);
+CREATE INDEX IF NOT EXISTS match_report_ids_match_id_idx ON soccer.match_report_ids USING btree (match_id);
+CREATE INDEX IF NOT EXISTS st_player_match_reports_id_idx ON soccer.st_player_match_reports USING btree (id);
+CREATE INDEX IF NOT EXISTS st_player_match_reports_match_id_idx ON soccer.st_player_match_reports USING btree (match_id);
+CREATE INDEX IF NOT EXISTS st_team_season_reports_squad_competition_season_idx ON soccer.st_team_season_reports USING btree (squad_id, competition_id, season);
+CREATE INDEX IF NOT EXISTS st_opponent_season_reports_squad_competition_season_idx ON soccer.st_opponent_season_reports USING btree (squad_id, competition_id, season);
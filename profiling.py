@@ -0,0 +1,247 @@
+import pandas as pd
+import cProfile
+import functools
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from run_reports import thread_stages
+
+
+#off unless FBREF_PROFILE=1 or --profile is passed. sampling records the stacks of every thread working
+#on the run every interval seconds and splits them by run report stage, cprofile traces every call on
+#the profiled thread only (prefetch threads are missed) and is slower but exact
+PROFILE_SETTINGS = {
+    'enabled': os.environ.get('FBREF_PROFILE', '0') == '1',
+    'mode': os.environ.get('FBREF_PROFILE_MODE', 'sampling'),
+    'interval': 0.005,
+    'output_dir': os.environ.get('FBREF_PROFILE_DIR', 'data/profiles'),
+    #functions printed per stage at the end of a run
+    'top': 10,
+}
+#root of the samples taken while a thread is between stages
+NO_STAGE = 'no_stage'
+
+#only one run is profiled at a time, nested entry points run unprofiled inside it
+_ACTIVE = {'profiler': None}
+_ACTIVE_LOCK = threading.Lock()
+
+
+def configure_profiling(profile_config):
+    """
+    updates the profile settings, i.e. from the --profile flag
+
+    Args:
+        profile_config(dict): settings to override (enabled, mode, interval, output_dir, top)
+    """
+    PROFILE_SETTINGS.update(profile_config)
+
+def frame_label(frame, line=None):
+    """
+    names a frame the way flamegraph tools show it
+
+    Args:
+        frame(frame): stack frame
+        line(int): line number shown, the line the function starts on if None
+
+    Returns:
+        label(str): i.e. clean_shot_creation_df (soccer_club_scraping_code.py:1052)
+    """
+    code = frame.f_code
+    return '{} ({}:{})'.format(code.co_name, os.path.basename(code.co_filename), line or code.co_firstlineno)
+
+def collapse_stack(frame):
+    """
+    turns a thread's stack into the frames of a collapsed stack line, outermost first. the innermost
+    frame keeps the line it is on so the lines that dominate a function show up as their own entries
+
+    Args:
+        frame(frame): innermost frame of the thread
+
+    Returns:
+        stack(tuple): frame labels
+    """
+    stack = [frame_label(frame, frame.f_lineno)]
+    frame = frame.f_back
+    while frame is not None:
+        stack.append(frame_label(frame))
+        frame = frame.f_back
+    return tuple(reversed(stack))
+
+class SamplingProfiler:
+    """
+    samples the stacks of the profiled thread and of every thread recording into a run report or
+    inside a stage from a background thread. each sample is counted under the run report stage its thread was in, so the
+    collapsed output has one tower per stage (fetch, parse, clean, ids, store, upsert)
+    """
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.samples = Counter()
+        self.thread_id = threading.get_ident()
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self.run, name='sampling_profiler', daemon=True)
+        self.seconds = None
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        self.thread.start()
+
+    def stop(self):
+        self.stopping.set()
+        self.thread.join()
+        self.seconds = time.perf_counter() - self.start_time
+
+    def sample(self):
+        """
+        takes one sample of every thread working on the run
+        """
+        stages = thread_stages()
+        for ident, frame in sys._current_frames().items():
+            if ident != self.thread_id and ident not in stages:
+                continue
+            self.samples[(stages.get(ident) or NO_STAGE,) + collapse_stack(frame)] += 1
+
+    def run(self):
+        while not self.stopping.wait(self.interval):
+            self.sample()
+
+    def write_collapsed(self, path):
+        """
+        writes the samples in the collapsed stack format read by flamegraph.pl, inferno and speedscope
+
+        Args:
+            path(str): path of the output file
+        """
+        with open(path, 'w') as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write('{} {}\n'.format(';'.join(stack), count))
+
+    def hot_spots(self, top=10):
+        """
+        returns the frames the most samples were taken in for each stage
+
+        Args:
+            top(int): frames kept per stage
+
+        Returns:
+            hot_spots(DataFrame): stage, frame, samples, stage_share (of the stage's samples) and
+                                  total_share (of every sample)
+        """
+        records = [{'stage': stack[0], 'frame': stack[-1], 'samples': count} for stack, count in self.samples.items()]
+        df = pd.DataFrame(records, columns=['stage', 'frame', 'samples'])
+        df = df.groupby(['stage', 'frame'], as_index=False).samples.sum()
+        stage_samples = df.groupby('stage').samples.transform('sum')
+        df['stage_share'] = (df.samples / stage_samples).round(3)
+        df['total_share'] = (df.samples / df.samples.sum()).round(3)
+        df = df.sort_values(['stage', 'samples'], ascending=[True, False])
+        return df.groupby('stage').head(top).reset_index(drop=True)
+
+    def write(self, path, top=10):
+        """
+        writes the collapsed stacks and prints the hot spots of each stage
+
+        Args:
+            path(str): path of the output file without an extension
+            top(int): frames printed per stage
+
+        Returns:
+            path(str): path of the collapsed stack file
+        """
+        path = path + '.collapsed'
+        self.write_collapsed(path)
+        print('{} samples over {:.1f}s'.format(sum(self.samples.values()), self.seconds))
+        print(self.hot_spots(top).to_string(index=False))
+        return path
+
+class DeterministicProfiler:
+    """
+    cProfile on the profiled thread, written as a pstats file for snakeviz or pstats
+    """
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def write(self, path, top=10):
+        """
+        writes the pstats file and prints the functions with the most time of their own
+
+        Args:
+            path(str): path of the output file without an extension
+            top(int): functions printed
+
+        Returns:
+            path(str): path of the pstats file
+        """
+        path = path + '.prof'
+        self.profile.dump_stats(path)
+        pstats.Stats(self.profile).sort_stats('tottime').print_stats(top)
+        return path
+
+@contextmanager
+def profiled(name, enabled=None):
+    """
+    profiles the block and writes the output to the profile directory. does nothing when profiling is
+    off or a run is already being profiled
+
+    Args:
+        name(str): name of the run, used in the file name
+        enabled(bool): overrides the enabled setting if not None
+
+    Yields:
+        profiler(SamplingProfiler or DeterministicProfiler): the profiler, None if nothing is profiled
+    """
+    if not (PROFILE_SETTINGS['enabled'] if enabled is None else enabled):
+        yield None
+        return
+    if PROFILE_SETTINGS['mode'] not in ('sampling', 'cprofile'):
+        raise ValueError('unknown profile mode {}, use sampling or cprofile'.format(PROFILE_SETTINGS['mode']))
+    with _ACTIVE_LOCK:
+        profiler = None
+        if _ACTIVE['profiler'] is None:
+            if PROFILE_SETTINGS['mode'] == 'cprofile':
+                profiler = DeterministicProfiler()
+            else:
+                profiler = SamplingProfiler(PROFILE_SETTINGS['interval'])
+            _ACTIVE['profiler'] = profiler
+    if profiler is None:
+        yield None
+        return
+
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+        with _ACTIVE_LOCK:
+            _ACTIVE['profiler'] = None
+        os.makedirs(PROFILE_SETTINGS['output_dir'], exist_ok=True)
+        path = os.path.join(PROFILE_SETTINGS['output_dir'], '{}_{:%Y%m%d_%H%M%S}_{}'.format(name, datetime.now(), os.getpid()))
+        path = profiler.write(path, PROFILE_SETTINGS['top'])
+        print('profile written to {}'.format(path))
+
+def profile_run(func):
+    """
+    decorator that profiles each call of an entry point when profiling is on, see profiled
+
+    Args:
+        func(function): entry point, its name is used in the file name
+
+    Returns:
+        wrapper(function): the function, profiled when profiling is on
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with profiled(func.__name__):
+            return func(*args, **kwargs)
+    return wrapper
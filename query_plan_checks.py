@@ -0,0 +1,121 @@
+import json
+import sys
+from soccer_club_scraping_code import pooled_connection
+
+
+#the joins of the staging function are repeated here because a function body can't be EXPLAINed
+UPDATE_PLAYER_MATCH_REPORTS_JOINS = """
+    SELECT su.id
+    FROM soccer.player_match_summary_stats su
+    LEFT JOIN soccer.player_match_passing_stats pa ON pa.id = su.id
+    LEFT JOIN soccer.player_match_passing_types_stats pt ON pt.id = su.id
+    LEFT JOIN soccer.player_match_possession_stats po ON po.id = su.id
+    LEFT JOIN soccer.player_match_defense_stats de ON de.id = su.id
+    LEFT JOIN soccer.player_match_misc_stats mi ON mi.id = su.id
+    LEFT JOIN soccer.match_report_ids mri ON mri.id = su.id
+    WHERE mri.match_id = ANY(%s)
+    """
+
+#queries whose plans are checked and the tables each one has to read through an index
+QUERY_PLAN_CHECKS = {
+    'match_stats': {
+        'query': "SELECT * FROM soccer.match_stats WHERE match_id = %s",
+        'params': ('plan_check',),
+        'index_tables': ['match_report_ids', 'schedules', 'player_match_summary_stats', 'player_match_passing_stats',
+                         'player_match_passing_types_stats', 'player_match_possession_stats',
+                         'player_match_defense_stats', 'player_match_misc_stats'],
+    },
+    'update_player_match_reports': {
+        'query': UPDATE_PLAYER_MATCH_REPORTS_JOINS,
+        'params': (['plan_check'],),
+        'index_tables': ['match_report_ids', 'player_match_summary_stats', 'player_match_passing_stats',
+                         'player_match_passing_types_stats', 'player_match_possession_stats',
+                         'player_match_defense_stats', 'player_match_misc_stats'],
+    },
+}
+
+
+def explain_query(query, params=None):
+    """
+    returns the plan postgres picks for a query. sequential scans, hash joins and merge joins are turned
+    off so every join is looked up through an index unless no index can serve it (i.e. a cast, a
+    mismatched key type or a missing index)
+
+    Args:
+        query(str): query to explain
+        params(tuple): query parameters
+
+    Returns:
+        plan(dict): top node of the json plan
+    """
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("SET LOCAL enable_seqscan = off; SET LOCAL enable_hashjoin = off; SET LOCAL enable_mergejoin = off;")
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + query, params)
+        plan = cursor.fetchone()[0]
+        cursor.close()
+        conn.rollback()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']
+
+def plan_nodes(plan):
+    """
+    walks every node of a json plan
+
+    Args:
+        plan(dict): plan node
+
+    Yields:
+        node(dict): the node and then all of its children
+    """
+    yield plan
+    for child in plan.get('Plans', []):
+        yield from plan_nodes(child)
+
+def unindexed_reads(plan):
+    """
+    finds the tables a plan reads without an index condition, either with a sequential scan or by
+    walking a whole index
+
+    Args:
+        plan(dict): top node of a json plan
+
+    Returns:
+        tables(set): names of the tables read without an index condition
+    """
+    tables = set()
+    for node in plan_nodes(plan):
+        if node['Node Type'] == 'Seq Scan':
+            tables.add(node['Relation Name'])
+        elif node['Node Type'] in ('Index Scan', 'Index Only Scan') and 'Index Cond' not in node:
+            tables.add(node['Relation Name'])
+    return tables
+
+def check_query_plans(checks=None):
+    """
+    explains each check's query and lists the tables it read without using an index
+
+    Args:
+        checks(dict): checks to run, defaults to QUERY_PLAN_CHECKS
+
+    Returns:
+        failures(dict): check name -> tables read without an index, empty if every plan is fine
+    """
+    failures = dict()
+    for name, check in (checks or QUERY_PLAN_CHECKS).items():
+        plan = explain_query(check['query'], check['params'])
+        scanned = sorted(unindexed_reads(plan) & set(check['index_tables']))
+        if scanned:
+            failures[name] = scanned
+    return failures
+
+
+if __name__ == '__main__':
+    failures = check_query_plans()
+    for name in QUERY_PLAN_CHECKS:
+        if name in failures:
+            print('{}: no index used for {}'.format(name, ', '.join(failures[name])))
+        else:
+            print('{}: ok'.format(name))
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,223 @@
+import pyarrow as pa
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from column_plans import get_column_plan
+from columnar_store import STORE_PARTITIONS, apply_dtypes, read_dataset, write_partition
+from fbref_fetch import build_fbref_url, read_cached_page
+from soccer_club_scraping_code import (SHOT_DATA_CATEGORY, SKIPPED_STATUS, UpsertBuffer, configure_run,
+                                       extract_shot_creation_data_from_df, load_match_report_category, load_shot_creating_actions,
+                                       parse_match_report_category, parse_shot_creation_match_data, record_load_state,
+                                       run_update_function, unavailable_category_reason)
+from streaming import StageStats
+
+
+#workers defaults to every core, each worker gets tasks_per_worker matches queued ahead of it so the
+#pool never waits on the parent, without holding a whole season's results in memory
+REPROCESS_SETTINGS = {
+    'workers': os.cpu_count() or 1,
+    'tasks_per_worker': 2,
+}
+
+#the config each worker process was started with
+_WORKER_CONFIG = {}
+
+
+def init_reprocess_worker(config):
+    """
+    sets up a worker process, the id and table parser settings have to match the parent's
+
+    Args:
+        config(dict): config file
+    """
+    configure_run(config)
+    _WORKER_CONFIG.update(config)
+
+def frame_to_arrow(df, datatypes=None):
+    """
+    types a frame with the config's dtypes and serializes it as an arrow stream, the compact form
+    results are sent back to the parent in
+
+    Args:
+        df(DataFrame): data to send
+        datatypes(dict): columns and their corresponding datatypes, other text columns become strings
+
+    Returns:
+        data(bytes): arrow ipc stream of the frame
+    """
+    table = pa.Table.from_pandas(apply_dtypes(df, datatypes or {}), preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def arrow_to_frame(data):
+    """
+    reads a frame sent back by a worker
+
+    Args:
+        data(bytes): arrow ipc stream from frame_to_arrow
+
+    Returns:
+        df(DataFrame): the frame, with the nullable dtypes it was sent with
+    """
+    return pa.ipc.open_stream(data).read_all().to_pandas()
+
+def reprocess_match(task):
+    """
+    parses and cleans every category of one cached match report in a worker process. the store
+    partitions are written here, the database rows go back to the parent as arrow. categories that can
+    never load (see unavailable_category_reason) go back as skipped
+
+    Args:
+        task(tuple): (schedule row as a dict, league info, categories to parse)
+
+    Returns:
+        result(dict): match_id, frames (category -> arrow bytes), row_counts (category -> rows parsed),
+                      errors (category -> message), skipped (category -> why it can never load), rows
+                      parsed and seconds spent
+    """
+    row, info_dict, categories = task
+    config = _WORKER_CONFIG
+    start = time.perf_counter()
+    result = {'match_id': row['id'], 'frames': {}, 'row_counts': {}, 'errors': {}, 'skipped': {}, 'rows': 0}
+    page_html = read_cached_page(build_fbref_url(row['match_report_link']), 'match_report', allow_stale=True)
+    if page_html is None:
+        result['errors'] = {i: 'page: match report is not in the page cache' for i in categories}
+        result['seconds'] = time.perf_counter() - start
+        return result
+
+    for category in categories:
+        try:
+            #categories that can never load are skipped like in scrape_match_report_all_categories
+            reason = unavailable_category_reason(row, category, config, page_html)
+            if reason is not None:
+                result['skipped'][category] = reason
+                continue
+            if category == SHOT_DATA_CATEGORY:
+                df = parse_shot_creation_match_data(row, config, page_html)
+                write_partition(df, 'shot_creation', {'folder': info_dict['folder'], 'season': row['season']}, row['id'],
+                                get_column_plan(config, 'shot_data').dtypes)
+                result['frames'][category] = frame_to_arrow(extract_shot_creation_data_from_df(df))
+            else:
+                df = parse_match_report_category(row, info_dict, category, config, page_html)
+                datatypes = get_column_plan(config, 'match_report_{}'.format(category)).dtypes
+                partition = {'folder': info_dict['folder'], 'season': row['season'], 'category': category.lower()}
+                write_partition(df, 'match_reports', partition, row['id'], datatypes)
+                result['frames'][category] = frame_to_arrow(df, datatypes)
+            result['row_counts'][category] = len(df)
+            result['rows'] += len(df)
+        except Exception as e:
+            result['errors'][category] = str(e)
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+def load_stored_schedules(info_dict, seasons=None):
+    """
+    reads the schedules already saved to the store, so reprocessing never has to go to fbref
+
+    Args:
+        info_dict(dict): league info
+        seasons(list): seasons as they are partitioned (i.e. 2023 or 2022-2023), every season if None
+
+    Returns:
+        schedule(DataFrame): schedule rows of the matches with a match report
+    """
+    filters = {'folder': info_dict['folder']}
+    if seasons:
+        filters['season'] = [str(i) for i in seasons]
+    df = read_dataset('schedules', filters)
+    for col in STORE_PARTITIONS['schedules']:
+        if col in df.columns:
+            df[col] = df[col].astype(str)
+    return df[df['match_report_link'].notnull()].reset_index(drop=True) if not df.empty else df
+
+def reprocess_cached_matches(schedule, info_dict, config, categories=None, workers=None, write_buffer=None, stats=None,
+                             run_staging_updates=False):
+    """
+    Re-derives matches from the page cache on a pool of processes, i.e. after a change to the renames
+    in the config file
+
+    Workers parse, clean, derive ids and write the store partitions, then send each category back as a
+    typed arrow frame. The parent only loads them, so the cpu bound work spreads across every core
+    while the database sees one buffered writer. Each category is recorded in the load state ledger.
+
+    Args:
+        schedule(DataFrame): schedule rows of the matches to reprocess, see load_stored_schedules
+        info_dict(dict): league info
+        config(dict): config file
+        categories(list): categories to reprocess (shot data is 'shots'), every advanced category if None
+        workers(int): number of worker processes, defaults to the workers setting
+        write_buffer(UpsertBuffer): buffer the upserts go through, a new one is created if None
+        stats(StageStats): counters to record the stages into, a new one is used if None
+        run_staging_updates(bool): refresh the staging tables for the matches this run wrote
+
+    Returns:
+        report(DataFrame): rows upserted per table
+    """
+    configure_run(config)
+    workers = workers or REPROCESS_SETTINGS['workers']
+    categories = categories or config['advanced_match_report_categories'] + [SHOT_DATA_CATEGORY]
+    stats = stats or StageStats()
+    if write_buffer is None:
+        write_buffer = UpsertBuffer(config.get('write_buffer_config', {}).get('flush_threshold_rows'))
+    if write_buffer.stats is None:
+        write_buffer.stats = stats
+    print('reprocessing {} matches on {} workers'.format(len(schedule), workers))
+
+    tasks = ((row.to_dict(), info_dict, categories) for _, row in schedule.iterrows())
+    ahead = workers * REPROCESS_SETTINGS['tasks_per_worker']
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_reprocess_worker, initargs=(config,)) as executor:
+        for task in tasks:
+            pending.append(executor.submit(reprocess_match, task))
+            if len(pending) > ahead:
+                load_reprocessed_match(pending.popleft().result(), info_dict, config, write_buffer, stats)
+        while pending:
+            load_reprocessed_match(pending.popleft().result(), info_dict, config, write_buffer, stats)
+
+    write_buffer.flush()
+    report = write_buffer.report()
+    print(report.to_string(index=False))
+    print(stats.report().to_string(index=False))
+    if run_staging_updates and write_buffer.changed_match_ids:
+        run_update_function(sorted(write_buffer.changed_match_ids))
+    return report
+
+def load_reprocessed_match(result, info_dict, config, write_buffer, stats):
+    """
+    queues the frames a worker sent back into the write buffer along with their load state
+
+    Args:
+        result(dict): output of reprocess_match
+        info_dict(dict): league info
+        config(dict): config file
+        write_buffer(UpsertBuffer): buffer the upserts go through
+        stats(StageStats): counters to record into
+    """
+    #the worker's time is recorded as the parse stage, the time spent here as the load stage
+    stats.record('parse', rows=result['rows'], seconds=result['seconds'], errors=len(result['errors']))
+    start = time.perf_counter()
+    match_id = result['match_id']
+    rows = 0
+    for category, data in result['frames'].items():
+        df = arrow_to_frame(data)
+        try:
+            if category == SHOT_DATA_CATEGORY:
+                load_shot_creating_actions(df, write_buffer=write_buffer)
+            else:
+                load_match_report_category(df, info_dict, category, config, fact_tables=(category == 'summary'),
+                                           write_buffer=write_buffer)
+            record_load_state(match_id, category, 'loaded', row_count=result['row_counts'][category],
+                              write_buffer=write_buffer)
+            rows += len(df)
+        except Exception as e:
+            print(e, category)
+            record_load_state(match_id, category, 'failed', error=str(e), write_buffer=write_buffer)
+    for category, error in result['errors'].items():
+        print(error, category)
+        record_load_state(match_id, category, 'failed', error=error, write_buffer=write_buffer)
+    for category, reason in result['skipped'].items():
+        record_load_state(match_id, category, SKIPPED_STATUS, error=reason, write_buffer=write_buffer)
+    stats.record('load', rows=rows, seconds=time.perf_counter() - start)
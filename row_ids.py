@@ -0,0 +1,127 @@
+import pandas as pd
+import numpy as np
+import hashlib
+from run_reports import timed_stage
+
+
+#how ids are derived. md5 reproduces the ids already in the database (the md5 of the comma joined
+#values), fast hashes whole columns at once with pandas' non-cryptographic hash. switching modes
+#changes every id, so only switch for a database that is being loaded from scratch.
+ID_SETTINGS = {
+    'mode': 'md5',
+}
+
+#the values each kind of id is built from, in order. bump the version whenever the columns change,
+#fast ids are salted with the recipe name and version so ids from different recipes never collide
+ID_RECIPES = {
+    'player_match': {'version': 1, 'columns': ['player', 'match_id']},
+    'shot': {'version': 1, 'columns': ['index', 'shot_player_id', 'match_id']},
+    'shot_creating_action': {'version': 1, 'columns': ['player_match_id', 'sca_event', 'index']},
+    'team_result': {'version': 1, 'columns': ['date', 'squad_id', 'match_id']},
+}
+
+HEX_DIGITS = np.frombuffer(b'0123456789abcdef', dtype='S1')
+
+
+def configure_ids(id_config):
+    """
+    updates the id settings, usually from the id_config section of the config file
+
+    Args:
+        id_config(dict): mode (md5 or fast) and recipes to add or override
+    """
+    for key, value in id_config.items():
+        if key == 'recipes':
+            ID_RECIPES.update(value)
+        else:
+            ID_SETTINGS[key] = value
+
+def build_id_keys(df, columns):
+    """
+    joins the key columns into one string per row, the same string generate_unique_id hashes
+
+    Args:
+        df(DataFrame): data the ids are for
+        columns(list): key columns, in recipe order
+
+    Returns:
+        keys(pd.Series): comma joined values
+    """
+    keys = [df[i].astype(str) for i in columns]
+    return keys[0].str.cat(keys[1:], sep=',')
+
+def md5_ids(df, columns):
+    """
+    md5 ids that match the ones generate_unique_id made row by row
+
+    Args:
+        df(DataFrame): data the ids are for
+        columns(list): key columns, in recipe order
+
+    Returns:
+        ids(pd.Series): hex md5 of each row's key
+    """
+    keys = build_id_keys(df, columns)
+    return pd.Series([hashlib.md5(i.encode()).hexdigest() for i in keys], index=df.index, dtype=object)
+
+def fast_ids(df, columns, recipe, version):
+    """
+    64 bit ids from hashing the key columns in one pass
+
+    Args:
+        df(DataFrame): data the ids are for
+        columns(list): key columns, in recipe order
+        recipe(str): name of the recipe, part of the hash salt
+        version(int): version of the recipe, part of the hash salt
+
+    Returns:
+        ids(pd.Series): 16 character hex id for each row
+    """
+    #values are hashed as strings so an id doesn't depend on how a column happened to be typed
+    keys = pd.DataFrame({i: df[i].astype(str) for i in columns}, index=df.index)
+    salt = hashlib.md5('{}:{}'.format(recipe, version).encode()).hexdigest()[:16]
+    hashes = pd.util.hash_pandas_object(keys, index=False, hash_key=salt).to_numpy()
+    return pd.Series(hex_ids(hashes), index=df.index, dtype=object)
+
+def hex_ids(hashes):
+    """
+    formats 64 bit hashes as 16 character hex strings without a python level loop
+
+    Args:
+        hashes(np.ndarray): uint64 hashes
+
+    Returns:
+        ids(np.ndarray): hex string for each hash
+    """
+    #split each hash into its 16 nibbles, most significant first, and look up their hex digits
+    shifts = np.arange(60, -4, -4, dtype=np.uint64)
+    nibbles = ((hashes[:, None] >> shifts) & np.uint64(15)).astype(np.intp)
+    return HEX_DIGITS[nibbles].view('S16').ravel().astype(str)
+
+@timed_stage('ids', rows=len)
+def generate_ids(df, recipe, columns=None, mode=None):
+    """
+    derives an id for every row of a frame using one of the recipes in ID_RECIPES
+
+    Args:
+        df(DataFrame): data the ids are for
+        recipe(str): name of the recipe, i.e. player_match
+        columns(list): columns to use in place of the recipe's, for frames that name them differently
+                       (i.e. ['sca_1_player', 'match_id'] for a player_match id)
+        mode(str): md5 or fast, defaults to the mode in ID_SETTINGS
+
+    Returns:
+        ids(pd.Series): id for each row
+    """
+    spec = ID_RECIPES[recipe]
+    columns = columns or spec['columns']
+    if len(columns) != len(spec['columns']):
+        raise ValueError('{} ids are built from {} columns, got {}'.format(recipe, len(spec['columns']), columns))
+    if df.empty:
+        return pd.Series(index=df.index, dtype=object)
+    mode = mode or ID_SETTINGS['mode']
+    if mode == 'md5':
+        return md5_ids(df, columns)
+    elif mode == 'fast':
+        return fast_ids(df, columns, recipe, spec['version'])
+    raise ValueError('unknown id mode {}'.format(mode))
@@ -0,0 +1,33 @@
+import argparse
+import yaml
+from backfill import backfill_seasons
+
+
+def parse_args():
+    """
+    reads the command line arguments for a backfill
+
+    Returns:
+        args(Namespace): parsed arguments
+    """
+    parser = argparse.ArgumentParser(description='Load past seasons of a league, picking up where the last run stopped')
+    parser.add_argument('league', help='key of the league in the leagues file, i.e. NWSL')
+    parser.add_argument('first_season', type=int, help='first season to load')
+    parser.add_argument('last_season', type=int, nargs='?', help='last season to load, defaults to first_season')
+    parser.add_argument('--categories', nargs='*', help="categories to load (shot data is 'shots'), defaults to all of them")
+    parser.add_argument('--config', default='data_config.yaml', help='path to the config file')
+    parser.add_argument('--leagues-file', default='leagues.yaml', help='path to the leagues file')
+    parser.add_argument('--state-file', help='path of the state file, defaults to data/backfill_state/<league>.json')
+    parser.add_argument('--max-attempts', type=int, help='tries each match/category gets across every run')
+    parser.add_argument('--skip-staging', action='store_true', help="don't refresh the staging tables at the end")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    with open(args.config) as f:
+        config = yaml.safe_load(f)
+    seasons = list(range(args.first_season, (args.last_season or args.first_season) + 1))
+    failures = backfill_seasons(args.league, seasons, config, args.categories, args.leagues_file, args.state_file,
+                                args.max_attempts, not args.skip_staging)
+    raise SystemExit(1 if len(failures) else 0)
@@ -0,0 +1,53 @@
+import argparse
+import yaml
+from datetime import datetime
+from profiling import configure_profiling
+from soccer_club_scraping_code import update_all_leagues
+
+
+def parse_args():
+    """
+    reads the command line arguments for a nightly update run
+
+    Returns:
+        args(Namespace): parsed arguments
+    """
+    parser = argparse.ArgumentParser(description='Update every league in leagues.yaml in one rate limited pass')
+    parser.add_argument('--config', default='data_config.yaml', help='path to the config file')
+    parser.add_argument('--leagues-file', default='leagues.yaml', help='path to the leagues file')
+    parser.add_argument('--leagues', nargs='*', help='keys of the leagues to update, defaults to all of them')
+    parser.add_argument('--start-date', help='YYYY-MM-DD, defaults to 7 days ago')
+    parser.add_argument('--end-date', help='YYYY-MM-DD, defaults to today')
+    parser.add_argument('--workers', type=int, default=4, help='leagues updated at the same time')
+    parser.add_argument('--skip-staging', action='store_true', help="don't run soccer.full_staging_updates at the end")
+    parser.add_argument('--profile', action='store_true', help='profile the run and write the hot spots of each stage to data/profiles')
+    parser.add_argument('--profile-mode', choices=['sampling', 'cprofile'], default='sampling',
+                        help='sampling splits the profile by stage and writes collapsed stacks for flamegraphs, cprofile writes a pstats file')
+    return parser.parse_args()
+
+def parse_date(value):
+    """
+    converts a YYYY-MM-DD argument to a date
+
+    Args:
+        value(str): date string, may be None
+
+    Returns:
+        date(date): the date, None if no value was given
+    """
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    with open(args.config) as f:
+        config = yaml.safe_load(f)
+    if args.profile:
+        configure_profiling({'enabled': True, 'mode': args.profile_mode})
+    results = update_all_leagues(config, args.leagues_file, args.leagues, parse_date(args.start_date),
+                                 parse_date(args.end_date), args.workers, not args.skip_staging)
+    for league, result in results.items():
+        if isinstance(result, Exception):
+            print('{}: failed ({})'.format(league, result))
+        else:
+            print('{}: done'.format(league))
@@ -0,0 +1,300 @@
+import pandas as pd
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+
+#where the json lines reports of each run are written, set enabled to False to keep only the
+#in memory summary
+RUN_REPORT_SETTINGS = {
+    'enabled': True,
+    'report_dir': os.environ.get('RUN_REPORT_DIR', 'data/run_reports'),
+}
+
+#what a stage record can add to, and the labels the summary groups them by. coerced counts the values
+#the store turned into nulls because they couldn't be read as numbers
+COUNTERS = ('items', 'rows', 'rows_upserted', 'bytes', 'retries', 'errors', 'coerced', 'seconds')
+LABELS = ('league', 'stage', 'category')
+
+#the report and labels the current thread is recording into, plus its open stage timers
+_CONTEXT = threading.local()
+#the stages open on every thread recording into a report or inside a stage by thread id, read by the
+#sampling profiler
+_THREAD_STAGES = {}
+
+
+def configure_run_reports(report_config):
+    """
+    updates the run report settings, usually from the run_report_config section of the config file
+
+    Args:
+        report_config(dict): settings to override (enabled, report_dir)
+    """
+    RUN_REPORT_SETTINGS.update(report_config)
+
+class RunReport:
+    """
+    thread safe counters for each league, stage and category of a run, every record is also written
+    to a json lines file as it happens so a run that dies part way still leaves its events behind
+
+    stages are fetch, parse, clean, ids, store and upsert (see stage_timer), the category of an upsert
+    is the table it wrote to
+    """
+
+    def __init__(self, name='run', path=None):
+        self.started = datetime.now()
+        self.start = time.perf_counter()
+        self.run_id = '{}_{:%Y%m%d_%H%M%S}_{}'.format(name, self.started, os.getpid())
+        if path is None and RUN_REPORT_SETTINGS['enabled']:
+            path = os.path.join(RUN_REPORT_SETTINGS['report_dir'], '{}.jsonl'.format(self.run_id))
+        self.path = path
+        self.totals = defaultdict(lambda: dict.fromkeys(COUNTERS, 0))
+        self.file = None
+        self.lock = threading.Lock()
+
+    def write(self, event):
+        """
+        appends an event to the json lines file
+
+        Args:
+            event(dict): event to write, the run id and time are added
+        """
+        if self.path is None:
+            return
+        line = json.dumps(dict({'run_id': self.run_id, 'time': datetime.now().isoformat()}, **event), default=str)
+        with self.lock:
+            if self.file is None:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                self.file = open(self.path, 'a', buffering=1)
+            self.file.write(line + '\n')
+
+    def record(self, stage, league=None, category=None, error=None, items=1, **counters):
+        """
+        adds to a stage's counters
+
+        Args:
+            stage(str): name of the stage, i.e. fetch
+            league(str): league the work was for
+            category(str): match report category, page type or table
+            error(str): message of the failure, if there was one
+            items(int): items that went through the stage
+            counters: any of rows, rows_upserted, bytes, retries, errors, coerced and seconds
+        """
+        counters['items'] = items
+        with self.lock:
+            totals = self.totals[(league, stage, category)]
+            for name, value in counters.items():
+                totals[name] += value
+        event = {'type': 'stage', 'league': league, 'stage': stage, 'category': category}
+        event.update(counters)
+        if error is not None:
+            event['error'] = error
+        self.write(event)
+
+    def summary(self, league=None):
+        """
+        returns the counters of every league, stage and category in the order they were first seen
+
+        Args:
+            league(str): only return this league
+
+        Returns:
+            summary(DataFrame): league, stage, category, the counters and rows_per_second
+        """
+        with self.lock:
+            records = [dict(zip(LABELS, key), **totals) for key, totals in self.totals.items()
+                       if league is None or key[0] == league]
+        df = pd.DataFrame(records, columns=list(LABELS) + list(COUNTERS))
+        df['seconds'] = df.seconds.astype(float).round(3)
+        df['rows_per_second'] = (df.rows / df.seconds.where(df.seconds > 0)).round(1)
+        return df
+
+    def close(self):
+        """
+        writes the summary and the run's wall time to the file and closes it
+
+        Returns:
+            summary(DataFrame): output of summary
+        """
+        summary = self.summary()
+        for record in summary.to_dict('records'):
+            self.write(dict({'type': 'summary'}, **{key: None if pd.isnull(value) else value for key, value in record.items()}))
+        self.write({'type': 'run', 'started': self.started.isoformat(), 'seconds': round(time.perf_counter() - self.start, 3),
+                    'errors': int(summary.errors.sum()), 'rows_upserted': int(summary.rows_upserted.sum())})
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+        return summary
+
+def _set_context(context):
+    """
+    sets the current thread's report and labels, registering the thread while it records
+    """
+    if context is None:
+        _THREAD_STAGES.pop(threading.get_ident(), None)
+    elif getattr(_CONTEXT, 'value', None) is None:
+        _THREAD_STAGES[threading.get_ident()] = []
+    _CONTEXT.value = context
+
+def thread_stages():
+    """
+    returns the innermost open stage of every thread recording into a report or inside a stage, safe
+    to call from another thread
+
+    Returns:
+        stages(dict): thread id -> name of the stage, None if the thread is between stages
+    """
+    return {ident: (stack[-1:] or [None])[0] for ident, stack in list(_THREAD_STAGES.items())}
+
+def active_report():
+    """
+    returns the report the current thread is recording into
+
+    Returns:
+        report(RunReport): the report, None if nothing is being recorded
+    """
+    context = getattr(_CONTEXT, 'value', None)
+    return context[0] if context is not None else None
+
+@contextmanager
+def reporting(report=None, **labels):
+    """
+    records everything the current thread does inside the block into a report, with labels added to
+    every record. without a report the labels are added to the report already being recorded into
+
+    Args:
+        report(RunReport): report to record into, keeps the current one if None
+        labels: league and/or category
+
+    Yields:
+        report(RunReport): the report being recorded into, None if there isn't one
+    """
+    previous = getattr(_CONTEXT, 'value', None)
+    if report is None and previous is None:
+        yield None
+        return
+    current_report, current_labels = previous or (None, {})
+    _set_context((report or current_report, dict(current_labels, **labels)))
+    try:
+        yield _CONTEXT.value[0]
+    finally:
+        _set_context(previous)
+
+def bind_context(func):
+    """
+    wraps a function so it records into the calling thread's report when it runs on another thread,
+    i.e. a page fetched by prefetch_pages
+
+    Args:
+        func(function): function to run on another thread
+
+    Returns:
+        bound(function): the function, unchanged if nothing is being recorded
+    """
+    context = getattr(_CONTEXT, 'value', None)
+    if context is None:
+        return func
+
+    @functools.wraps(func)
+    def bound(*args, **kwargs):
+        previous = getattr(_CONTEXT, 'value', None)
+        _set_context(context)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _set_context(previous)
+    return bound
+
+def record_stage(stage, **counters):
+    """
+    adds to a stage's counters in the current thread's report, does nothing if there isn't one
+
+    Args:
+        stage(str): name of the stage
+        counters: labels and counters passed on to RunReport.record
+    """
+    context = getattr(_CONTEXT, 'value', None)
+    if context is None:
+        return
+    report, labels = context
+    report.record(stage, **dict(labels, **counters))
+
+@contextmanager
+def stage_timer(stage, **labels):
+    """
+    times the block as a stage. the time of stages nested inside it is taken off, so each second is
+    counted once. a failure is counted against the innermost stage it happened in
+
+    Args:
+        stage(str): name of the stage
+        labels: league and/or category, also applied to anything recorded inside the block
+
+    Yields:
+        counters(dict): add rows, bytes and the like to it inside the block
+    """
+    context = getattr(_CONTEXT, 'value', None)
+    if context is None:
+        #nothing is recorded, the stage is still published for the sampling profiler
+        ident = threading.get_ident()
+        stages = _THREAD_STAGES.setdefault(ident, [])
+        stages.append(stage)
+        try:
+            yield {}
+        finally:
+            stages.pop()
+            if not stages and getattr(_CONTEXT, 'value', None) is None:
+                _THREAD_STAGES.pop(ident, None)
+        return
+    counters = dict()
+    timers = _CONTEXT.__dict__.setdefault('timers', [])
+    timers.append(0.0)
+    stages = _THREAD_STAGES.get(threading.get_ident(), [])
+    stages.append(stage)
+    start = time.perf_counter()
+    try:
+        with reporting(**labels):
+            yield counters
+    except Exception as e:
+        if getattr(_CONTEXT, 'last_error', None) is not e:
+            _CONTEXT.last_error = e
+            counters['errors'] = counters.get('errors', 0) + 1
+            counters['error'] = '{}: {}'.format(type(e).__name__, e)
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        stages.pop()
+        nested = timers.pop()
+        if timers:
+            timers[-1] += seconds
+        record_stage(stage, seconds=seconds - nested, **dict(labels, **counters))
+
+def timed_stage(stage, rows=None, **labels):
+    """
+    decorator version of stage_timer
+
+    Args:
+        stage(str): name of the stage
+        rows(function): counts the rows in the function's output, frames count their length if None
+        labels: league and/or category
+
+    Returns:
+        decorator(function): wraps a function in a stage_timer
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage_timer(stage, **labels) as counters:
+                output = func(*args, **kwargs)
+                if rows is not None:
+                    counters['rows'] = rows(output)
+                elif isinstance(output, pd.DataFrame):
+                    counters['rows'] = len(output)
+            return output
+        return wrapper
+    return decorator
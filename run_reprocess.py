@@ -0,0 +1,32 @@
+import argparse
+import yaml
+from reprocess import load_stored_schedules, reprocess_cached_matches
+from soccer_club_scraping_code import load_leagues
+
+
+def parse_args():
+    """
+    reads the command line arguments for a reprocessing run
+
+    Returns:
+        args(Namespace): parsed arguments
+    """
+    parser = argparse.ArgumentParser(description='Re-derive the matches of a league from the page cache on every core')
+    parser.add_argument('league', help='key of the league in the leagues file, i.e. NWSL')
+    parser.add_argument('--seasons', nargs='*', help='seasons as they are stored (i.e. 2023 or 2022-2023), defaults to every stored season')
+    parser.add_argument('--categories', nargs='*', help="categories to reprocess (shot data is 'shots'), defaults to all of them")
+    parser.add_argument('--workers', type=int, help='number of worker processes, defaults to the number of cores')
+    parser.add_argument('--config', default='data_config.yaml', help='path to the config file')
+    parser.add_argument('--leagues-file', default='leagues.yaml', help='path to the leagues file')
+    parser.add_argument('--skip-staging', action='store_true', help="don't refresh the staging tables at the end")
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    with open(args.config) as f:
+        config = yaml.safe_load(f)
+    info_dict = load_leagues(args.leagues_file, [args.league])[args.league]
+    schedule = load_stored_schedules(info_dict, args.seasons)
+    reprocess_cached_matches(schedule, info_dict, config, args.categories, args.workers,
+                             run_staging_updates=not args.skip_staging)
@@ -0,0 +1,27 @@
+import argparse
+from profiling import configure_profiling
+from world_cup_code import update_world_cup
+
+
+def parse_args():
+    """
+    reads the command line arguments for a world cup update
+
+    Returns:
+        args(Namespace): parsed arguments
+    """
+    parser = argparse.ArgumentParser(description='Update the tournament in world_cup_config.yaml on the shared scraping engine')
+    parser.add_argument('--config', default='world_cup_config.yaml', help='path to the world cup config file')
+    parser.add_argument('--skip-rosters', action='store_true', help="don't scrape each team's roster")
+    parser.add_argument('--skip-team-results', action='store_true', help="don't scrape each team's season results")
+    parser.add_argument('--skip-staging', action='store_true', help="don't run soccer.full_staging_updates at the end")
+    parser.add_argument('--profile', action='store_true', help='profile the run and write the hot spots of each stage to data/profiles')
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.profile:
+        configure_profiling({'enabled': True})
+    update_world_cup(args.config, not args.skip_rosters, not args.skip_team_results, not args.skip_staging)
+    print('done')
@@ -8,15 +8,47 @@ import re
 import seaborn as sns
 import psycopg2
 import hashlib
+import atexit
+import threading
 import creds
-from datetime import datetime, date
+from contextlib import contextmanager
+from io import StringIO
+from psycopg2.pool import ThreadedConnectionPool
+from datetime import datetime, date, timedelta
+from column_plans import apply_column_plan, configure_column_plans, get_column_plan
+from columnar_store import apply_dtypes, read_dataset, write_partition
+from profiling import profile_run
+from html_tables import page_tables
+from fbref_fetch import build_fbref_url, configure_fetching, configure_page_cache, fetch_page_html, prefetch_pages, read_table_from_html, read_tables_from_html
+from row_ids import configure_ids, generate_ids
+from run_reports import RunReport, configure_run_reports, record_stage, reporting, stage_timer, timed_stage
+from streaming import StageStats, counted_stage, frame_batches, map_stage, queue_stage
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from itertools import product
 
+#one pool per process, every database helper borrows its connection from here
+DB_POOL_SETTINGS = {'minconn': 1, 'maxconn': 8}
+_CONNECTION_POOL = None
+#process the pool was opened in, a forked worker (i.e. reprocess.py) opens its own instead of sharing the parent's sockets
+_CONNECTION_POOL_PID = None
+#table columns and types by schema, loaded once with load_schema_metadata
+_SCHEMA_METADATA = {}
+_SCHEMA_METADATA_LOCK = threading.Lock()
+#(schema, table) pairs that weren't there when the schema was reloaded for them, so they don't reload it again
+_MISSING_TABLES = set()
+#ledger category used for the shots_all table
+SHOT_DATA_CATEGORY = 'shots'
+#ledger status of categories that can never load for a match (the table isn't on the page or in the
+#database), they count as done like loaded ones. status is a varchar(10)
+SKIPPED_STATUS = 'skipped'
+#fact tables whose match ids mark a match as changed for the staging refresh, ledger rows don't count
+MATCH_FACT_TABLES = {('soccer', 'match_report_ids'), ('soccer', 'match_shot_creation_data')}
+
 
 def generate_unique_id(values):
     """
-    generates an id based on certain values
+    generates an id based on certain values, row_ids.generate_ids makes the same ids for whole columns
 
     Args:
         values(list): list of the values to input into the id
@@ -29,18 +61,15 @@ def generate_unique_id(values):
     unique_id = hash_object.hexdigest()
     return unique_id
 
-def upsert_data_into_db(df, schema, table_name, primary_key_column='id'):
+def get_db_config():
     """
-    Will insert new data into a database and update where the id is already present
+    returns the connection settings for the database
 
     Args:
-        df(DataFrame): data being inserted
-        schema(str): database schema
-        table_name(str): database table
-        primary_key_colum(str): name of table's primary key
-
+        None
+    returns:
+        db_config(dict): connection settings
     """
-    #connect to DB
     db_password = os.environ.get("DATABASE_PASSWORD", creds.db_password)
     db_config = {
     'host': 'localhost',
@@ -49,35 +78,278 @@ def upsert_data_into_db(df, schema, table_name, primary_key_column='id'):
     'password': db_password,
     'port': '5432'
     }
+    return db_config
 
-    connection = psycopg2.connect(
-        host=db_config['host'],
-        database=db_config['database'],
-        user=db_config['user'],
-        password=db_config['password'],
-        port=db_config['port']
-    )
-    #create cursor
-    cursor = connection.cursor()
-    #create substring for query
-    columns = ', '.join(df.columns)
-    placeholders = ', '.join(['%s'] * len(df.columns))
-    #write out upsert query
-    upsert_query = f"""
-    INSERT INTO {schema}.{table_name} ({columns})
-    VALUES ({placeholders})
-    ON CONFLICT ({primary_key_column}) DO UPDATE
-    SET {', '.join([f"{col} = EXCLUDED.{col}" for col in df.columns if col != primary_key_column])};
-    """
-
-    #create values tuple
-    data_values = [tuple(row) for _, row in df.iterrows()]
-
-    # Execute the upsert query
-    cursor.executemany(upsert_query, data_values)
-
-    # Commit the transaction
-    connection.commit()
+def get_connection_pool():
+    """
+    returns the process wide connection pool, creating it the first time it is needed in each process
+
+    Args:
+        None
+    returns:
+        pool(ThreadedConnectionPool): pool of database connections
+    """
+    global _CONNECTION_POOL, _CONNECTION_POOL_PID
+    if _CONNECTION_POOL is None or _CONNECTION_POOL_PID != os.getpid():
+        _CONNECTION_POOL = ThreadedConnectionPool(DB_POOL_SETTINGS['minconn'], DB_POOL_SETTINGS['maxconn'], **get_db_config())
+        _CONNECTION_POOL_PID = os.getpid()
+        atexit.register(_CONNECTION_POOL.closeall)
+    return _CONNECTION_POOL
+
+@contextmanager
+def pooled_connection():
+    """
+    borrows a connection from the pool and hands it back when done, rolling back on errors
+
+    Args:
+        None
+    yields:
+        connection(psycopg2 connection): connection from the pool
+    """
+    connection_pool = get_connection_pool()
+    connection = connection_pool.getconn()
+    try:
+        yield connection
+    except Exception:
+        connection.rollback()
+        raise
+    finally:
+        connection_pool.putconn(connection)
+
+def frame_to_copy_buffer(df):
+    """
+    writes a DataFrame to an in memory csv that COPY can read
+
+    float columns that only hold whole numbers are written as integers so they load into int columns
+
+    Args:
+        df(DataFrame): data being written
+    returns:
+        buffer(StringIO): csv of the data, nulls are written as \\N
+    """
+    df = df.copy()
+    for col in df.columns:
+        if pd.api.types.is_float_dtype(df[col]):
+            values = df[col].dropna()
+            if (values == values.round()).all():
+                df[col] = df[col].astype('Int64')
+    buffer = StringIO()
+    df.to_csv(buffer, index=False, header=False, na_rep='\\N')
+    buffer.seek(0)
+    return buffer
+
+def upsert_data_into_db(df, schema, table_name, primary_key_column='id', connection=None):
+    """
+    Will insert new data into a database and update where the id is already present
+
+    The rows are copied into a temp table with COPY and then moved over with a single
+    INSERT ... ON CONFLICT statement.
+
+    Args:
+        df(DataFrame): data being inserted
+        schema(str): database schema
+        table_name(str): database table
+        primary_key_colum(str): name of table's primary key
+        connection(psycopg2 connection): connection to use, if given the caller is responsible for committing
+
+    """
+    if df.empty:
+        return
+    if connection is None:
+        with pooled_connection() as conn:
+            upsert_data_into_db(df, schema, table_name, primary_key_column, connection=conn)
+            conn.commit()
+        return
+
+    #the run report counts upserts against the table they went to
+    with stage_timer('upsert', category=table_name) as counters:
+        #a single insert can't update the same row twice, so keep the last copy of each id
+        df = df.drop_duplicates(subset=[primary_key_column], keep='last')
+        #create substring for query
+        columns = ', '.join(df.columns)
+        staging_table = '_stage_{}'.format(table_name)
+        #write out upsert query
+        upsert_query = f"""
+        INSERT INTO {schema}.{table_name} ({columns})
+        SELECT {columns} FROM {staging_table}
+        ON CONFLICT ({primary_key_column}) DO UPDATE
+        SET {', '.join([f"{col} = EXCLUDED.{col}" for col in df.columns if col != primary_key_column])};
+        """
+
+        cursor = connection.cursor()
+        #stage the rows in a temp table with the target's column types but none of its constraints
+        cursor.execute(f"CREATE TEMP TABLE {staging_table} ON COMMIT DROP AS SELECT {columns} FROM {schema}.{table_name} WITH NO DATA;")
+        cursor.copy_expert(f"COPY {staging_table} ({columns}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", frame_to_copy_buffer(df))
+        cursor.execute(upsert_query)
+        cursor.execute(f"DROP TABLE {staging_table};")
+        cursor.close()
+        counters['rows_upserted'] = len(df)
+
+def load_schema_metadata(schema_name='soccer'):
+    """
+    loads the columns and types of every table in a schema with one query and caches them
+
+    Args:
+        schema_name(str): database schema
+    returns:
+        metadata(dict): table name -> list of (column name, data type) in table order
+    """
+    query = """
+        SELECT table_name, column_name, data_type
+        FROM information_schema.columns
+        WHERE table_schema = %s
+        ORDER BY table_name, ordinal_position;
+        """
+    with pooled_connection() as connection:
+        cursor = connection.cursor()
+        cursor.execute(query, (schema_name,))
+        rows = cursor.fetchall()
+        cursor.close()
+    metadata = defaultdict(list)
+    for table_name, column_name, data_type in rows:
+        metadata[table_name].append((column_name, data_type))
+    with _SCHEMA_METADATA_LOCK:
+        _SCHEMA_METADATA[schema_name] = dict(metadata)
+    return _SCHEMA_METADATA[schema_name]
+
+def invalidate_schema_metadata(schema_name=None):
+    """
+    clears cached table metadata, run this after a migration changes a table
+
+    Args:
+        schema_name(str): schema to clear, clears every schema if None
+    """
+    with _SCHEMA_METADATA_LOCK:
+        if schema_name is None:
+            _SCHEMA_METADATA.clear()
+            _MISSING_TABLES.clear()
+        else:
+            _SCHEMA_METADATA.pop(schema_name, None)
+            _MISSING_TABLES.difference_update({i for i in _MISSING_TABLES if i[0] == schema_name})
+
+def get_table_metadata(schema_name, table_name):
+    """
+    returns the cached (column, type) pairs of a table, loading the schema the first time it is needed
+
+    Args:
+        schema_name(str): database schema
+        table_name(str): database table
+    returns:
+        columns(list): list of (column name, data type) in table order
+    """
+    metadata = _SCHEMA_METADATA.get(schema_name)
+    #tables created since the schema was loaded trigger one reload, tables that still aren't there are
+    #remembered until invalidate_schema_metadata is called
+    if metadata is None or (table_name not in metadata and (schema_name, table_name) not in _MISSING_TABLES):
+        metadata = load_schema_metadata(schema_name)
+        if table_name not in metadata:
+            with _SCHEMA_METADATA_LOCK:
+                _MISSING_TABLES.add((schema_name, table_name))
+    return metadata.get(table_name, [])
+
+class UpsertBuffer:
+    """
+    Collects cleaned frames per table across a run and upserts each table in one statement
+
+    Everything buffered is written in a single transaction when flush is called, either by the caller
+    at the end of a run or automatically once flush_threshold rows are waiting. The ids of the matches
+    that were written are kept so the staging tables can be refreshed for just those matches.
+    """
+
+    def __init__(self, flush_threshold=None, stats=None):
+        self.flush_threshold = flush_threshold
+        self.stats = stats
+        self.frames = {}
+        self.rows_buffered = 0
+        self.rows_upserted = defaultdict(int)
+        self.changed_match_ids = set()
+        #add only holds lock while it queues a frame, flushes take turns on flush_lock so batches are
+        #written in the order they were queued
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+
+    def add(self, df, schema, table_name, primary_key_column='id'):
+        """
+        queues a frame to be upserted on the next flush
+
+        Args:
+            df(DataFrame): data being inserted, already aligned to the table
+            schema(str): database schema
+            table_name(str): database table
+            primary_key_column(str): name of table's primary key
+        """
+        if df.empty:
+            return
+        with self.lock:
+            self.frames.setdefault((schema, table_name, primary_key_column), []).append(df)
+            self.rows_buffered += len(df)
+            full = self.flush_threshold is not None and self.rows_buffered >= self.flush_threshold
+        if full:
+            self.flush()
+
+    def flush(self):
+        """
+        upserts every buffered table in one transaction, frames stay buffered if it fails. the frames
+        are taken out of the buffer first so add never waits on the database
+        """
+        with self.flush_lock:
+            with self.lock:
+                pending, rows_pending = self.frames, self.rows_buffered
+                self.frames = {}
+                self.rows_buffered = 0
+            if not pending:
+                return
+            start = time.perf_counter()
+            try:
+                with pooled_connection() as conn:
+                    counts = dict()
+                    match_ids = set()
+                    for (schema, table_name, primary_key_column), frames in pending.items():
+                        df = pd.concat(frames, ignore_index=True)
+                        upsert_data_into_db(df, schema, table_name, primary_key_column, connection=conn)
+                        counts['{}.{}'.format(schema, table_name)] = len(df)
+                        if (schema, table_name) in MATCH_FACT_TABLES and 'match_id' in df.columns:
+                            match_ids.update(df['match_id'].dropna().astype(str))
+                    conn.commit()
+            except Exception:
+                #put the frames back in front of anything queued since, so a retry writes them in order
+                with self.lock:
+                    for key, frames in self.frames.items():
+                        pending.setdefault(key, []).extend(frames)
+                    self.frames = pending
+                    self.rows_buffered += rows_pending
+                raise
+            with self.lock:
+                for table, rows in counts.items():
+                    self.rows_upserted[table] += rows
+                self.changed_match_ids.update(match_ids)
+            if self.stats is not None:
+                self.stats.record('write', rows=sum(counts.values()), seconds=time.perf_counter() - start)
+
+    def report(self):
+        """
+        returns the rows upserted per table so far
+
+        Returns:
+            report(DataFrame): table and rows_upserted
+        """
+        return pd.DataFrame(sorted(self.rows_upserted.items()), columns=['table', 'rows_upserted'])
+
+def write_to_db(df, schema, table_name, primary_key_column='id', write_buffer=None):
+    """
+    upserts a frame right away, or queues it when a write buffer is being used
+
+    Args:
+        df(DataFrame): data being inserted
+        schema(str): database schema
+        table_name(str): database table
+        primary_key_column(str): name of table's primary key
+        write_buffer(UpsertBuffer): buffer to queue the frame in, upserts immediately if None
+    """
+    if write_buffer is None:
+        upsert_data_into_db(df, schema, table_name, primary_key_column)
+    else:
+        write_buffer.add(df, schema, table_name, primary_key_column)
 
 def get_table_columns(schema_name, table_name):
     """
@@ -90,50 +362,41 @@ def get_table_columns(schema_name, table_name):
         column_names(list): list of columns in the table
 
     """
-    #connect to DB
-    db_password = os.environ.get("DATABASE_PASSWORD", creds.db_password)
-    db_config = {
-    'host': 'localhost',
-    'database': 'projects',
-    'user': 'dgilberg',
-    'password': db_password,
-    'port': '5432'
-    }
-
-    connection = psycopg2.connect(
-        host=db_config['host'],
-        database=db_config['database'],
-        user=db_config['user'],
-        password=db_config['password'],
-        port=db_config['port']
-    )
+    return [i[0] for i in get_table_metadata(schema_name, table_name)]
 
-    try:
-        # Create a cursor
-        cursor = connection.cursor()
+def get_table_column_types(schema_name, table_name):
+    """
+    returns the data type of each column of a given table
 
+    Args:
+        schema(str): database schema
+        table_name(str): database table
+    returns:
+        column_types(dict): column name -> data type
+    """
+    return dict(get_table_metadata(schema_name, table_name))
 
-        # extract column names from information schema
-        query = """
-            SELECT column_name
-            FROM information_schema.columns
-            WHERE table_schema = %s AND table_name = %s
-            ORDER BY ordinal_position;
-            """
-        cursor.execute(query, (schema_name, table_name))
-        # Fetch all the column names
-        column_names = [row[0] for row in cursor.fetchall()]
+def align_to_table(df, schema_name, table_name):
+    """
+    reorders a DataFrame to a table's columns, dropping extra columns and adding missing ones as nulls
 
-        return column_names
-    except Exception as e:
-        print(f"Error: {e}")
-    finally:
-        cursor.close()
-        connection.close()
+    Args:
+        df(DataFrame): data being inserted
+        schema(str): database schema
+        table_name(str): database table
+    returns:
+        aligned_df(DataFrame): data with exactly the table's columns in table order
+    """
+    table_cols = get_table_columns(schema_name, table_name)
+    #fail here rather than when a buffered flush tries to write to a table that isn't there
+    if not table_cols:
+        raise ValueError('{}.{} does not exist'.format(schema_name, table_name))
+    return df.reindex(columns=table_cols)
 
 def db_connect():
     """
-    creates a connection to the database for ad hoc queries and purposes
+    creates a connection to the database for ad hoc queries and purposes, the pipeline itself
+    borrows connections from pooled_connection instead
 
     Args:
         None
@@ -141,27 +404,71 @@ def db_connect():
         Connection (psycopg2.connect): connection to database
 
     """
-    db_password = os.environ.get("DATABASE_PASSWORD", creds.db_password)
-    db_config = {
-    'host': 'localhost',
-    'database': 'projects',
-    'user': 'dgilberg',
-    'password': db_password,
-    'port': '5432'
-    }
+    return psycopg2.connect(**get_db_config())
+
+def apply_migrations(migrations_dir='migrations', schema_scripts=('views.sql', 'functions.sql')):
+    """
+    applies the numbered sql files in the migrations folder that have not been run yet, in order
+
+    views and functions are kept as CREATE OR REPLACE scripts, so they are run again after the
+    migrations in the same transaction. applied versions are recorded in soccer.schema_migrations.
+    tables added to tables.sql have to be created by a migration too (see 000_create_added_tables.sql),
+    otherwise the rerun views and functions fail on databases built before them.
+
+    Args:
+        migrations_dir(str): folder of the migration files, i.e. 001_unify_key_types.sql
+        schema_scripts(tuple): scripts rerun after any migration is applied
+
+    Returns:
+        applied(list): file names of the migrations that were applied
+    """
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS soccer.schema_migrations (
+                version text PRIMARY KEY,
+                applied_at timestamp NOT NULL DEFAULT now()
+            );
+            """)
+        cursor.execute("SELECT version FROM soccer.schema_migrations;")
+        done = {i[0] for i in cursor.fetchall()}
+        pending = sorted(i for i in os.listdir(migrations_dir) if i.endswith('.sql') and i not in done)
+        for file_name in pending:
+            print('applying', file_name)
+            with open(os.path.join(migrations_dir, file_name)) as f:
+                cursor.execute(f.read())
+            cursor.execute("INSERT INTO soccer.schema_migrations (version) VALUES (%s);", (file_name,))
+        if pending:
+            for script in schema_scripts:
+                with open(script) as f:
+                    cursor.execute(f.read())
+        conn.commit()
+        cursor.close()
+    invalidate_schema_metadata()
+    return pending
+
+def upsert_dataset_to_db(dataset, schema, table, filters=None, primary_key_column='id', plan=None):
+    """
+    Reads part of the columnar store and inserts it into the database, only the table's columns are read
 
-    connection = psycopg2.connect(
-        host=db_config['host'],
-        database=db_config['database'],
-        user=db_config['user'],
-        password=db_config['password'],
-        port=db_config['port']
-    )
-    return connection
+    Args:
+        dataset(str): name of the dataset in the store
+        schema(str): database schema
+        table(str): database table
+        filters(dict): i.e. {'folder': 'nwsl', 'season': '2023', 'category': 'summary'}
+        primary_key_column(str): table's primary key column
+        plan(ColumnPlan): plan the rows were scraped with (i.e. get_column_plan(config, 'match_report_summary')),
+                          its dtypes are applied again so partitions written under older dtypes load the same
+    """
+    df = read_dataset(dataset, filters=filters, columns=get_table_columns(schema, table))
+    if plan is not None:
+        df = apply_dtypes(df, plan.dtypes)
+    df = align_to_table(df, schema, table)
+    upsert_data_into_db(df, schema, table, primary_key_column)
 
-def upsert_multiple_files_to_db(file_path, schema, table, primary_key_column='id', key_term=None):
+def upsert_multiple_files_to_db(file_path, schema, table, primary_key_column='id', key_term=None, batch_rows=None):
     """
-    Compiles multiple files and inserts them all into the database
+    Streams multiple files into the database in batches, so memory stays flat no matter how many files there are
 
     Args:
         file_path(str): path of collective files
@@ -169,17 +476,26 @@ def upsert_multiple_files_to_db(file_path, schema, table, primary_key_column='id
         table(str): database table
         primary_key_column(str): table's primary key column
         key_term(str): key term present in file names to be inserted
+        batch_rows(int): rows upserted per batch, defaults to the batch_rows setting in streaming
+
+    Returns:
+        report(DataFrame): items, rows and throughput of the read, clean and write stages
     """
     #make a list of all files
     files = all_files_in_subdirectories(file_path, key_term=key_term)
-    #concat all files
-    df = pd.concat([pd.read_pickle(i) for i in files], ignore_index=True)
-    #get the table columns and apply that to the dataframe
-    table_cols = get_table_columns(schema, table)
-    df = df[table_cols]
-    #replace blank cells and upsert
-    df = df.replace('', 0)
-    upsert_data_into_db(df, schema, table, primary_key_column)
+    stats = StageStats()
+    #files are read on a background thread that waits whenever the writer falls behind
+    frames = counted_stage('read', queue_stage(pd.read_pickle(i) for i in files), stats)
+    batches = frame_batches(frames, batch_rows)
+    #get the table columns and apply that to each batch, replace blank cells and upsert
+    cleaned = map_stage('clean', lambda df: align_to_table(df, schema, table).replace('', 0), batches, stats)
+    for df in cleaned:
+        start = time.perf_counter()
+        upsert_data_into_db(df, schema, table, primary_key_column)
+        stats.record('write', rows=len(df), seconds=time.perf_counter() - start)
+    report = stats.report()
+    print(report.to_string(index=False))
+    return report
 
 def retrieve_table(schema_name, table_name, limit=None):
     """
@@ -192,8 +508,6 @@ def retrieve_table(schema_name, table_name, limit=None):
 
 
     """
-    #get column names
-    cols = get_table_columns(schema_name, table_name)
     #run query
     query = 'select * from {}.{}'.format(schema_name, table_name)
     #if a limit is requested then apply that
@@ -201,37 +515,28 @@ def retrieve_table(schema_name, table_name, limit=None):
         query += ' limit {};'.format(limit)
     else:
         query += ';'
-    #connect to db
-    conn = db_connect()
-    cursor = conn.cursor()
-    cursor.execute(query)
-    #create dataframe
-    df = pd.DataFrame(cursor.fetchall(), columns=cols)
-    conn.close()
+    #borrow a connection and build the dataframe, column names come from the cursor
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query)
+        cols = [i[0] for i in cursor.description]
+        df = pd.DataFrame(cursor.fetchall(), columns=cols)
+        cursor.close()
     return df
 
-def cast_dtypes(df, datatypes):
+def extract_link_part(links, position):
     """
-    Casts datatypes to columns in a database
+    Pulls one piece out of a column of fbref links (i.e. position 3 of /en/squads/<id>/... is the squad id)
 
     Args:
-        df(DataFrame): DataFrame to assign dtypes to
-        dtypes(dict): dict of columns and their corresponding datatypes
+        links(pd.Series): column of links, missing links stay None
+        position(int): index of the piece after splitting the link on '/'
 
     Returns:
-        new_df(DataFrame): dataframe with reset datatypes
-    """
-    new_df = df.copy()
-    arr = list(datatypes.keys())
-    for i in arr:
-        if i in df.columns:
-            new_df[i] = new_df[i].fillna(np.nan)
-            new_df[i] = new_df[i].replace('', np.nan)
-#             if df[i].dtype == 'object':
-#                 print(i)
-#                 new_df[i] = new_df[i].str.replace(',', '')
-            new_df[i] = new_df[i].astype(datatypes[i])
-    return new_df
+        parts(pd.Series): the extracted piece of each link
+    """
+    parts = links.str.split('/').str[position]
+    return parts.where(parts.notnull(), None)
 
 def all_files_in_subdirectories(dir_path, key_term=None):
     """
@@ -255,9 +560,24 @@ def all_files_in_subdirectories(dir_path, key_term=None):
     return arr
 
 
+def build_dataframe_from_store(dataset, filters=None, columns=None):
+    """
+    Reads scraped data back out of the columnar store
+
+    Args:
+        dataset(str): match_reports, shot_creation, schedules, standings, team_results or rosters
+        filters(dict): i.e. {'folder': 'nwsl', 'season': ['2022', '2023'], 'category': 'summary'}
+        columns(list): columns to read, reads everything if None
+
+    Returns:
+        df(DataFrame): the data
+    """
+    return read_dataset(dataset, filters=filters, columns=columns)
+
 def build_dataframe_from_subdirectory(dir_path, key_term=None):
     """
-    Takes files in a given file path and builds a dataframe
+    Takes files in a given file path and builds a dataframe, used for pickles saved before the
+    columnar store
 
     Args:
         dir_path(str): relative path to folder
@@ -289,12 +609,16 @@ def extract_squad_tag(url):
     except:
         return None
 
-def scrape_standings(info_dict, season, current_season=True):
+@timed_stage('clean', category='standings')
+def scrape_standings(info_dict, season, config, current_season=True):
     """
         Scrapes data for standings of the World Cup
 
         Args:
-            url(str): url of standings page
+            info_dict(dict): league information
+            season(str): season
+            config(dict): config file
+            current_season(bool): whether the season is the one currently being played
 
         Returns:
             final(df) df of total standings across all groups
@@ -316,32 +640,34 @@ def scrape_standings(info_dict, season, current_season=True):
         season_str = '{}-{}'.format(prev, season)
     #build out url and table id and read into DataFrame and do initial cleaning
     url = 'https://fbref.com/en/comps/{}/{}/{}-{}'.format(competition_id, season_str, season_str, league_table)
-    attrs = {'id': 'results{}{}1_overall'.format(season_str, competition_id)}
-    df = pd.read_html(url, attrs=attrs, extract_links='body')[0]
-    df.columns = [i.lower().replace(' ', '_') for i in df.columns]
-    df['squad_link'] = df.apply(lambda row: row['squad'][1], axis=1)
-    df['squad'] = df.apply(lambda row: row['squad'][0], axis=1)
-    df['squad_tag'] = df.apply(lambda row: extract_squad_tag(row['squad_link']), axis=1)
-    df['squad_id'] = df.apply(lambda row: row['squad_link'].split('/')[3], axis=1)
-    df['squad'] = df.apply(lambda row: row['squad'].strip(), axis=1)
-    remaining_cols = [i for i in df.columns if 'squad' not in i]
-    for col in remaining_cols:
-        df[col] = df.apply(lambda row: row[col][0], axis=1)
+    table_id = 'results{}{}1_overall'.format(season_str, competition_id)
+    plan = get_column_plan(config, 'standings')
+    page_html = fetch_page_html(url, 'standings')
+    if info_dict.get('group_stage'):
+        #tournaments have a standings table for each group, in group order
+        groups = read_tables_from_html(page_html)
+        df = pd.concat([apply_column_plan(table, plan).assign(group=chr(ord('A') + index)) for index, table in enumerate(groups)],
+                       ignore_index=True)
+    else:
+        df = apply_column_plan(read_table_from_html(page_html, table_id), plan)
+    df['squad_tag'] = df.squad_link.str.split('/').str[-1].str.split('-Stats').str[0]
+    df['squad_id'] = extract_link_part(df.squad_link, 3)
+    if info_dict.get('national_teams'):
+        #national teams are listed after their country code, i.e. eng England
+        squad = df.squad.str.strip().str.split(' ', n=1)
+        df['squad_abbreviation'] = squad.str[0]
+        df['squad'] = squad.str[-1]
+    df['squad'] = df.squad.str.strip()
     df['league'] = info_dict['name']
 
     df['season'] = season_str
-    #saves it to proper directory
-    dir_path = 'data/{}/league_standings'.format(info_dict['folder'])
-    #creates folder for this if it does not exist.
-    if not os.path.exists(dir_path):
-        os.makedirs(dir_path)
-    file_path ='{}_standings.pkl'.format(str(season))
-    full_path = os.path.join(dir_path, file_path)
-
-    df.to_pickle(full_path)
+    #saves it to the league's partition of the store
+    partition = {'folder': info_dict['folder'], 'season': season_str}
+    write_partition(df, 'standings', partition, 'standings', plan.dtypes)
     return df
 
-def scrape_schedule_from_competition(info_dict, season, config):
+@timed_stage('clean', category='schedule')
+def scrape_schedule_from_competition(info_dict, season, config, current_season=True):
     """
     Scrapes a competition's schedule page
     Example: https://fbref.com/en/comps/182/schedule/NWSL-Scores-and-Fixtures
@@ -350,6 +676,7 @@ def scrape_schedule_from_competition(info_dict, season, config):
         info_dict(dict): league information
         season(str): season
         config(dict): config file
+        current_season(bool): whether the season is the one currently being played
 
     """
     #get info/tag/year info
@@ -370,141 +697,212 @@ def scrape_schedule_from_competition(info_dict, season, config):
 
     #try to extract the table with the schedule in it
     try:
-        attrs = {'id': 'sched_all'}
-        df = pd.read_html(url, attrs=attrs, extract_links='body')[0]
-    except ValueError:
-        attrs = {'id': 'sched_{}_{}_1'.format(season_str, competition_id)}
-        df = pd.read_html(url, attrs=attrs, extract_links='body')[0]
+        page_html = fetch_page_html(url, 'schedule')
+        try:
+            df = read_table_from_html(page_html, 'sched_all')
+        except ValueError:
+            df = read_table_from_html(page_html, 'sched_{}_{}_1'.format(season_str, competition_id))
     except Exception as e:
         print(e)
         return False
     #some basic cleaning--column renames and also extracting links provided by fbref
-    df.columns = [i.lower().replace(' ', '_') for i in df.columns]
-    df = df.rename(columns=config['schedule_rename_columns'])
-    link_cols = config['schedule_link_columns']
-    non_link_cols = [i for i in df.columns if i not in link_cols]
-    for i in link_cols:
-        new_col = i + '_link'
-        df[new_col] = df.apply(lambda row: row[i][1], axis=1)
-        df[i] = df.apply(lambda row: row[i][0], axis=1)
-    for j in non_link_cols:
-        df[j] = df.apply(lambda row: row[j][0], axis=1)
+    plan = get_column_plan(config, 'schedule')
+    df = apply_column_plan(df, plan)
 
     #create new columns based on other values and info values
     df = df[(df.day_of_week != 'Day') & (df.match_report == 'Match Report') & (df.score.str.contains('–'))]
     df['attendance'] = df.attendance.str.replace(',', '')
-    df['home_team_id'] = df.apply(lambda row: row['home_team_link'].split('/')[3], axis=1)
-    df['away_team_id'] = df.apply(lambda row: row['away_team_link'].split('/')[3], axis=1)
-    df['id'] = df.apply(lambda row: row['match_report_link'].split('/')[-2], axis=1)
+    df['home_team_id'] = extract_link_part(df.home_team_link, 3)
+    df['away_team_id'] = extract_link_part(df.away_team_link, 3)
+    df['id'] = extract_link_part(df.match_report_link, -2)
     df['competition_id'] = competition_id
-    df['home_goals'] = df.apply(lambda row: row['score'].split('–')[0], axis=1)
-    df['away_goals'] = df.apply(lambda row: row['score'].split('–')[1], axis=1)
+    score = df.score.str.split('–')
+    df['home_goals'] = score.str[0]
+    df['away_goals'] = score.str[1]
     df['season'] = season_str
-    dir_path = 'data/{}/schedules'.format(info_dict['folder'])
-    if not os.path.exists(dir_path):
-        os.makedirs(dir_path)
+    if info_dict.get('national_teams'):
+        #the country code comes after the home team and before the away team, i.e. England eng vs eng England
+        df['home_team'] = df.home_team.str.rsplit(' ', n=1).str[0]
+        df['away_team'] = df.away_team.str.split(' ', n=1).str[-1]
 
-    #save to file path and upsert
-    file_name = '{}_schedule.pkl'.format(season)
-    full_path = os.path.join(dir_path, file_name)
+    #save to the store and upsert
     df = df.reset_index(drop=True)
-    df.to_pickle(full_path)
+    write_partition(df, 'schedules', {'folder': info_dict['folder'], 'season': season_str}, 'schedule')
     df = df.replace('', None)
-    tc = get_table_columns('soccer', 'schedules')
-    missing_cols = [i for i in tc if i not in df.columns]
-    for i in missing_cols:
-        df[i] = None
-    idf = df[tc]
-    upsert_data_into_db(idf, 'soccer', 'schedules')
+    idf = align_to_table(df, *plan.table)
+    upsert_data_into_db(idf, *plan.table)
     return df
 
-def scrape_match_report_from_competition_schedule(row, info_dict, category, config, fact_tables=False):
+def fetch_match_report_html(row):
     """
-        scrapes a match report (both teams) from the competition schedule for a given category
+    downloads a match report page once so every category table can be read from it
+
+    Args:
+        row(pd.Series): row of the schedule dataframe
+
+    Returns:
+        html(str): html of the match report page
+    """
+    return fetch_page_html(build_fbref_url(row['match_report_link']))
+
+def read_match_report_team_table(page_html, table_id, category, plan):
+    """
+        reads one team's table for a category out of a match report page, flattened and renamed
+
+        Args:
+            page_html(str): html of the match report
+            table_id(str): id of the team's table
+            category(str): category of the table, keeper tables have no shirt numbers to filter on
+            plan(ColumnPlan): column plan of the category
+
+        Returns:
+            df(DataFrame): the team's table with text columns and a player_link column
+    """
+    df = apply_column_plan(read_table_from_html(page_html, table_id), plan)
+    if category != 'keeper':
+        df = df[pd.notnull(df[plan.renamed('#')])]
+    return df
+
+def match_report_table_ids(row, category):
+    """
+        returns the ids of both teams' tables for a category on a match report page
+
+        Args:
+            row(pd.series): row of the schedule dataframe
+            category(str): category of the match report
+
+        Returns:
+            home_table_id(str): id of the home team's table
+            away_table_id(str): id of the away team's table
+    """
+    if category == 'keeper':
+        return 'keeper_stats_{}'.format(row['home_team_id']), 'keeper_stats_{}'.format(row['away_team_id'])
+    return 'stats_{}_{}'.format(row['home_team_id'], category.lower()), 'stats_{}_{}'.format(row['away_team_id'], category.lower())
+
+def unavailable_category_reason(row, category, config, page_html):
+    """
+        checks whether a category can be loaded for a match at all. a played match's report doesn't
+        change, so a category whose tables aren't on the page (i.e. advanced categories of a basic
+        competition) or whose table isn't in the database is skipped for good
+
+        Args:
+            row(pd.series): row of the schedule dataframe
+            category(str): category of the match report, or 'shots' for shot data
+            config(dict): values of the config file
+            page_html(str): html of the match report
+
+        Returns:
+            reason(str): why the category can't be loaded, None if it can
+    """
+    if category == SHOT_DATA_CATEGORY:
+        table_ids = ['shots_all']
+        schema, table = 'soccer', 'shot_creating_actions'
+    else:
+        table_ids = match_report_table_ids(row, category)
+        schema, table = get_column_plan(config, 'match_report_{}'.format(category)).table
+    if not get_table_columns(schema, table):
+        return '{}.{} does not exist'.format(schema, table)
+    page_table_ids = set(page_tables(page_html).ids())
+    missing = [i for i in table_ids if i not in page_table_ids]
+    if missing:
+        return 'No tables found with id {}'.format(', '.join(missing))
+    return None
+
+@timed_stage('clean')
+def parse_match_report_category(row, info_dict, category, config, page_html):
+    """
+        reads and cleans both teams' tables for a category out of a match report page, nothing is
+        written so it can run in a worker process
 
         Args:
             row(pd.series): row of the schedule dataframe
+            info_dict(dict): league info
             category: which category of data you're pulling, consult fbref for the available ones for the competition
             config(dict): values of the config file
+            page_html(str): html of the match report
 
         Returns:
             final(DataFrame): full match report
 
     """
-    #clean the link and make sure it works
-    if 'fbref' in row['match_report_link']:
-        url = row['match_report_link']
-    else:
-        url = 'https://fbref.com' + row['match_report_link']
-
     #creates table id
-    if category == 'keeper':
-        home_table_id = 'keeper_stats_{}'.format( row['home_team_id'])
-        away_table_id = 'keeper_stats_{}'.format( row['away_team_id'])
-    else:
-        home_table_id = 'stats_{}_{}'.format( row['home_team_id'], category.lower())
-        away_table_id = 'stats_{}_{}'.format( row['away_team_id'], category.lower())
-
-    #reads in data for the home team, cleans up column names and links, adds new values
-    home_df = pd.read_html(url, attrs={'id': home_table_id}, extract_links='body')[0]
-    home_df.columns = [i[0].lower().replace(' ', '_') + '_'+ i[1].lower().replace(' ', '_') if 'Unnamed' not in i[0] else i[1].lower().replace(' ', '_') for i in home_df.columns ]
-    home_df['player_link'] = home_df.apply(lambda row: row['player'][1], axis=1)
-    home_df['player'] = home_df.apply(lambda row: row['player'][0], axis=1)
-    cols = [i for i in home_df.columns if i not in ['player', 'player_link']]
-    if category != 'keeper':
-        home_df = home_df[pd.notnull(home_df['#'])]
-    for i in cols:
-        home_df[i] = home_df.apply(lambda row: row[i][0], axis=1)
+    home_table_id, away_table_id = match_report_table_ids(row, category)
+
+    #reads in data for both teams, cleans up column names and links, adds new values
+    plan = get_column_plan(config, 'match_report_{}'.format(category))
+    home_df = read_match_report_team_table(page_html, home_table_id, category, plan)
     home_df['match_id'] = row['id']
     home_df['squad'] = row['home_team']
     home_df['squad_id'] = row['home_team_id']
     home_df['opponent'] = row['away_team']
     home_df['opponent_id'] = row['away_team_id']
 
-    #reads in data for the away team, cleans up column names and links, adds new values
-    away_df = pd.read_html(url, attrs={'id': away_table_id}, extract_links='body')[0]
-    away_df.columns = [i[0].lower().replace(' ', '_') + '_'+ i[1].lower().replace(' ', '_') if 'Unnamed' not in i[0] else i[1].lower().replace(' ', '_') for i in away_df.columns ]
-    away_df['player_link'] = away_df.apply(lambda row: row['player'][1], axis=1)
-    away_df['player'] = away_df.apply(lambda row: row['player'][0], axis=1)
-    cols = [i for i in away_df.columns if i not in ['player', 'player_link']]
-    if category != 'keeper':
-        away_df = away_df[pd.notnull(away_df['#'])]
-    for i in cols:
-        away_df[i] = away_df.apply(lambda row: row[i][0], axis=1)
+    away_df = read_match_report_team_table(page_html, away_table_id, category, plan)
     away_df['match_id'] = row['id']
     away_df['squad'] = row['away_team']
     away_df['squad_id'] = row['away_team_id']
     away_df['opponent'] = row['home_team']
     away_df['opponent_id'] = row['home_team_id']
 
-    #creates directory to save the file in and also concats the two DFs and renames the columns
-    file_dir = 'data/{}/match_reports/{}'.format(info_dict['folder'], category)
-    if not os.path.exists(file_dir):
-        os.makedirs(file_dir)
-    file_name = '{}_{}.pkl'.format(row['id'], category.lower())
-    full_path = os.path.join(file_dir, file_name)
+    #concats the two DFs, the columns were already renamed by the plan
     final = pd.concat([home_df, away_df], ignore_index=True)
-    final = final.rename(columns=config['match_report_{}_rename_columns'.format(category)])
-    final['player_id'] = final.apply(lambda row: row['player_link'].split('/')[-2], axis=1)
-    final['id'] = final.apply(lambda row: generate_unique_id([row['player'], row['match_id']]), axis=1)
+    final['player_id'] = extract_link_part(final.player_link, -2)
+    final['id'] = generate_ids(final, 'player_match')
     final['gender'] = info_dict['gender']
-    final.to_pickle(full_path)
-
-    #condenses dataframe to only the table columns, checks for missing columns, and upserts it
-    schema = config['match_report_upsert_config']['schema']
-    table = config['match_report_upsert_config']['table'].format(category.lower().replace(' ', '_'))
-    table_cols = get_table_columns(schema, table)
-    missing_cols = [i for i in table_cols if i not in final.columns]
-    for col in missing_cols:
-        final[col] = None
+    return final
+
+def load_match_report_category(final, info_dict, category, config, fact_tables=False, write_buffer=None):
+    """
+        upserts a parsed match report category, and the fact tables if requested
+
+        Args:
+            final(DataFrame): match report from parse_match_report_category
+            info_dict(dict): league info
+            category(str): category of the match report
+            config(dict): values of the config file
+            fact_tables(bool): update the fact tables from this category too
+            write_buffer(UpsertBuffer): buffer to queue the upserts in, upserts immediately if None
+    """
+    #condenses dataframe to only the table columns, checks for missing columns, and upserts it. the rows
+    #are cast with the plan's dtypes like the store's copy of them
+    plan = get_column_plan(config, 'match_report_{}'.format(category))
+    schema, table = plan.table
     final = final.replace('', None)
-    insert_df = final[table_cols]
+    insert_df = align_to_table(apply_dtypes(final, plan.dtypes), schema, table)
     #updates fact tables if requested
     if fact_tables:
-        update_fact_tables(final, config, info_dict)
-    upsert_data_into_db(insert_df, schema, table)
+        update_fact_tables(final, config, info_dict, write_buffer=write_buffer)
+    write_to_db(insert_df, schema, table, write_buffer=write_buffer)
+
+def scrape_match_report_from_competition_schedule(row, info_dict, category, config, fact_tables=False, page_html=None, write_buffer=None):
+    """
+        scrapes a match report (both teams) from the competition schedule for a given category
+
+        Args:
+            row(pd.series): row of the schedule dataframe
+            category: which category of data you're pulling, consult fbref for the available ones for the competition
+            config(dict): values of the config file
+            page_html(str): html of the match report if it has already been downloaded, fetched if None
+            write_buffer(UpsertBuffer): buffer to queue the upserts in, upserts immediately if None
+
+        Returns:
+            final(DataFrame): full match report
 
-def scrape_match_report_all_categories(row, info_dict, config, advanced=True):
+    """
+    #download the page unless it was passed in
+    if page_html is None:
+        page_html = fetch_match_report_html(row)
+
+    final = parse_match_report_category(row, info_dict, category, config, page_html)
+    #saves the match to the league/season/category partition of the store
+    partition = {'folder': info_dict['folder'], 'season': row['season'], 'category': category.lower()}
+    write_partition(final, 'match_reports', partition, row['id'], get_column_plan(config, 'match_report_{}'.format(category)).dtypes)
+    load_match_report_category(final, info_dict, category, config, fact_tables=fact_tables, write_buffer=write_buffer)
+    return final
+
+@profile_run
+def scrape_match_report_all_categories(row, info_dict, config, advanced=True, page_html=None, write_buffer=None, only_categories=None,
+                                       on_status=None):
     """
     Scrapes a match report in all categories and uploads the data
 
@@ -513,9 +911,13 @@ def scrape_match_report_all_categories(row, info_dict, config, advanced=True):
         info_dict(dict): league info
         config: config file
         advanced(bool): signals whether advanced metrics are available for that match
+        page_html(str): html of the match report if it has already been downloaded, fetched if None
+        write_buffer(UpsertBuffer): buffer to queue the upserts in, upserts immediately if None
+        only_categories(list): categories to scrape (shot data is 'shots'), scrapes everything if None
+        on_status(function): called as on_status(match_id, category, status, error) after each category
 
     returns:
-        None
+        rows(int): rows scraped across every category that loaded
 
     """
     #pulls list of metrics based on whether or not the game is advanced
@@ -524,29 +926,120 @@ def scrape_match_report_all_categories(row, info_dict, config, advanced=True):
     else:
         categories = config['basic_match_report_categories']
 
-    #start with the summary and update the fact tables
-    try:
-        scrape_match_report_from_competition_schedule(row, info_dict, categories[0], config, fact_tables=True)
-    except Exception as e:
-        print(e, 'summary')
-    #use time.sleep to prevent hitting the rate limit
-    time.sleep(6)
-    #iterate through categories and scrape the match reports for those
-    for cat in categories[1:]:
+    #download the page once, every category table is read from the same html
+    if page_html is None:
         try:
-            scrape_match_report_from_competition_schedule(row, info_dict, cat, config)
+            page_html = fetch_match_report_html(row)
         except Exception as e:
-            print(e, cat)
-        time.sleep(6)
+            print(e, 'match report page')
+            return 0
+
+    def record(category, status, row_count=None, error=None):
+        record_load_state(row['id'], category, status, row_count=row_count, error=error, write_buffer=write_buffer)
+        record_stage('scrape', category=category, rows=row_count or 0, errors=int(status == 'failed'), error=error)
+        if on_status is not None:
+            on_status(row['id'], category, status, error)
+
+    rows = 0
+    #iterate through categories and scrape the match reports for those, the summary updates the fact tables.
+    #every category is recorded in the load state ledger along with its data
+    #everything recorded in the run report while a category is scraped is labelled with it
+    for cat in categories:
+        if only_categories is not None and cat not in only_categories:
+            continue
+        with reporting(category=cat):
+            try:
+                reason = unavailable_category_reason(row, cat, config, page_html)
+                if reason is not None:
+                    print(reason, cat)
+                    record(cat, SKIPPED_STATUS, error=reason)
+                    continue
+                final = scrape_match_report_from_competition_schedule(row, info_dict, cat, config, fact_tables=(cat == 'summary'), page_html=page_html, write_buffer=write_buffer)
+                record(cat, 'loaded', row_count=len(final))
+                rows += len(final)
+            except Exception as e:
+                print(e, cat)
+                record(cat, 'failed', error=str(e))
 
     #scrape shot data
+    if only_categories is not None and SHOT_DATA_CATEGORY not in only_categories:
+        return rows
+    with reporting(category=SHOT_DATA_CATEGORY):
+        try:
+            reason = unavailable_category_reason(row, SHOT_DATA_CATEGORY, config, page_html)
+            if reason is not None:
+                print(reason, 'shot data')
+                record(SHOT_DATA_CATEGORY, SKIPPED_STATUS, error=reason)
+                return rows
+            shots = scrape_shot_creation_match_data(row, info_dict, config, page_html=page_html, write_buffer=write_buffer)
+            record(SHOT_DATA_CATEGORY, 'loaded', row_count=len(shots))
+            rows += len(shots)
+        except Exception as e:
+            print(e, 'shot data')
+            record(SHOT_DATA_CATEGORY, 'failed', error=str(e))
+    return rows
+
+
+def record_load_state(match_id, category, status, row_count=None, error=None, write_buffer=None):
+    """
+    Records a match/category in the soccer.match_load_state ledger
+
+    When a write buffer is used the ledger row is committed in the same transaction as the data,
+    so a category is only ever marked loaded once its rows are in the database.
+
+    Args:
+        match_id(str): match id
+        category(str): match report category, or 'shots' for shot data
+        status(str): 'loaded', 'failed' or 'skipped' for categories that can never load
+        row_count(int): rows scraped for the category
+        error(str): error message if the category failed
+        write_buffer(UpsertBuffer): buffer to queue the upsert in, upserts immediately if None
+    """
+    df = pd.DataFrame([{
+        'id': '{}_{}'.format(match_id, category),
+        'match_id': match_id,
+        'category': category,
+        'status': status,
+        'row_count': row_count,
+        'error': error,
+        'updated_at': datetime.now(),
+    }])
+    #losing a ledger row only means the category gets scraped again next time
     try:
-        scrape_shot_creation_match_data(row, info_dict)
+        write_to_db(df, 'soccer', 'match_load_state', write_buffer=write_buffer)
     except Exception as e:
-        print(e, 'shot data')
+        print(e, 'load state')
+
+def get_missing_match_categories(match_ids, categories):
+    """
+    Works out which categories of which matches still need to be loaded
+
+    Args:
+        match_ids(list): ids of matches in soccer.schedules to check
+        categories(list): categories that should be loaded for every match
 
+    Returns:
+        missing(dict): match id -> list of categories without a 'loaded' or 'skipped' row in the ledger
+    """
+    query = """
+        SELECT s.id, c.category
+        FROM soccer.schedules s
+        CROSS JOIN unnest(%s::text[]) AS c(category)
+        LEFT JOIN soccer.match_load_state l
+            ON l.match_id = s.id AND l.category = c.category AND l.status IN ('loaded', 'skipped')
+        WHERE s.id = ANY(%s) AND l.id IS NULL;
+        """
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, (list(categories), list(match_ids)))
+        rows = cursor.fetchall()
+        cursor.close()
+    missing = defaultdict(list)
+    for match_id, category in rows:
+        missing[match_id].append(category)
+    return dict(missing)
 
-def update_fact_tables(df, config, info_dict):
+def update_fact_tables(df, config, info_dict, write_buffer=None):
     """
     Updates the fact tables in the Database based on a match report
 
@@ -554,6 +1047,7 @@ def update_fact_tables(df, config, info_dict):
         df(DataFrame): Match Report
         config(dict): config file, used here to signal what columns are meant for which tables
         info_dict(dict): league info
+        write_buffer(UpsertBuffer): buffer to queue the upserts in, upserts immediately if None
     """
     #get info from config fil;e
     upsert_info = config['fact_table_upsert_config']
@@ -566,49 +1060,61 @@ def update_fact_tables(df, config, info_dict):
         df_cols = upsert_info[i]['match_report_columns']
         deduped_df = temp.drop_duplicates(subset=df_cols)[df_cols]
         deduped_df.columns = get_table_columns(schema, table)
-        upsert_data_into_db(deduped_df, schema, table)
+        write_to_db(deduped_df, schema, table, write_buffer=write_buffer)
+
+
+
+@timed_stage('clean')
+def parse_shot_creation_match_data(row, config, page_html):
+    """
+    reads and cleans the shot data of a match report page, nothing is written so it can run in a
+    worker process
+
+    Args:
+        row(pd.Series): DataFrame row from a schedule df
+        config(dict): config file
+        page_html(str): html of the match report
 
+    Returns:
+        df(DataFrame): DataFrame with shot data
+    """
+    df = apply_column_plan(read_table_from_html(page_html, 'shots_all'), get_column_plan(config, 'shot_data'))
+    df['match_id'] = row['id']
+    df = df[df.squad != '']
+    return clean_shot_creation_df(df, config)
+
+def load_shot_creating_actions(sca, write_buffer=None):
+    """
+    upserts shot creating actions to soccer.shot_creating_actions
 
+    Args:
+        sca(DataFrame): output of extract_shot_creation_data_from_df
+        write_buffer(UpsertBuffer): buffer to queue the upserts in, upserts immediately if None
+    """
+    sca = align_to_table(sca, 'soccer', 'shot_creating_actions')
+    write_to_db(sca, 'soccer', 'shot_creating_actions', primary_key_column='sca_id', write_buffer=write_buffer)
 
-def scrape_shot_creation_match_data(row, info):
+def scrape_shot_creation_match_data(row, info, config, page_html=None, write_buffer=None):
     """
-    Scrapes the shot data for a given match
+    Scrapes the shot data for a given match, the shot creating actions are upserted to soccer.shot_creating_actions
 
     Args:
         row(pd.Series): DataFrame row from a schedule df
         info(dict): league info
+        config(dict): config file
+        page_html(str): html of the match report if it has already been downloaded, fetched if None
+        write_buffer(UpsertBuffer): buffer to queue the upserts in, upserts immediately if None
 
     Returns:
         df(DataFrame): DataFrame with shot data
 
     """
-    if 'fbref' in row['match_report_link']:
-        url = row['match_report_link']
-    else:
-        url = 'https://fbref.com' + row['match_report_link']
-    match_id = row['id']
-    attrs = {'id': 'shots_all'}
-    df = pd.read_html(url, attrs=attrs, extract_links='body')[0]
-    df.columns = [i[1].lower() if 'Unnamed' in i[0] else i[0].lower().replace(' ', '_') + '_'+  i[1].lower() for i in df.columns]
-    link_cols = ['player', 'squad', 'sca_1_player', 'sca_2_player']
-    non_link_cols = [i for i in df.columns if i not in link_cols]
-
-    for col in link_cols:
-        new_column = col + '_link'
-        df[new_column] = df.apply(lambda row: row[col][1], axis=1)
-        df[col] = df.apply(lambda row: row[col][0], axis=1)
-
-    for col in non_link_cols:
-        df[col] = df.apply(lambda row: row[col][0], axis=1)
-    df['match_id'] = match_id
-    dir_path = 'data/{}/shot_creation'.format(info['folder'])
-    if not os.path.exists(dir_path):
-        os.makedirs(dir_path)
-    file_name = '{}_shot_creation.pkl'.format(match_id)
-    full_path = os.path.join(dir_path, file_name)
-    df = df[df.squad != '']
-    df = clean_shot_creation_df(df, config)
-    df.to_pickle(full_path)
+    if page_html is None:
+        page_html = fetch_match_report_html(row)
+    df = parse_shot_creation_match_data(row, config, page_html)
+    partition = {'folder': info['folder'], 'season': row['season']}
+    write_partition(df, 'shot_creation', partition, row['id'], get_column_plan(config, 'shot_data').dtypes)
+    load_shot_creating_actions(extract_shot_creation_data_from_df(df), write_buffer=write_buffer)
     return df
 
 def clean_shot_creation_df(df, config):
@@ -624,9 +1130,10 @@ def clean_shot_creation_df(df, config):
     """
     df = df[df.minute != '']
 
-    df['stoppage_minute'] = df.apply(lambda row: row['minute'].split('+')[1] if len(row['minute'].split('+')) > 1 else None, axis=1)
+    minute = df.minute.str.split('+')
+    df['stoppage_minute'] = minute.str[1].where(minute.str.len() > 1, None)
 
-    df['minute'] = df.apply(lambda row: row['minute'].split('+')[0], axis=1)
+    df['minute'] = minute.str[0]
     df['psxg'] = df.psxg.replace('', np.nan)
 
     df['on_target'] = df.psxg.isnull()
@@ -639,73 +1146,40 @@ def clean_shot_creation_df(df, config):
     id_cols = ['shot_player_link', 'squad_link', 'sca_1_player_link', 'sca_2_player_link']
     for col in id_cols:
         new_col = col.replace('_link', '_id')
-        df[new_col] = df.apply(lambda row: row[col].split('/')[-2] if row[col] is not None else None, axis=1)
+        df[new_col] = extract_link_part(df[col], -2)
     df = df.reset_index()
     id_cols = ['shot_player', 'sca_1_player', 'sca_2_player']
     for i in id_cols:
-        df = df.rename(columns={i: 'player'})
         new_col = i.replace('player', 'player_match_id')
-        df[new_col] = df.apply(lambda row: generate_unique_id([row['player'], row['match_id']]), axis=1)
-        df = df.rename(columns={'player': i})
-    df['shot_id'] = df.apply(lambda row: generate_unique_id([row['index'], row['shot_player_id'], row['match_id']]), axis=1)
-#     df['shot_player_match_id'] = df.apply(lambda row: generate_id(row, ['shot_player', 'match_id']), axis=1)
-#     df['sca_1_player_match_id'] = df.apply(lambda row: generate_id(row, ['sca_1_player', 'match_id']), axis=1)
-#     df['sca_2_player_match_id'] = df.apply(lambda row: generate_id(row, ['sca_2_player', 'match_id']), axis=1)
-    df['sca_1_player_match_id'] = df.apply(lambda row: row['sca_1_player_match_id'] if ['sca_1_player_id'] is not None else None, axis=1)
-    df['sca_2_player_match_id'] = df.apply(lambda row: row['sca_2_player_match_id'] if ['sca_2_player_id'] is not None else None, axis=1)
+        df[new_col] = generate_ids(df, 'player_match', [i, 'match_id'])
+    df['shot_id'] = generate_ids(df, 'shot')
+    df['sca_1_player_match_id'] = df.sca_1_player_match_id.where(df.sca_1_player_id.notnull(), None)
+    df['sca_2_player_match_id'] = df.sca_2_player_match_id.where(df.sca_2_player_id.notnull(), None)
     return df
 
 def extract_shot_creation_data_from_df(df):
     """
     Makes a seperate DataFrame of shot creating actions from shot data
 
+    The sca_1_* and sca_2_* columns are stacked into one long frame, one row per action, and
+    shots without a second (or any) action drop out with the null filter.
+
     Args:
         df(DataFrame): cleaned shot creation DataFrame
 
     Returns:
         sca(DataFrame): dataframe of shot creating actions
     """
-    rows = list()
-    for i in df.iterrows():
-        row = i[1]
-        if row['sca_1_player_id'] is None and row['sca_2_player_id'] is None:
-            continue
-        elif row['sca_1_player_id'] is not None and row['sca_2_player_id'] is None:
-            sca_id = generate_id(row, ['sca_1_player_match_id', 'sca_1_event', 'index'])
-            shot_id = row['shot_id']
-            pid = row['sca_1_player_match_id']
-            event = row['sca_1_event']
-            squad = row['squad_id']
-            order = 1
-            minute = row['minute']
-            stoppage = row['stoppage_minute']
-            shooter = row['shot_player_match_id']
-            outcome = row['outcome']
-            temp_row = [sca_id, shot_id, pid, event, squad, order, minute, stoppage, shooter, outcome]
-            rows.append(temp_row)
-        elif row['sca_1_player_id'] is not None and row['sca_2_player_id'] is not None:
-            sca_id = generate_id(row, ['sca_1_player_match_id', 'sca_1_event', 'index'])
-            shot_id = row['shot_id']
-            pid = row['sca_1_player_match_id']
-            event = row['sca_1_event']
-            squad = row['squad_id']
-            order = 1
-            minute = row['minute']
-            stoppage = row['stoppage_minute']
-            shooter = row['shot_player_match_id']
-            outcome = row['outcome']
-            temp_row = [sca_id, shot_id, pid, event, squad, order, minute, stoppage, shooter, outcome]
-            rows.append(temp_row)
-            pid = row['sca_2_player_match_id']
-            event = row['sca_2_event']
-            order = 2
-            sca_id = generate_id(row, ['sca_2_player_match_id', 'sca_2_event', 'index'])
-            temp_row = [sca_id, shot_id, pid, event, squad, order, minute, stoppage, shooter, outcome]
-            rows.append(temp_row)
-
-    sca = pd.DataFrame(rows, columns=['sca_id', 'shot_id', 'player_match_id', 'sca_event', 'squad_id', 'event_order', 'minute', 'stoppage_minute', 'shooter', 'outcome'])
-
-    sca['sca_event'] = sca['sca_event'].str.replace(r'\(|\)', '')
+    shot_cols = ['shot_id', 'squad_id', 'minute', 'stoppage_minute', 'shot_player_match_id', 'outcome', 'index']
+    actions = {i: df[shot_cols + ['sca_{}_player_match_id'.format(i), 'sca_{}_event'.format(i)]]
+                   .rename(columns={'sca_{}_player_match_id'.format(i): 'player_match_id', 'sca_{}_event'.format(i): 'sca_event'})
+               for i in (1, 2)}
+    sca = pd.concat(actions, names=['event_order', None]).reset_index(level='event_order')
+    sca = sca[sca.player_match_id.notnull()].reset_index(drop=True)
+
+    sca['sca_id'] = generate_ids(sca, 'shot_creating_action')
+    sca = sca.rename(columns={'shot_player_match_id': 'shooter'})
+    sca['sca_event'] = sca['sca_event'].str.replace(r'\(|\)', '', regex=True)
 
     dummies = pd.get_dummies(sca['sca_event']).astype(bool)
 
@@ -714,25 +1188,60 @@ def extract_shot_creation_data_from_df(df):
     sca = pd.concat([sca, dummies], axis=1)
     return sca
 
-def scrape_multiple_match_reports_from_schedule(df, info_dict, config, advanced=True):
+def scrape_multiple_match_reports_from_schedule(df, info_dict, config, advanced=True, buffer_writes=False, categories_by_match=None,
+                                                write_buffer=None, stats=None):
     """
     Scrapes mutliple match reports from a schedule DataFrame
 
+    The run is a stream of fetch -> scrape (parse, clean, ids) -> write. Pages are fetched ahead on
+    background threads under the shared rate limiter, only a few pages wait ahead of the scraper and
+    a write buffer flushes every flush_threshold_rows, so memory stays flat however many matches
+    there are. Each stage's counters are printed at the end.
+
     df(DataFrame): DataFrame of schedule info
     info_dict(dict): league info
     config(dict): config file
+    buffer_writes(bool): collect every upsert for the run and write each table once at the end
+                         (or whenever write_buffer_config.flush_threshold_rows is reached)
+    categories_by_match(dict): match id -> categories to scrape, from get_missing_match_categories.
+                               every category of every match is scraped if None
+    write_buffer(UpsertBuffer): buffer to write through instead of creating one, implies buffer_writes
+    stats(StageStats): counters to record the stages into, a new one is used if None
 
     Returns:
-        None
+        report(DataFrame): rows upserted per table when buffering, otherwise None
 
     """
+    stats = stats or StageStats()
+    if buffer_writes and write_buffer is None:
+        write_buffer = UpsertBuffer(config.get('write_buffer_config', {}).get('flush_threshold_rows'))
+    if write_buffer is not None and write_buffer.stats is None:
+        write_buffer.stats = stats
     print('scraping {} rows'.format(len(df)))
-    for i in df.iterrows():
-        row = i[1]
-        print(i[0], row['match_report_link'])
-        scrape_match_report_all_categories(row, info_dict, config)
-
+    rows = (i[1] for i in df.iterrows())
+    urls = (build_fbref_url(row['match_report_link']) for _, row in df.iterrows())
+    pages = counted_stage('fetch', zip(rows, prefetch_pages(urls, 'match_report')), stats, rows=lambda item: 0)
+
+    def scrape(item):
+        row, (url, page_html, error) = item
+        if error is not None:
+            print(error, url)
+            stats.record('fetch', items=0, errors=1)
+            return 0
+        only_categories = None if categories_by_match is None else categories_by_match.get(row['id'], [])
+        return scrape_match_report_all_categories(row, info_dict, config, advanced, page_html=page_html, write_buffer=write_buffer, only_categories=only_categories)
+
+    for _ in map_stage('scrape', scrape, pages, stats, rows=lambda scraped_rows: scraped_rows):
+        pass
+
+    report = None
+    if write_buffer is not None:
+        write_buffer.flush()
+        report = write_buffer.report()
+        print(report.to_string(index=False))
+    print(stats.report().to_string(index=False))
     print('done!')
+    return report
 
 
 def classify_xg_difference(xg_for, xg_against):
@@ -759,6 +1268,22 @@ def classify_xg_difference(xg_for, xg_against):
     except:
         return None
 
+def classify_xg_differences(xg_for, xg_against):
+    """
+    vectorized version of classify_xg_difference for whole columns
+
+    Args:
+        xg_for(pd.Series): the team's xg for each match
+        xg_against(pd.Series): the opponent's xg for each match
+
+    returns:
+        diff(pd.Series): For, Against or Neutral for each match, None where the xg can't be read
+    """
+    diff = pd.to_numeric(xg_for, errors='coerce') - pd.to_numeric(xg_against, errors='coerce')
+    labels = np.select([diff <= -.5, diff >= .5, diff.notnull()], ['Against', 'For', 'Neutral'], default=None)
+    return pd.Series(labels, index=xg_for.index, dtype=object)
+
+@timed_stage('clean', category='team_results')
 def scrape_team_season_results(row, config, info):
     """
     scrape a schedule from a team page on fbref.com
@@ -777,53 +1302,57 @@ def scrape_team_season_results(row, config, info):
     squad = row['squad']
 
     url = 'https://fbref.com/en/squads/{}/{}/matchlogs/all_comps/schedule/{}-Scores-and-Fixtures-All-Competitions'.format(squad_id, season, tag)
-    df = pd.read_html(url, extract_links='body')[0]
-
-    df.columns = [i.lower().replace(' ', '_') for i in df.columns]
-    link_cols = ['comp', 'opponent', 'match_report', 'captain']
-    keep_cols = [i for i in df.columns if i not in link_cols]
-
-    for i in link_cols:
-        new_col = i + '_link'
-        df[new_col] = df.apply(lambda row: row[i][1], axis=1)
-        df[i] = df.apply(lambda row: row[i][0], axis=1)
-
-    for j in keep_cols:
-        df[j] = df.apply(lambda row: row[j][0], axis=1)
+    plan = get_column_plan(config, 'team_results')
+    df = apply_column_plan(read_table_from_html(fetch_page_html(url, 'team_results')), plan)
 
     df = df[df.match_report == 'Match Report']
-    df['competition_id'] = df.apply(lambda row: row['comp_link'].split('/')[3], axis=1)
-    df['opponent_id'] = df.apply(lambda row: row['opponent_link'].split('/')[3], axis=1)
-    df['match_id'] = df.apply(lambda row: row['match_report_link'].split('/')[3], axis=1)
-    df['captain_id'] = df.apply(lambda row: row['captain_link'].split('/')[3] if row['captain_link'] is not None else None, axis=1)
+    df['competition_id'] = extract_link_part(df.comp_link, 3)
+    df['opponent_id'] = extract_link_part(df.opponent_link, 3)
+    df['match_id'] = extract_link_part(df.match_report_link, 3)
+    df['captain_id'] = extract_link_part(df.captain_link, 3)
     df.insert(0, 'squad_id', squad_id)
     df.insert(0, 'squad', squad)
-    df['id'] = df.apply(lambda row: generate_unique_id([row['date'], row['squad_id'], row['match_id']]), axis=1)
-    df = df.rename(columns=config['team_schedule_rename_columns'])
-    df['goals_for'] = df.apply(lambda row: row['goals_for'].split('(')[0].strip(), axis=1)
-    df['goals_against'] = df.apply(lambda row: row['goals_against'].split('(')[0].strip(), axis=1)
+    df['id'] = generate_ids(df, 'team_result', [plan.renamed('date'), 'squad_id', 'match_id'])
+    df['goals_for'] = df.goals_for.str.split('(').str[0].str.strip()
+    df['goals_against'] = df.goals_against.str.split('(').str[0].str.strip()
     df['attendance'] = df.attendance.str.replace(',', '')
     df = df.replace('', None)
-    dir_path = 'data/{}/team_results'.format(info['folder'])
-    if not os.path.exists(dir_path):
-        os.makedirs(dir_path)
-    file_name = '{}_{}_results.pkl'.format(squad_id, season)
-    full_path = os.path.join(dir_path, file_name)
     df['clean_sheet_for'] = df.goals_against.astype(int) == 0
     df['clean_sheet_against'] = df.goals_for.astype(int) == 0
     df['higher_xg'] = df.xg_for > df.xg_against
-    df['run_of_play'] = df.apply(lambda row: classify_xg_difference(row['xg_for'], row['xg_against']), axis=1)
-    df.to_pickle(full_path)
-    cols = get_table_columns('soccer', 'team_results')
-    missing_cols = [i for i in cols if i not in df.columns]
-    idf = df[cols]
-    upsert_data_into_db(idf, 'soccer', 'team_results')
+    df['run_of_play'] = classify_xg_differences(df.xg_for, df.xg_against)
+    write_partition(df, 'team_results', {'folder': info['folder'], 'season': season}, squad_id)
+    idf = align_to_table(df, *plan.table)
+    upsert_data_into_db(idf, *plan.table)
     return df
 
-def update_current_league_data(info_dict, config, start_date=None, end_date=None):
+def configure_run(config):
+    """
+    applies the page cache, fetch, id and run report settings and compiles the column plans from the config file,
+    call once per process before scraping
+
+    Args:
+        config(dict): config file
+    """
+    #pages are cached on disk, ttls and offline mode come from the config file
+    configure_page_cache(config.get('page_cache_config', {}))
+    configure_fetching(config.get('fetch_config', {}))
+    configure_ids(config.get('id_config', {}))
+    configure_column_plans(config)
+    configure_run_reports(config.get('run_report_config', {}))
+
+@profile_run
+def update_current_league_data(info_dict, config, start_date=None, end_date=None, skip_loaded=True, configure=True,
+                               write_buffer=None, run_staging_updates=False, run_report=None, season=None):
     """
     Runs a full update of a league for a given time range, defaults to the last 7 days
 
+    Matches whose categories are all marked loaded (or skipped, when they can never load) in
+    soccer.match_load_state are left out, so widening the window only costs requests for what is
+    actually missing. The time, bytes, rows, retries and
+    failures of every stage are recorded in a run report, written as json lines as the run goes and
+    summarized at the end. With FBREF_PROFILE=1 the run is also profiled (see profiling.py).
+
     Args:
         info_dict(dict): league info
         config(dict): config file
@@ -831,47 +1360,154 @@ def update_current_league_data(info_dict, config, start_date=None, end_date=None
                     7 days ago
         end_date: beginning of date range queried/updated, will default to None and then reassigned to
                   today
+        skip_loaded(bool): only scrape match/category pairs that are missing from the load state ledger
+        configure(bool): apply the cache and fetch settings first, turned off when several leagues share
+                         one rate limiter
+        write_buffer(UpsertBuffer): buffer the upserts go through, a new one is created if None
+        run_staging_updates(bool): refresh the staging tables for the matches this update wrote
+        run_report(RunReport): report to record into, a new one is written and closed here if None
+        season(str): season to update, i.e. a tournament that has finished, the current one if None
 
     Returns:
-        None
+        report(DataFrame): rows upserted per table
     """
+    if configure:
+        configure_run(config)
+
     if not start_date:
         start_date = date.today() - timedelta(7)
 
     if not end_date:
         end_date = date.today()
-    year = date.today().year
+    current_season = season is None
+    year = date.today().year if current_season else season
 
-    standings = scrape_standings(info_dict, year)
-    league_schedule = scrape_schedule_from_competition(info_dict, year, config)
+    own_report = run_report is None
+    if own_report:
+        run_report = RunReport('update_{}'.format(info_dict['folder']))
+    try:
+        with reporting(run_report, league=info_dict['name']):
+            standings = scrape_standings(info_dict, year, config, current_season)
+            league_schedule = scrape_schedule_from_competition(info_dict, year, config, current_season)
+
+            league_schedule['match_date'] = pd.to_datetime(league_schedule.match_date).dt.date
+            mask = (league_schedule.match_date >= start_date) & (league_schedule.match_date <= end_date)
+
+            scrape_matches = league_schedule[mask].reset_index(drop=True)
+
+            #only fetch the matches that still have categories to load
+            missing = None
+            if skip_loaded:
+                categories = config['advanced_match_report_categories'] + [SHOT_DATA_CATEGORY]
+                missing = get_missing_match_categories(scrape_matches['id'].tolist(), categories)
+                scrape_matches = scrape_matches[scrape_matches['id'].isin(missing.keys())].reset_index(drop=True)
+
+            if write_buffer is None:
+                write_buffer = UpsertBuffer(config.get('write_buffer_config', {}).get('flush_threshold_rows'))
+            report = scrape_multiple_match_reports_from_schedule(scrape_matches, info_dict, config, categories_by_match=missing,
+                                                                 write_buffer=write_buffer)
+            if run_staging_updates and write_buffer.changed_match_ids:
+                with stage_timer('staging', category='full_staging_updates'):
+                    run_update_function(sorted(write_buffer.changed_match_ids))
+    finally:
+        #the summary is printed even when the league fails part way through
+        print(run_report.summary(info_dict['name']).to_string(index=False))
+        if own_report:
+            run_report.close()
+            if run_report.path is not None:
+                print('run report written to {}'.format(run_report.path))
+    return report
+
+def load_leagues(leagues_path='leagues.yaml', league_keys=None):
+    """
+    loads league info from the leagues file
 
-    league_schedule['match_date'] = pd.to_datetime(league_schedule.match_date).dt.date
-    mask = (league_schedule.match_date >= start_date) & (league_schedule.match_date <= end_date)
+    Args:
+        leagues_path(str): path to the leagues file
+        league_keys(list): keys of the leagues to keep (i.e. ['NWSL', 'WSL']), keeps all of them if None
 
-    scrape_matches = league_schedule[mask].reset_index(drop=True)
+    Returns:
+        leagues(dict): league key -> league info
+    """
+    with open(leagues_path) as f:
+        leagues = yaml.safe_load(f)
+    if league_keys:
+        leagues = {i: leagues[i] for i in league_keys}
+    return leagues
+
+@profile_run
+def update_all_leagues(config, leagues_path='leagues.yaml', league_keys=None, start_date=None, end_date=None, workers=4, run_staging_updates=True):
+    """
+    Updates every league in the leagues file in one pass and then refreshes the staging tables once
 
-    scrape_multiple_match_reports_from_schedule(scrape_matches, info_dict, config)
+    Each league's standings, schedule and missing match reports are one unit of work. The units run
+    on a worker pool and every worker waits on the same rate limiter, so the whole run spends a single
+    fetch budget no matter how many leagues are in it. Every league records into one run
+    report, its totals per league are printed at the end.
 
+    Args:
+        config(dict): config file
+        leagues_path(str): path to the leagues file
+        league_keys(list): keys of the leagues to update, updates all of them if None
+        start_date: beginning of date range updated, defaults to 7 days ago
+        end_date: end of date range updated, defaults to today
+        workers(int): number of leagues updated at the same time
+        run_staging_updates(bool): run soccer.full_staging_updates once every league is done, only the
+                                   matches written during this run are refreshed
 
-def run_update_function():
+    Returns:
+        results(dict): league key -> rows upserted per table, or the exception if the league failed
+    """
+    configure_run(config)
+    leagues = load_leagues(leagues_path, league_keys)
+    print('updating {} leagues'.format(len(leagues)))
+    results = dict()
+    flush_threshold = config.get('write_buffer_config', {}).get('flush_threshold_rows')
+    write_buffers = {key: UpsertBuffer(flush_threshold) for key in leagues}
+    #every league records into the same run report
+    run_report = RunReport('update_all_leagues')
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(update_current_league_data, info_dict, config, start_date, end_date, configure=False,
+                                   write_buffer=write_buffers[key], run_report=run_report): key
+                   for key, info_dict in leagues.items()}
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                results[key] = future.result()
+            except Exception as e:
+                print(e, key)
+                results[key] = e
+
+    #matches from a league that failed part way through were still written, so they are refreshed too
+    changed_match_ids = set().union(*[i.changed_match_ids for i in write_buffers.values()])
+    if run_staging_updates and changed_match_ids:
+        with reporting(run_report), stage_timer('staging', category='full_staging_updates'):
+            run_update_function(sorted(changed_match_ids))
+
+    summary = run_report.close()
+    counters = ['rows', 'rows_upserted', 'bytes', 'retries', 'errors', 'coerced', 'seconds']
+    print(summary.groupby('league', dropna=False, sort=False)[counters].sum().reset_index().to_string(index=False))
+    if run_report.path is not None:
+        print('run report written to {}'.format(run_report.path))
+    return results
+
+
+def run_update_function(changed_match_ids=None):
     """
-    runs a function in my database that updates staging tables that views depend on
+    runs a function in my database that updates staging tables that views depend on, including
+    soccer.st_match_stats which the leaderboard and player lookups read instead of the match_stats view
     (this should be abstracted at some point)
 
     Args:
-        None
+        changed_match_ids(list): ids of the matches to refresh, everything is rebuilt if None
 
     Returns:
         None
     """
-    conn = db_connect()
-
-    cursor = conn.cursor()
-
     function_name = "soccer.full_staging_updates"
 
-    cursor.callproc(function_name)
-
-    conn.commit()
-
-    conn.close()
+    with pooled_connection() as conn:
+        cursor = conn.cursor()
+        cursor.callproc(function_name, [changed_match_ids])
+        conn.commit()
+        cursor.close()
@@ -0,0 +1,192 @@
+import pandas as pd
+import queue
+import threading
+import time
+from collections import defaultdict
+
+
+#default size of the batches frames are grouped into before a write
+STREAM_SETTINGS = {
+    'batch_rows': 50000,
+    'queue_size': 4,
+}
+
+
+class StageStats:
+    """
+    thread safe counters for each stage of a streaming pipeline
+
+    every stage records how many items went through it, how many rows they held and how long the
+    stage spent on them, so a slow stage shows up in the report as the one with the lowest throughput
+    """
+
+    def __init__(self):
+        self.items = defaultdict(int)
+        self.rows = defaultdict(int)
+        self.seconds = defaultdict(float)
+        self.errors = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def record(self, stage, items=1, rows=0, seconds=0.0, errors=0):
+        """
+        adds to a stage's counters
+
+        Args:
+            stage(str): name of the stage
+            items(int): items that went through the stage
+            rows(int): rows those items held
+            seconds(float): time the stage spent on them
+            errors(int): items that failed in the stage
+        """
+        with self.lock:
+            self.items[stage] += items
+            self.rows[stage] += rows
+            self.seconds[stage] += seconds
+            self.errors[stage] += errors
+
+    def report(self):
+        """
+        returns the counters of every stage in the order the stages were first seen
+
+        Returns:
+            report(DataFrame): stage, items, rows, errors, seconds and rows_per_second
+        """
+        with self.lock:
+            df = pd.DataFrame({
+                'stage': list(self.items),
+                'items': [self.items[i] for i in self.items],
+                'rows': [self.rows[i] for i in self.items],
+                'errors': [self.errors[i] for i in self.items],
+                'seconds': [round(self.seconds[i], 3) for i in self.items],
+            })
+        df['rows_per_second'] = (df.rows / df.seconds.where(df.seconds > 0)).round(1)
+        return df
+
+def frame_rows(item):
+    """
+    counts the rows in a stage's output, frames count their length and anything else counts as 0
+
+    Args:
+        item: output of a stage
+
+    Returns:
+        rows(int): number of rows
+    """
+    return len(item) if isinstance(item, pd.DataFrame) else 0
+
+def counted_stage(stage, items, stats, rows=frame_rows):
+    """
+    passes items through unchanged, timing how long each one took to arrive. used around a source
+    such as prefetch_pages, where the time is spent waiting on whatever produces the items
+
+    Args:
+        stage(str): name of the stage
+        items(iterable): items coming from the source
+        stats(StageStats): counters to record into
+        rows(function): counts the rows in an item
+
+    Yields:
+        item: each item from the source
+    """
+    items = iter(items)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(items)
+        except StopIteration:
+            return
+        stats.record(stage, rows=rows(item), seconds=time.perf_counter() - start)
+        yield item
+
+def map_stage(stage, func, items, stats, rows=frame_rows):
+    """
+    applies a function to each item, only the time spent in the function counts towards the stage
+
+    Args:
+        stage(str): name of the stage
+        func(function): work done on each item
+        items(iterable): items from the previous stage
+        stats(StageStats): counters to record into
+        rows(function): counts the rows in the function's output
+
+    Yields:
+        output: the function's output for each item
+    """
+    for item in items:
+        start = time.perf_counter()
+        output = func(item)
+        stats.record(stage, rows=rows(output), seconds=time.perf_counter() - start)
+        yield output
+
+def queue_stage(items, maxsize=None):
+    """
+    produces items on a background thread into a bounded queue. the producer blocks once the queue
+    is full, so a slow consumer holds back the producer instead of letting items pile up in memory
+
+    Args:
+        items(iterable): items to produce
+        maxsize(int): most items waiting in the queue, defaults to the queue_size setting
+
+    Yields:
+        item: each item in order, an exception raised by the producer is raised here
+    """
+    maxsize = maxsize or STREAM_SETTINGS['queue_size']
+    buffer = queue.Queue(maxsize=maxsize)
+    done = object()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in items:
+                #wait for room in the queue, giving up if the consumer has gone away
+                while not stop.is_set():
+                    try:
+                        buffer.put((item, None), timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+            buffer.put((done, None))
+        except Exception as e:
+            buffer.put((done, e))
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = buffer.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
+def frame_batches(frames, max_rows=None):
+    """
+    groups consecutive frames into batches of about max_rows rows so each write is large enough to be
+    efficient while only one batch is ever held in memory
+
+    Args:
+        frames(iterable): DataFrames to group
+        max_rows(int): rows at which a batch is yielded, defaults to the batch_rows setting
+
+    Yields:
+        batch(DataFrame): the frames of a batch concatenated together
+    """
+    max_rows = max_rows or STREAM_SETTINGS['batch_rows']
+    batch = list()
+    batch_rows = 0
+    for df in frames:
+        if df.empty:
+            continue
+        batch.append(df)
+        batch_rows += len(df)
+        if batch_rows >= max_rows:
+            yield pd.concat(batch, ignore_index=True)
+            batch = list()
+            batch_rows = 0
+    if batch:
+        yield pd.concat(batch, ignore_index=True)
@@ -19,16 +19,39 @@ CREATE TABLE soccer.competitions (
 -- DROP TABLE soccer.match_report_ids;
 
 CREATE TABLE soccer.match_report_ids (
-	id varchar(50) NOT NULL,
-	player_id varchar(30) NULL,
-	squad_id varchar(30) NULL,
-	match_id varchar(20) NULL,
-	opponent_id varchar(20) NULL,
+	id text NOT NULL,
+	player_id text NULL,
+	squad_id text NULL,
+	match_id text NULL,
+	opponent_id text NULL,
 	shirtnumber int4 NULL,
 	age varchar(10) NULL,
 	"position" varchar(20) NULL,
 	CONSTRAINT match_report_ids_pkey PRIMARY KEY (id)
 );
+CREATE INDEX match_report_ids_player_id_idx ON soccer.match_report_ids USING btree (player_id);
+CREATE INDEX match_report_ids_squad_id_idx ON soccer.match_report_ids USING btree (squad_id);
+CREATE INDEX match_report_ids_opponent_id_idx ON soccer.match_report_ids USING btree (opponent_id);
+CREATE INDEX match_report_ids_match_id_idx ON soccer.match_report_ids USING btree (match_id);
+
+
+-- soccer.match_load_state definition
+
+-- Drop table
+
+-- DROP TABLE soccer.match_load_state;
+
+CREATE TABLE soccer.match_load_state (
+	id text NOT NULL,
+	match_id text NOT NULL,
+	category varchar(30) NOT NULL,
+	status varchar(10) NOT NULL,
+	row_count int4 NULL,
+	error text NULL,
+	updated_at timestamp NOT NULL,
+	CONSTRAINT match_load_state_pkey PRIMARY KEY (id)
+);
+CREATE INDEX match_load_state_match_id_idx ON soccer.match_load_state USING btree (match_id);
 
 
 -- soccer.match_shot_creation_data definition
@@ -38,12 +61,12 @@ CREATE TABLE soccer.match_report_ids (
 -- DROP TABLE soccer.match_shot_creation_data;
 
 CREATE TABLE soccer.match_shot_creation_data (
-	shot_id varchar(50) NOT NULL,
-	match_id varchar(20) NULL,
-	shot_player_match_id varchar(50) NULL,
-	sca_1_player_match_id varchar(50) NULL,
-	sca_2_player_match_id varchar(50) NULL,
-	squad_id varchar(20) NULL,
+	shot_id text NOT NULL,
+	match_id text NULL,
+	shot_player_match_id text NULL,
+	sca_1_player_match_id text NULL,
+	sca_2_player_match_id text NULL,
+	squad_id text NULL,
 	"minute" int4 NULL,
 	stoppage_minute int4 NULL,
 	xg float8 NULL,
@@ -80,7 +103,7 @@ CREATE TABLE soccer.per_90_stats (
 -- DROP TABLE soccer.player_match_defense_stats;
 
 CREATE TABLE soccer.player_match_defense_stats (
-	id varchar(100) NOT NULL,
+	id text NOT NULL,
 	tackles_att int4 NULL,
 	tackles_won int4 NULL,
 	tackles_def_third int4 NULL,
@@ -106,7 +129,7 @@ CREATE TABLE soccer.player_match_defense_stats (
 -- DROP TABLE soccer.player_match_misc_stats;
 
 CREATE TABLE soccer.player_match_misc_stats (
-	id varchar(100) NOT NULL,
+	id text NOT NULL,
 	yellow_cards int4 NULL,
 	red_cards int4 NULL,
 	second_yellow_cards int4 NULL,
@@ -133,7 +156,7 @@ CREATE TABLE soccer.player_match_misc_stats (
 -- DROP TABLE soccer.player_match_passing_stats;
 
 CREATE TABLE soccer.player_match_passing_stats (
-	id varchar(100) NOT NULL,
+	id text NOT NULL,
 	passes_completed int4 NULL,
 	passes_attempted int4 NULL,
 	total_pass_distance int4 NULL,
@@ -162,7 +185,7 @@ CREATE TABLE soccer.player_match_passing_stats (
 -- DROP TABLE soccer.player_match_passing_types_stats;
 
 CREATE TABLE soccer.player_match_passing_types_stats (
-	id varchar(100) NOT NULL,
+	id text NOT NULL,
 	passes_attempted int4 NULL,
 	passes_completed int4 NULL,
 	passes_live int4 NULL,
@@ -188,7 +211,7 @@ CREATE TABLE soccer.player_match_passing_types_stats (
 -- DROP TABLE soccer.player_match_possession_stats;
 
 CREATE TABLE soccer.player_match_possession_stats (
-	id varchar(100) NOT NULL,
+	id text NOT NULL,
 	touches int4 NULL,
 	touches_def_penalty_area int4 NULL,
 	touches_def_third int4 NULL,
@@ -215,7 +238,7 @@ CREATE TABLE soccer.player_match_possession_stats (
 -- DROP TABLE soccer.player_match_summary_stats;
 
 CREATE TABLE soccer.player_match_summary_stats (
-	id varchar(100) NOT NULL,
+	id text NOT NULL,
 	minutes int4 NULL,
 	goals int4 NULL,
 	assists int4 NULL,
@@ -265,10 +288,10 @@ CREATE TABLE soccer.players (
 -- DROP TABLE soccer.schedules;
 
 CREATE TABLE soccer.schedules (
-	id varchar(10) NOT NULL,
-	competition_id varchar(10) NULL,
-	home_team_id varchar(20) NULL,
-	away_team_id varchar(20) NULL,
+	id text NOT NULL,
+	competition_id text NULL,
+	home_team_id text NULL,
+	away_team_id text NULL,
 	wk varchar(5) NULL,
 	match_date date NULL,
 	venue varchar(50) NULL,
@@ -291,11 +314,11 @@ CREATE TABLE soccer.schedules (
 -- DROP TABLE soccer.shot_creating_actions;
 
 CREATE TABLE soccer.shot_creating_actions (
-	sca_id varchar(100) NOT NULL,
-	shot_id varchar(100) NULL,
-	player_match_id varchar(100) NULL,
+	sca_id text NOT NULL,
+	shot_id text NULL,
+	player_match_id text NULL,
 	sca_event varchar(20) NULL,
-	squad_id varchar(20) NULL,
+	squad_id text NULL,
 	event_order int4 NULL,
 	"minute" int4 NULL,
 	stoppage_minute int4 NULL,
@@ -318,11 +341,11 @@ CREATE TABLE soccer.shot_creating_actions (
 -- DROP TABLE soccer.shots;
 
 CREATE TABLE soccer.shots (
-	shot_id varchar(100) NOT NULL,
-	shot_player_match_id varchar(100) NULL,
+	shot_id text NOT NULL,
+	shot_player_match_id text NULL,
 	"minute" int4 NULL,
 	stoppage_minute int4 NULL,
-	squad_id varchar(20) NULL,
+	squad_id text NULL,
 	xg float8 NULL,
 	psxg float8 NULL,
 	outcome varchar(20) NULL,
@@ -348,6 +371,116 @@ CREATE TABLE soccer.squads (
 );
 
 
+-- soccer.st_match_stats definition
+
+-- Drop table
+
+-- DROP TABLE soccer.st_match_stats;
+
+-- materialized copy of the soccer.match_stats view, maintained by soccer.update_match_stats
+CREATE TABLE soccer.st_match_stats (
+	player varchar(255) NULL,
+	squad varchar(255) NULL,
+	match_date date NULL,
+	competition varchar(100) NULL,
+	season varchar(20) NULL,
+	venue varchar(50) NULL,
+	id text NOT NULL,
+	minutes int4 NULL,
+	goals int4 NULL,
+	assists int4 NULL,
+	pk_goals int4 NULL,
+	pk_attempts int4 NULL,
+	shots int4 NULL,
+	shots_on_target int4 NULL,
+	yellow_cards int4 NULL,
+	red_cards int4 NULL,
+	touches int4 NULL,
+	tackles int4 NULL,
+	interceptions int4 NULL,
+	blocks int4 NULL,
+	xg float8 NULL,
+	npxg float8 NULL,
+	xag float8 NULL,
+	shot_creating_actions int4 NULL,
+	goal_creating_actions int4 NULL,
+	passes_completed int4 NULL,
+	passes_attempted int4 NULL,
+	progressive_passes int4 NULL,
+	carries int4 NULL,
+	progressive_carries int4 NULL,
+	take_ons_attempted int4 NULL,
+	take_ons_succeeded int4 NULL,
+	total_pass_distance int4 NULL,
+	total_progressive_pass_distance int4 NULL,
+	short_passes_completed int4 NULL,
+	short_passes_attempted int4 NULL,
+	medium_passes_completed int4 NULL,
+	medium_passes_attempted int4 NULL,
+	long_passes_completed int4 NULL,
+	long_passes_attempted int4 NULL,
+	xa float8 NULL,
+	key_passes int4 NULL,
+	passes_into_final_third int4 NULL,
+	crosses_into_penalty_area int4 NULL,
+	passes_live int4 NULL,
+	passes_dead_ball int4 NULL,
+	passes_free_kick int4 NULL,
+	passes_through_balls int4 NULL,
+	passes_switches int4 NULL,
+	passes_throw_ins int4 NULL,
+	passes_corner_kicks int4 NULL,
+	corner_kicks_inswinging int4 NULL,
+	corner_kicks_outswinging int4 NULL,
+	corner_kicks_straight int4 NULL,
+	passes_offside int4 NULL,
+	passes_blocked int4 NULL,
+	touches_def_penalty_area int4 NULL,
+	touches_def_third int4 NULL,
+	touches_mid_third int4 NULL,
+	touches_att_third int4 NULL,
+	touches_att_penalty_area int4 NULL,
+	take_ons_tackled int4 NULL,
+	total_carries_distance int4 NULL,
+	total_progressive_carries_distance int4 NULL,
+	carries_into_final_third int4 NULL,
+	carries_into_penalty_area int4 NULL,
+	carries_miscontrolled int4 NULL,
+	carries_disposessed int4 NULL,
+	passes_recieved int4 NULL,
+	progressive_passes_recieved int4 NULL,
+	tackles_att int4 NULL,
+	tackles_won int4 NULL,
+	tackles_def_third int4 NULL,
+	tackles_mid_third int4 NULL,
+	tackles_att_third int4 NULL,
+	challenges_won int4 NULL,
+	challenges_lost int4 NULL,
+	challenges_att int4 NULL,
+	shot_blocks int4 NULL,
+	pass_blocks int4 NULL,
+	clearances int4 NULL,
+	errors_lead_to_shot int4 NULL,
+	second_yellow_cards int4 NULL,
+	fouls int4 NULL,
+	fouled int4 NULL,
+	offsides int4 NULL,
+	crosses int4 NULL,
+	pks_won int4 NULL,
+	pks_converted int4 NULL,
+	own_goals int4 NULL,
+	ball_recoveries int4 NULL,
+	aerial_duels_won int4 NULL,
+	aerial_duels_lost int4 NULL,
+	match_id text NULL,
+	CONSTRAINT st_match_stats_pkey PRIMARY KEY (id)
+);
+CREATE INDEX st_match_stats_competition_season_idx ON soccer.st_match_stats USING btree (competition, season);
+CREATE INDEX st_match_stats_player_idx ON soccer.st_match_stats USING btree (player);
+CREATE INDEX st_match_stats_squad_idx ON soccer.st_match_stats USING btree (squad);
+CREATE INDEX st_match_stats_match_id_idx ON soccer.st_match_stats USING btree (match_id);
+
+
 -- soccer.st_opponent_season_reports definition
 
 -- Drop table
@@ -365,6 +498,7 @@ CREATE TABLE soccer.st_opponent_season_reports (
 	opponent_passes_attempted int8 NULL,
 	oppenent_progressive_passes int8 NULL
 );
+CREATE INDEX st_opponent_season_reports_squad_competition_season_idx ON soccer.st_opponent_season_reports USING btree (squad_id, competition_id, season);
 
 
 -- soccer.st_player_match_reports definition
@@ -374,7 +508,7 @@ CREATE TABLE soccer.st_opponent_season_reports (
 -- DROP TABLE soccer.st_player_match_reports;
 
 CREATE TABLE soccer.st_player_match_reports (
-	id varchar(100) NULL,
+	id text NULL,
 	minutes int4 NULL,
 	goals int4 NULL,
 	assists int4 NULL,
@@ -461,8 +595,10 @@ CREATE TABLE soccer.st_player_match_reports (
 	ball_recoveries int4 NULL,
 	aerial_duels_won int4 NULL,
 	aerial_duels_lost int4 NULL,
-	match_id varchar(20) NULL
+	match_id text NULL
 );
+CREATE INDEX st_player_match_reports_id_idx ON soccer.st_player_match_reports USING btree (id);
+CREATE INDEX st_player_match_reports_match_id_idx ON soccer.st_player_match_reports USING btree (match_id);
 
 
 -- soccer.st_team_season_reports definition
@@ -482,3 +618,4 @@ CREATE TABLE soccer.st_team_season_reports (
 	passes_attempted int8 NULL,
 	progressive_passes int8 NULL
 );
+CREATE INDEX st_team_season_reports_squad_competition_season_idx ON soccer.st_team_season_reports USING btree (squad_id, competition_id, season);
@@ -0,0 +1,20 @@
+from backfill import BackfillState
+from soccer_club_scraping_code import SKIPPED_STATUS
+
+
+def test_skipped_units_are_done(tmp_path):
+    state = BackfillState(str(tmp_path / 'state.json'))
+    state.mark('5e000000', 'keeper', SKIPPED_STATUS, 'soccer.player_match_keeper_stats does not exist')
+    state.mark('5e000000', 'summary', 'loaded')
+    state.save()
+
+    state = BackfillState(str(tmp_path / 'state.json'))
+    assert not state.needs_work('5e000000', 'keeper', max_attempts=3)
+    assert not state.needs_work('5e000000', 'summary', max_attempts=3)
+    assert state.failures().empty
+
+def test_failed_units_are_retried(tmp_path):
+    state = BackfillState(str(tmp_path / 'state.json'))
+    state.mark('5e000000', 'passing', 'failed', 'timeout')
+    assert state.needs_work('5e000000', 'passing', max_attempts=3)
+    assert list(state.failures().category) == ['passing']
@@ -21,11 +21,11 @@ AS SELECT p.player,
     mss.clearances,
     mss.errors_lead_to_shot
    FROM soccer.player_match_defense_stats mss
-     LEFT JOIN soccer.match_report_ids mri ON mss.id::text = mri.id::text
-     LEFT JOIN soccer.players p ON p.id = mri.player_id::text
-     LEFT JOIN soccer.squads sq ON sq.id = mri.squad_id::text
-     LEFT JOIN soccer.squads squ ON squ.id = mri.opponent_id::text
-     LEFT JOIN soccer.player_match_summary_stats summary ON summary.id::text = mss.id::text;
+     LEFT JOIN soccer.match_report_ids mri ON mss.id = mri.id
+     LEFT JOIN soccer.players p ON p.id = mri.player_id
+     LEFT JOIN soccer.squads sq ON sq.id = mri.squad_id
+     LEFT JOIN soccer.squads squ ON squ.id = mri.opponent_id
+     LEFT JOIN soccer.player_match_summary_stats summary ON summary.id = mss.id;
 
 
 -- soccer.match_misc_stats source
@@ -52,11 +52,11 @@ AS SELECT p.player,
     mss.aerial_duels_won,
     mss.aerial_duels_lost
    FROM soccer.player_match_misc_stats mss
-     LEFT JOIN soccer.match_report_ids mri ON mss.id::text = mri.id::text
-     LEFT JOIN soccer.players p ON p.id = mri.player_id::text
-     LEFT JOIN soccer.squads sq ON sq.id = mri.squad_id::text
-     LEFT JOIN soccer.squads squ ON squ.id = mri.opponent_id::text
-     LEFT JOIN soccer.player_match_summary_stats summary ON summary.id::text = mss.id::text;
+     LEFT JOIN soccer.match_report_ids mri ON mss.id = mri.id
+     LEFT JOIN soccer.players p ON p.id = mri.player_id
+     LEFT JOIN soccer.squads sq ON sq.id = mri.squad_id
+     LEFT JOIN soccer.squads squ ON squ.id = mri.opponent_id
+     LEFT JOIN soccer.player_match_summary_stats summary ON summary.id = mss.id;
 
 
 -- soccer.match_passing_type_stats source
@@ -82,11 +82,11 @@ AS SELECT p.player,
     mss.passes_offside,
     mss.passes_blocked
    FROM soccer.player_match_passing_types_stats mss
-     LEFT JOIN soccer.match_report_ids mri ON mss.id::text = mri.id::text
-     LEFT JOIN soccer.players p ON p.id = mri.player_id::text
-     LEFT JOIN soccer.squads sq ON sq.id = mri.squad_id::text
-     LEFT JOIN soccer.squads squ ON squ.id = mri.opponent_id::text
-     LEFT JOIN soccer.player_match_summary_stats summary ON summary.id::text = mss.id::text;
+     LEFT JOIN soccer.match_report_ids mri ON mss.id = mri.id
+     LEFT JOIN soccer.players p ON p.id = mri.player_id
+     LEFT JOIN soccer.squads sq ON sq.id = mri.squad_id
+     LEFT JOIN soccer.squads squ ON squ.id = mri.opponent_id
+     LEFT JOIN soccer.player_match_summary_stats summary ON summary.id = mss.id;
 
 
 -- soccer.match_possession_stats source
@@ -113,11 +113,11 @@ AS SELECT p.player,
     mss.passes_recieved,
     mss.progressive_passes_recieved
    FROM soccer.player_match_possession_stats mss
-     LEFT JOIN soccer.match_report_ids mri ON mss.id::text = mri.id::text
-     LEFT JOIN soccer.players p ON p.id = mri.player_id::text
-     LEFT JOIN soccer.squads sq ON sq.id = mri.squad_id::text
-     LEFT JOIN soccer.squads squ ON squ.id = mri.opponent_id::text
-     LEFT JOIN soccer.player_match_summary_stats summary ON summary.id::text = mss.id::text;
+     LEFT JOIN soccer.match_report_ids mri ON mss.id = mri.id
+     LEFT JOIN soccer.players p ON p.id = mri.player_id
+     LEFT JOIN soccer.squads sq ON sq.id = mri.squad_id
+     LEFT JOIN soccer.squads squ ON squ.id = mri.opponent_id
+     LEFT JOIN soccer.player_match_summary_stats summary ON summary.id = mss.id;
 
 
 -- soccer.match_stats source
@@ -218,16 +218,16 @@ AS SELECT p.player,
     mi.aerial_duels_lost,
     sch.id AS match_id
    FROM soccer.player_match_summary_stats su
-     LEFT JOIN soccer.match_report_ids mr ON mr.id::text = su.id::text
-     LEFT JOIN soccer.players p ON p.id = mr.player_id::text
-     LEFT JOIN soccer.squads sq ON sq.id = mr.squad_id::text
-     LEFT JOIN soccer.schedules sch ON sch.id::text = mr.match_id::text
-     LEFT JOIN soccer.competitions co ON co.id = sch.competition_id::text
-     LEFT JOIN soccer.player_match_passing_stats pa ON pa.id::text = su.id::text
-     LEFT JOIN soccer.player_match_passing_types_stats pt ON pt.id::text = su.id::text
-     LEFT JOIN soccer.player_match_possession_stats po ON po.id::text = su.id::text
-     LEFT JOIN soccer.player_match_defense_stats de ON de.id::text = su.id::text
-     LEFT JOIN soccer.player_match_misc_stats mi ON mi.id::text = su.id::text;
+     LEFT JOIN soccer.match_report_ids mr ON mr.id = su.id
+     LEFT JOIN soccer.players p ON p.id = mr.player_id
+     LEFT JOIN soccer.squads sq ON sq.id = mr.squad_id
+     LEFT JOIN soccer.schedules sch ON sch.id = mr.match_id
+     LEFT JOIN soccer.competitions co ON co.id = sch.competition_id
+     LEFT JOIN soccer.player_match_passing_stats pa ON pa.id = su.id
+     LEFT JOIN soccer.player_match_passing_types_stats pt ON pt.id = su.id
+     LEFT JOIN soccer.player_match_possession_stats po ON po.id = su.id
+     LEFT JOIN soccer.player_match_defense_stats de ON de.id = su.id
+     LEFT JOIN soccer.player_match_misc_stats mi ON mi.id = su.id;
 
 
 -- soccer.match_summary_stats source
@@ -263,10 +263,10 @@ AS SELECT p.player,
     mss.take_ons_attempted,
     mss.take_ons_succeeded
    FROM soccer.player_match_summary_stats mss
-     LEFT JOIN soccer.match_report_ids mri ON mss.id::text = mri.id::text
-     LEFT JOIN soccer.players p ON p.id = mri.player_id::text
-     LEFT JOIN soccer.squads sq ON sq.id = mri.squad_id::text
-     LEFT JOIN soccer.squads squ ON squ.id = mri.opponent_id::text;
+     LEFT JOIN soccer.match_report_ids mri ON mss.id = mri.id
+     LEFT JOIN soccer.players p ON p.id = mri.player_id
+     LEFT JOIN soccer.squads sq ON sq.id = mri.squad_id
+     LEFT JOIN soccer.squads squ ON squ.id = mri.opponent_id;
 
 
 -- soccer.player_appearances source
@@ -277,23 +277,23 @@ AS SELECT mri.id AS player_match_id,
     sq.squad,
     sc.match_date
    FROM soccer.match_report_ids mri
-     LEFT JOIN soccer.players p ON p.id = mri.player_id::text
-     LEFT JOIN soccer.squads sq ON sq.id = mri.squad_id::text
-     LEFT JOIN soccer.schedules sc ON sc.id::text = mri.match_id::text;
+     LEFT JOIN soccer.players p ON p.id = mri.player_id
+     LEFT JOIN soccer.squads sq ON sq.id = mri.squad_id
+     LEFT JOIN soccer.schedules sc ON sc.id = mri.match_id;
 
 
 -- soccer.player_competition_ranks source
 
 CREATE OR REPLACE VIEW soccer.player_competition_ranks
-AS SELECT match_stats.player,
-    match_stats.squad,
-    match_stats.season,
-    match_stats.competition,
-    sum(match_stats.goals) AS goals,
-    rank() OVER (PARTITION BY match_stats.competition, match_stats.season ORDER BY (sum(match_stats.goals)) DESC) AS goals_rank,
-    sum(match_stats.xg) AS xg,
-    rank() OVER (PARTITION BY match_stats.competition, match_stats.season ORDER BY (sum(match_stats.xg)) DESC) AS xg_rank,
-    sum(match_stats.assists) AS assists,
-    rank() OVER (PARTITION BY match_stats.competition, match_stats.season ORDER BY (sum(match_stats.assists)) DESC) AS assists_rank
-   FROM soccer.match_stats
-  GROUP BY match_stats.player, match_stats.squad, match_stats.season, match_stats.competition;
+AS SELECT st_match_stats.player,
+    st_match_stats.squad,
+    st_match_stats.season,
+    st_match_stats.competition,
+    sum(st_match_stats.goals) AS goals,
+    rank() OVER (PARTITION BY st_match_stats.competition, st_match_stats.season ORDER BY (sum(st_match_stats.goals)) DESC) AS goals_rank,
+    sum(st_match_stats.xg) AS xg,
+    rank() OVER (PARTITION BY st_match_stats.competition, st_match_stats.season ORDER BY (sum(st_match_stats.xg)) DESC) AS xg_rank,
+    sum(st_match_stats.assists) AS assists,
+    rank() OVER (PARTITION BY st_match_stats.competition, st_match_stats.season ORDER BY (sum(st_match_stats.assists)) DESC) AS assists_rank
+   FROM soccer.st_match_stats
+  GROUP BY st_match_stats.player, st_match_stats.squad, st_match_stats.season, st_match_stats.competition;